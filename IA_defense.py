@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Protocole de défense IA - Luxuria Studio"""
 
+import re
 import json
 import hashlib
 import logging
@@ -10,13 +11,15 @@ from email.message import EmailMessage
 from pathlib import Path
 from secrets import token_hex
 from assistant_pdg import AssistantPDG
+from journal_menaces import journal
+from flux_changements import SUPPRIME, flux
 
 # === Répertoires
 BASE_DIR = Path(__file__).resolve().parent
 DEFENSE_DIR = BASE_DIR / "luxuria_defense"
 HONEYPOT_DIR = DEFENSE_DIR / "honeypots"
 KEYS_FILE = DEFENSE_DIR / "clefs_securite.json"
-THREATS_JSON = DEFENSE_DIR / "menaces_detectees.json"
+BASELINE_JSON = DEFENSE_DIR / "empreintes_scan.json"
 LOG_FILE = DEFENSE_DIR / "defense.log"
 
 # === Configuration admin
@@ -34,6 +37,9 @@ SIGNATURES_MALWARE = {
     "base64.b64decode": "obfuscation potentielle"
 }
 
+# === Lecture en flux (taille des blocs lus pour l'analyse)
+TAILLE_BLOC = 1024 * 1024
+
 # === Modules critiques
 CRITICAL_MODULES = [
     "admin_luxuria.py",
@@ -42,6 +48,10 @@ CRITICAL_MODULES = [
     "requirements.py"
 ]
 
+# === Initialisation (avant le journal, qui écrit dans DEFENSE_DIR)
+DEFENSE_DIR.mkdir(exist_ok=True)
+HONEYPOT_DIR.mkdir(exist_ok=True)
+
 # === Logger
 logging.basicConfig(
     level=logging.INFO,
@@ -52,28 +62,138 @@ logging.basicConfig(
     ]
 )
 
-# === Initialisation
-DEFENSE_DIR.mkdir(exist_ok=True)
-HONEYPOT_DIR.mkdir(exist_ok=True)
-
 def hacher_contenu(contenu: str) -> str:
     return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
 
-def detecter_malwares(script: Path) -> list:
+def compiler_signatures(signatures: dict) -> tuple:
+    """Compile toutes les signatures en un seul motif parcouru en une passe.
+
+    Le motif est une alternance dans un lookahead, triée de la plus longue à la
+    plus courte : chaque position du texte est testée une seule fois et les
+    recouvrements sont conservés. Les signatures plus courtes qui sont des
+    préfixes de la signature trouvée sont ajoutées via la table des préfixes.
+    """
+    ordre = sorted(signatures, key=len, reverse=True)
+    motif = re.compile(
+        b"(?=(" + b"|".join(re.escape(sig.encode("utf-8")) for sig in ordre) + b"))"
+    )
+    prefixes = {
+        sig.encode("utf-8"): [
+            autre.encode("utf-8") for autre in ordre
+            if autre != sig and sig.startswith(autre)
+        ]
+        for sig in ordre
+    }
+    return motif, prefixes
+
+_MOTIF_SIGNATURES, _PREFIXES_SIGNATURES = compiler_signatures(SIGNATURES_MALWARE)
+_RECOUVREMENT = max(len(sig.encode("utf-8")) for sig in SIGNATURES_MALWARE) - 1
+VERSION_SIGNATURES = hashlib.sha256(
+    json.dumps(sorted(SIGNATURES_MALWARE.items()), ensure_ascii=False).encode("utf-8")
+).hexdigest()
+
+def _rechercher(donnees: bytes, trouvees: set) -> None:
+    for correspondance in _MOTIF_SIGNATURES.finditer(donnees):
+        signature = correspondance.group(1)
+        if signature in trouvees:
+            continue
+        trouvees.add(signature)
+        trouvees.update(_PREFIXES_SIGNATURES[signature])
+        if len(trouvees) == len(SIGNATURES_MALWARE):
+            break
+
+def rechercher_signatures(donnees: bytes) -> set:
+    """Retourne l'ensemble des signatures présentes dans les données."""
+    trouvees = set()
+    _rechercher(donnees, trouvees)
+    return {sig.decode("utf-8") for sig in trouvees}
+
+def analyser_flux(script: Path, taille_bloc: int = TAILLE_BLOC) -> tuple:
+    """Lit le fichier par blocs, cherche les signatures et calcule son SHA-256.
+
+    Chaque bloc est précédé de la fin du bloc précédent (longueur de la plus
+    longue signature moins un) pour détecter les signatures à cheval sur deux
+    blocs. La mémoire utilisée ne dépend pas de la taille du fichier.
+    """
+    trouvees = set()
+    empreinte = hashlib.sha256()
+    reste = b""
+    with script.open("rb") as flux:
+        while True:
+            bloc = flux.read(taille_bloc)
+            if not bloc:
+                break
+            empreinte.update(bloc)
+            if len(trouvees) < len(SIGNATURES_MALWARE):
+                fenetre = reste + bloc
+                _rechercher(fenetre, trouvees)
+                reste = fenetre[-_RECOUVREMENT:] if _RECOUVREMENT else b""
+    return {sig.decode("utf-8") for sig in trouvees}, empreinte.hexdigest()
+
+def empreinte_fichier(path: Path) -> dict:
+    """Retourne la taille et la date de modification (ns) d'un fichier."""
+    infos = path.stat()
+    return {"taille": infos.st_size, "mtime_ns": infos.st_mtime_ns}
+
+def hacher_fichier(path: Path) -> str:
+    empreinte = hashlib.sha256()
+    with path.open("rb") as flux:
+        for bloc in iter(lambda: flux.read(TAILLE_BLOC), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def charger_baseline() -> dict:
+    """Charge les empreintes du dernier scan (vides si les signatures ont changé)."""
+    baseline = {}
+    if BASELINE_JSON.exists():
+        try:
+            baseline = json.loads(BASELINE_JSON.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            baseline = {}
+    fichiers = baseline.get("fichiers", {})
+    if baseline.get("version") != VERSION_SIGNATURES:
+        if fichiers:
+            logging.info("Signatures modifiées : analyse complète des fichiers.")
+        fichiers = {}
+    return {
+        "version": VERSION_SIGNATURES,
+        "fichiers": fichiers,
+        "honeypots": baseline.get("honeypots", {})
+    }
+
+def sauvegarder_baseline(baseline: dict) -> None:
+    BASELINE_JSON.write_text(json.dumps(baseline, ensure_ascii=False), encoding="utf-8")
+
+def detecter_malwares(script: Path, baseline: dict = None) -> list:
+    """Analyse un script ; avec une baseline, ignore les fichiers inchangés."""
     menaces = []
+    connus = baseline["fichiers"] if baseline is not None else {}
+    cle = str(script)
     try:
-        contenu = script.read_text(encoding="utf-8")
-        for signature, description in SIGNATURES_MALWARE.items():
-            if signature in contenu:
-                menaces.append({
-                    "fichier": str(script),
-                    "signature": signature,
-                    "description": description,
-                    "hash": hacher_contenu(contenu),
-                    "horodatage": datetime.datetime.now().isoformat()
-                })
+        stat_actuel = empreinte_fichier(script)
+        precedent = connus.get(cle)
+        if precedent and all(precedent[k] == v for k, v in stat_actuel.items()):
+            return menaces
+        trouvees, empreinte = analyser_flux(script)
     except Exception as err:
         logging.warning(f"Erreur lecture {script.name} : {err}")
+        return menaces
+
+    if baseline is not None:
+        connus[cle] = {**stat_actuel, "sha256": empreinte}
+        if precedent and precedent.get("sha256") == empreinte:
+            return menaces
+
+    horodatage = datetime.datetime.now().isoformat()
+    for signature, description in SIGNATURES_MALWARE.items():
+        if signature in trouvees:
+            menaces.append({
+                "fichier": cle,
+                "signature": signature,
+                "description": description,
+                "hash": empreinte,
+                "horodatage": horodatage
+            })
     return menaces
 
 def bloquer(script: Path) -> None:
@@ -84,30 +204,43 @@ def bloquer(script: Path) -> None:
         logging.error(f"Erreur blocage {script.name} : {err}")
 
 def recenser(menaces: list) -> None:
-    historique = []
-    if THREATS_JSON.exists():
-        try:
-            historique = json.loads(THREATS_JSON.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
-            historique = []
-    historique.extend(menaces)
-    THREATS_JSON.write_text(json.dumps(historique, indent=2, ensure_ascii=False), encoding="utf-8")
+    journal().ajouter(menaces)
     logging.info(f"{len(menaces)} menace(s) recensée(s).")
 
-def deployer_honeypots() -> None:
+def deployer_honeypots(baseline: dict = None) -> None:
+    """Déploie les leurres manquants et mémorise leur empreinte."""
+    connus = baseline["honeypots"] if baseline is not None else {}
     leurres = ["config_admin.py", "luxuria_secret.py", "db_credentials.py"]
     for leurre in leurres:
         path = HONEYPOT_DIR / leurre
+        if path.exists() and str(path) in connus:
+            continue
         contenu = f"# Honeypot : {leurre}\n# Ne pas toucher\n"
         path.write_text(contenu, encoding="utf-8")
+        connus[str(path)] = {**empreinte_fichier(path), "sha256": hacher_fichier(path)}
         logging.info(f"Honeypot déployé : {leurre}")
 
-def verifier_honeypots() -> list:
+def verifier_honeypots(baseline: dict = None) -> list:
+    """Compare chaque leurre à son empreinte ; relit uniquement s'il a bougé."""
     intrusions = []
+    connus = baseline["honeypots"] if baseline is not None else {}
     for honeypot in HONEYPOT_DIR.glob("*.py"):
-        if honeypot.stat().st_mtime != honeypot.stat().st_ctime:
-            intrusions.append(str(honeypot))
-            logging.warning(f"Intrusion détectée sur honeypot : {honeypot.name}")
+        cle = str(honeypot)
+        reference = connus.get(cle)
+        if reference is None:
+            if honeypot.stat().st_mtime == honeypot.stat().st_ctime:
+                continue
+        else:
+            actuel = empreinte_fichier(honeypot)
+            if all(reference[k] == v for k, v in actuel.items()):
+                continue
+            if hacher_fichier(honeypot) == reference["sha256"]:
+                reference.update(actuel)
+                continue
+            # Le leurre sera redéployé au prochain passage
+            del connus[cle]
+        intrusions.append(cle)
+        logging.warning(f"Intrusion détectée sur honeypot : {honeypot.name}")
     return intrusions
 
 def revoquer_et_regenerer_cles() -> None:
@@ -137,18 +270,35 @@ def notifier_admin(sujet: str, corps: str) -> None:
 def defense_luxuria() -> None:
     logging.info("🛡️ Lancement du protocole IA Defense Luxuria")
 
-    deployer_honeypots()
-    intrusions = verifier_honeypots()
+    baseline = charger_baseline()
+    deployer_honeypots(baseline)
+    intrusions = verifier_honeypots(baseline)
+
+    # Seuls les scripts changés depuis le dernier passage sont analysés ;
+    # sans curseur (ou baseline vidée par un changement de signatures), tout est repris.
+    jeton, changements = flux().nouveautes("IA_defense")
+    if changements is None or not baseline["fichiers"]:
+        scripts = list(BASE_DIR.glob("*.py"))
+        disparus = set(baseline["fichiers"]) - {str(s) for s in scripts}
+    else:
+        scripts = [p for p, t in changements.items()
+                   if t != SUPPRIME and p.parent == BASE_DIR and p.suffix == ".py"]
+        disparus = {str(p) for p, t in changements.items() if t == SUPPRIME}
 
     menaces_detectees = []
-    for script in BASE_DIR.glob("*.py"):
+    for script in scripts:
         if script.name == "IA_defense.py":
             continue
-        menaces = detecter_malwares(script)
+        menaces = detecter_malwares(script, baseline)
         if menaces:
             bloquer(script)
             menaces_detectees.extend(menaces)
 
+    for disparu in disparus:
+        baseline["fichiers"].pop(disparu, None)
+    sauvegarder_baseline(baseline)
+    flux().acquitter("IA_defense", jeton)
+
     if menaces_detectees or intrusions:
         recenser(menaces_detectees)
         revoquer_et_regenerer_cles()
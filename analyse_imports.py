@@ -2,6 +2,7 @@ import logging
 from typing import Union, List, Dict
 from pathlib import Path
 from assistant_pdg import AssistantPDG
+from cache_ast import cache
 
 # Configuration du logging
 logging.basicConfig(
@@ -14,26 +15,17 @@ imports_map: Dict[str, List[str]] = {}
 
 def extract_imports(file_path: Union[str, Path]) -> List[str]:
     """Extrait les modules importés dans un fichier Python."""
-    found_modules: List[str] = []
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                stripped = line.strip()
-                if stripped.startswith('import '):
-                    parts = stripped.split()
-                    if len(parts) >= 2:
-                        found_modules.append(parts[1].split('.')[0])
-                elif stripped.startswith('from '):
-                    parts = stripped.split()
-                    if len(parts) >= 2:
-                        found_modules.append(parts[1].split('.')[0])
-    except FileNotFoundError:
+    if not Path(file_path).exists():
         logging.warning(f"Fichier introuvable : {file_path}")
-    except PermissionError:
+        return []
+    resume = cache().resumer(file_path)
+    if resume is None:
         logging.warning(f"Permission refusée : {file_path}")
-    except UnicodeDecodeError:
+        return []
+    if resume.get("encodage") is False:
         logging.warning(f"Encodage illisible : {file_path}")
-    return found_modules
+        return []
+    return list(resume["imports"])
 
 def scan_imports(directory: Union[str, Path]) -> None:
     """Scanne tous les fichiers .py du dossier pour extraire les imports."""
@@ -43,6 +35,7 @@ def scan_imports(directory: Union[str, Path]) -> None:
             found = extract_imports(file_path)
             if found:
                 imports_map[str(file_path)] = found
+    cache().sauvegarder()
 
 def afficher_resultats() -> None:
     """Affiche les résultats de l'analyse."""
@@ -7,6 +7,7 @@ import sys
 import logging
 import subprocess
 from pathlib import Path
+from flux_changements import flux  # Inventaire tenu à jour par le flux des changements
 
 # === Configuration de base
 BASE_PATH = Path(__file__).resolve().parent
@@ -50,16 +51,17 @@ class AssistantPDG:
 
     @classmethod
     def lister_scripts(cls) -> dict[str, list[str]]:
+        # Seuls les dossiers modifiés depuis le dernier inventaire sont relus
+        flux().actualiser()
         scripts_py, scripts_html = [], []
-        for path in BASE_PATH.rglob("*"):
-            if path.is_file():
-                rel = path.relative_to(BASE_PATH).as_posix()
-                if path.name.startswith(".") or path.suffix not in {".py", ".html"}:
-                    continue
-                if path.suffix == ".py" and path.name not in EXCLUSIONS:
-                    scripts_py.append(rel)
-                elif path.suffix == ".html":
-                    scripts_html.append(rel)
+        for rel in flux().fichiers({".py", ".html"}):
+            nom = rel.rsplit("/", 1)[-1]
+            if nom.startswith("."):
+                continue
+            if rel.endswith(".py") and nom not in EXCLUSIONS:
+                scripts_py.append(rel)
+            elif rel.endswith(".html"):
+                scripts_html.append(rel)
         return {"py": sorted(scripts_py), "html": sorted(scripts_html)}
 
     @classmethod
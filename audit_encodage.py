@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Audit d'encodage en flux (UTF-8 et ASCII) - Luxuria Studio.
+
+Les fichiers sont projetés en mémoire (mmap) ou lus par grands blocs et
+vérifiés au niveau des octets : un bloc ASCII (cas courant) est validé par
+bytes.isascii sans être décodé, les autres passent dans un décodeur UTF-8
+incrémental. La mémoire utilisée ne dépend que de la taille des blocs.
+"""
+
+import re
+import mmap
+import codecs
+from pathlib import Path
+from typing import Dict, Iterator, Tuple, Union
+
+# === Configuration
+TAILLE_BLOC = 4 * 1024 * 1024
+MAX_POSITIONS = 20   # positions non ASCII détaillées par fichier
+
+_OCTET_NON_ASCII = re.compile(rb"[\x80-\xff]")
+_OCTETS_HAUTS = bytes(range(0x80, 0x100))
+
+
+def _blocs(chemin: Path, taille_bloc: int) -> Iterator[Tuple[int, bytes]]:
+    """Découpe le fichier en (décalage, bloc) ; mmap si possible, lecture sinon."""
+    with chemin.open("rb") as flux:
+        try:
+            vue = mmap.mmap(flux.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Fichier vide ou non projetable (pipe, système de fichiers spécial)
+            decalage = 0
+            for bloc in iter(lambda: flux.read(taille_bloc), b""):
+                yield decalage, bloc
+                decalage += len(bloc)
+            return
+        with vue:
+            for decalage in range(0, len(vue), taille_bloc):
+                yield decalage, vue[decalage:decalage + taille_bloc]
+
+def auditer_fichier(chemin: Union[str, Path], taille_bloc: int = TAILLE_BLOC,
+                    max_positions: int = MAX_POSITIONS) -> Dict:
+    """Vérifie un fichier sans le décoder en entier.
+
+    Retourne un dictionnaire :
+      - taille : nombre d'octets lus
+      - ascii : True si aucun octet >= 0x80
+      - utf8 : True si le fichier est de l'UTF-8 valide
+      - erreur_utf8 : {"decalage", "ligne"} de la première séquence invalide, ou None
+      - non_ascii : nombre d'octets non ASCII
+      - positions : [{"decalage", "ligne"}] des premiers octets non ASCII
+    """
+    chemin = Path(chemin)
+    decodeur = codecs.getincrementaldecoder("utf-8")("strict")
+    resultat = {"taille": 0, "ascii": True, "utf8": True, "erreur_utf8": None,
+                "non_ascii": 0, "positions": []}
+    lignes = 0  # lignes complètes avant le bloc courant (utile aux positions seulement)
+
+    for decalage, bloc in _blocs(chemin, taille_bloc):
+        resultat["taille"] += len(bloc)
+        if bloc.isascii():
+            if resultat["utf8"] and decodeur.getstate()[0]:
+                _valider(decodeur, bloc, decalage, lignes, resultat)
+            lignes += bloc.count(b"\n")
+            continue
+
+        resultat["ascii"] = False
+        if resultat["utf8"]:
+            _valider(decodeur, bloc, decalage, lignes, resultat)
+        if len(resultat["positions"]) < max_positions:
+            for trouve in _OCTET_NON_ASCII.finditer(bloc):
+                if len(resultat["positions"]) >= max_positions:
+                    break
+                resultat["positions"].append({
+                    "decalage": decalage + trouve.start(),
+                    "ligne": lignes + bloc.count(b"\n", 0, trouve.start()) + 1
+                })
+        resultat["non_ascii"] += len(bloc) - len(bloc.translate(None, _OCTETS_HAUTS))
+        lignes += bloc.count(b"\n")
+
+    if resultat["utf8"] and decodeur.getstate()[0]:
+        # Séquence multi-octets tronquée en fin de fichier
+        _valider(decodeur, b"", resultat["taille"], lignes, resultat, final=True)
+    return resultat
+
+def _valider(decodeur, bloc: bytes, decalage: int, lignes: int, resultat: Dict, final: bool = False) -> None:
+    en_attente = decodeur.getstate()[0]
+    try:
+        decodeur.decode(bloc, final)
+    except UnicodeDecodeError as err:
+        # err.start est relatif aux octets en attente suivis du bloc
+        position = decalage - len(en_attente) + err.start
+        relatif = max(position - decalage, 0)
+        resultat["utf8"] = False
+        resultat["erreur_utf8"] = {
+            "decalage": position,
+            "ligne": lignes + bloc.count(b"\n", 0, relatif) + 1
+        }
+
+def est_ascii(chemin: Union[str, Path], taille_bloc: int = TAILLE_BLOC) -> bool:
+    """True si le fichier ne contient que de l'ASCII (s'arrête au premier bloc fautif)."""
+    return all(bloc.isascii() for _, bloc in _blocs(Path(chemin), taille_bloc))
+
+def decrire(resultat: Dict) -> str:
+    """Résumé lisible d'un résultat d'audit."""
+    if not resultat["utf8"]:
+        erreur = resultat["erreur_utf8"]
+        return f"UTF-8 invalide a l'octet {erreur['decalage']} (ligne {erreur['ligne']})"
+    if resultat["ascii"]:
+        return "ASCII"
+    premiere = resultat["positions"][0]
+    return (f"UTF-8 non ASCII : {resultat['non_ascii']} octet(s), "
+            f"premier a l'octet {premiere['decalage']} (ligne {premiere['ligne']})")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Cache partagé des analyses syntaxiques (AST) des scripts Luxuria Studio."""
+
+import ast
+import sys
+import json
+import time
+import hashlib
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# === Configuration
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".luxuria_cache"
+CACHE_PATH = CACHE_DIR / "cache_ast.json"
+
+# Le statut syntaxique dépend de la version de Python : elle fait partie de la clé
+VERSION_CACHE = f"2-py{sys.version_info[0]}.{sys.version_info[1]}"
+DUREE_CONSERVATION = 30 * 24 * 3600
+
+# En dessous de ce nombre de fichiers, le pool de threads coûte plus qu'il ne rapporte.
+# Des threads et non des processus : un processus lancé par spawn réimporte __main__,
+# et tout module Luxuria importé s'exécute (AssistantPDG.register).
+SEUIL_PARALLELE = 64
+
+
+# === Analyse d'un source
+def extraire_imports_texte(contenu: str) -> List[str]:
+    """Extraction ligne à ligne, utilisée quand le fichier ne se parse pas."""
+    modules = []
+    for ligne in contenu.splitlines():
+        parts = ligne.strip().split()
+        if len(parts) >= 2 and parts[0] in ("import", "from"):
+            modules.append(parts[1].split(".")[0])
+    return list(dict.fromkeys(m for m in modules if m))
+
+def resumer_source(contenu: str, chemin: str = "<inconnu>") -> Dict:
+    """Construit le résumé d'un source : imports, définitions, noms, syntaxe, marqueurs."""
+    resume = {
+        "chemin_universel": "Path(__file__).resolve().parent" in contenu,
+        "bloc_main": "__name__" in contenu and "__main__" in contenu,
+        "syntaxe": None,
+        "imports": [],
+        "noms_importes": [],
+        "definitions": [],
+        "noms": {}
+    }
+    try:
+        tree = ast.parse(contenu, filename=chemin)
+        compile(tree, chemin, "exec", dont_inherit=True)
+    except SyntaxError as err:
+        resume["syntaxe"] = {"message": err.msg, "ligne": err.lineno}
+        resume["imports"] = extraire_imports_texte(contenu)
+        return resume
+    except (ValueError, TypeError) as err:
+        resume["syntaxe"] = {"message": str(err), "ligne": None}
+        resume["imports"] = extraire_imports_texte(contenu)
+        return resume
+
+    modules = []
+    noms = Counter()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name.split(".")[0] for alias in node.names)
+            resume["noms_importes"].extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and not node.level:
+                modules.append(node.module.split(".")[0])
+            resume["noms_importes"].extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.Name):
+            noms[node.id] += 1
+    resume["imports"] = list(dict.fromkeys(modules))
+    resume["noms"] = dict(noms)
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            resume["definitions"].append({"nom": node.name, "type": "fonction", "ligne": node.lineno})
+        elif isinstance(node, ast.ClassDef):
+            resume["definitions"].append({"nom": node.name, "type": "classe", "ligne": node.lineno})
+    return resume
+
+
+def resumer_octets(donnees: bytes, chemin: str = "<inconnu>") -> Dict:
+    try:
+        contenu = donnees.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"syntaxe": {"message": "encodage illisible", "ligne": None},
+                "encodage": False, "imports": [], "noms_importes": [],
+                "definitions": [], "noms": {}}
+    return resumer_source(contenu, chemin)
+
+def _lire_chronometre(chemin: str) -> Tuple[Optional[bytes], Optional[str], float]:
+    """Contenu, empreinte et durée de lecture d'un fichier (None : illisible)."""
+    debut = time.perf_counter()
+    try:
+        donnees = Path(chemin).read_bytes()
+    except OSError as err:
+        logging.warning(f"Lecture impossible : {chemin} ({type(err).__name__})")
+        return None, None, time.perf_counter() - debut
+    return donnees, hashlib.sha256(donnees).hexdigest(), time.perf_counter() - debut
+
+def _analyser_chronometre(tache: Tuple[str, bytes]) -> Tuple[Dict, float]:
+    """Résumé d'un source et durée d'analyse."""
+    chemin, donnees = tache
+    debut = time.perf_counter()
+    resume = resumer_octets(donnees, chemin)
+    return resume, time.perf_counter() - debut
+
+
+# === Cache sur disque
+class CacheAST:
+    """Résumés d'analyse indexés par empreinte SHA-256 du contenu.
+
+    Un fichier inchangé n'est jamais reparsé, quel que soit l'outil qui le
+    demande ; un fichier renommé ou copié réutilise aussi son entrée.
+    """
+
+    def __init__(self, chemin: Path = CACHE_PATH):
+        self.chemin = chemin
+        self.entrees: Dict[str, Dict] = {}
+        self.modifie = False
+        self.succes = 0
+        self.analyses = 0
+        if chemin.exists():
+            try:
+                donnees = json.loads(chemin.read_text(encoding="utf-8"))
+                if donnees.get("version") == VERSION_CACHE:
+                    self.entrees = donnees.get("entrees", {})
+            except (OSError, json.JSONDecodeError) as err:
+                logging.warning(f"Cache AST ignoré ({type(err).__name__})")
+
+    def chercher(self, empreinte: str) -> Optional[Dict]:
+        entree = self.entrees.get(empreinte)
+        if entree is None:
+            return None
+        self.succes += 1
+        maintenant = int(time.time())
+        if maintenant - entree["vu"] > 24 * 3600:
+            entree["vu"] = maintenant
+            self.modifie = True
+        return entree["resume"]
+
+    def enregistrer(self, empreinte: str, resume: Dict) -> None:
+        self.analyses += 1
+        self.entrees[empreinte] = {"resume": resume, "vu": int(time.time())}
+        self.modifie = True
+
+    def resumer_octets(self, donnees: bytes, chemin: str = "<inconnu>") -> Dict:
+        empreinte = hashlib.sha256(donnees).hexdigest()
+        resume = self.chercher(empreinte)
+        if resume is None:
+            resume = resumer_octets(donnees, chemin)
+            self.enregistrer(empreinte, resume)
+        return resume
+
+    def resumer(self, path: Union[str, Path]) -> Optional[Dict]:
+        """Retourne le résumé du fichier, ou None s'il est illisible."""
+        try:
+            donnees = Path(path).read_bytes()
+        except OSError as err:
+            logging.warning(f"Lecture impossible : {path} ({type(err).__name__})")
+            return None
+        return self.resumer_octets(donnees, str(path))
+
+    def resumer_lot(self, chemins: Iterable[Union[str, Path]],
+                    max_workers: Optional[int] = None) -> Dict[str, Tuple[Optional[Dict], float]]:
+        """Résume un lot de fichiers : {chemin: (résumé, durée en secondes)}.
+
+        Les lectures, puis les analyses des fichiers absents du cache, passent
+        par un pool de threads lorsque les fichiers sont assez nombreux. Les
+        durées incluent la lecture et, le cas échéant, l'analyse.
+        """
+        chemins = [str(path) for path in chemins]
+        pool = ThreadPoolExecutor(max_workers=max_workers) \
+            if len(chemins) >= SEUIL_PARALLELE and max_workers != 1 else None
+        appliquer = pool.map if pool else map
+        try:
+            resultats: Dict[str, Tuple[Optional[Dict], float]] = {}
+            a_analyser = []
+            for chemin, (donnees, empreinte, lecture) in zip(chemins, appliquer(_lire_chronometre, chemins)):
+                resume = self.chercher(empreinte) if donnees is not None else None
+                if donnees is None or resume is not None:
+                    resultats[chemin] = (resume, lecture)
+                else:
+                    a_analyser.append((chemin, donnees, empreinte, lecture))
+
+            taches = [(chemin, donnees) for chemin, donnees, _, _ in a_analyser]
+            for (chemin, _, empreinte, lecture), (resume, duree) in zip(a_analyser, appliquer(_analyser_chronometre, taches)):
+                self.enregistrer(empreinte, resume)
+                resultats[chemin] = (resume, lecture + duree)
+        finally:
+            if pool:
+                pool.shutdown()
+        return resultats
+
+    def sauvegarder(self) -> None:
+        """Écrit le cache (si modifié) en oubliant les entrées non utilisées depuis longtemps."""
+        limite = int(time.time()) - DUREE_CONSERVATION
+        expirees = [cle for cle, entree in self.entrees.items() if entree["vu"] < limite]
+        for cle in expirees:
+            del self.entrees[cle]
+        if not (self.modifie or expirees):
+            return
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = self.chemin.with_suffix(".tmp")
+        temporaire.write_text(
+            json.dumps({"version": VERSION_CACHE, "entrees": self.entrees}, ensure_ascii=False),
+            encoding="utf-8"
+        )
+        temporaire.replace(self.chemin)
+        self.modifie = False
+        logging.info(f"Cache AST : {self.succes} réutilisé(s), {self.analyses} analysé(s)")
+
+
+_cache = None
+
+def cache() -> CacheAST:
+    """Instance partagée du cache (chargée au premier appel)."""
+    global _cache
+    if _cache is None:
+        _cache = CacheAST()
+    return _cache
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Moteur de classification des scripts par règles compilées - Luxuria Studio"""
+
+import re
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# === Configuration
+TAILLE_ENTETE = 8 * 1024
+
+# Format du fichier de règles (JSON) :
+# {
+#   "defaut": "utils",
+#   "taille_entete": 8192,
+#   "categories": {
+#     "manager": ["LuxuriaManager", {"motif": "def lancer_\\w+", "regex": true, "poids": 2}],
+#     "admin": [{"motif": "# module: admin", "decisif": true, "entete": true}]
+#   }
+# }
+# Une règle est un mot-clé (insensible à la casse) ou un objet avec les clés
+# facultatives regex, poids (1), decisif (false) et entete (false).
+
+
+class Classificateur:
+    """Classe un texte à partir de mots-clés et d'expressions régulières.
+
+    Les mots-clés sont compilés dans une seule alternance placée dans un
+    lookahead, avec un groupe nommé par règle : chaque position du texte est
+    examinée une fois, et les mots-clés plus courts qui sont des préfixes du
+    mot-clé trouvé sont crédités aussi. Les règles regex, qu'une alternance
+    masquerait dès qu'une autre règle correspond à la même position, sont
+    recherchées chacune séparément. Chaque règle compte au plus une fois (son
+    poids) ; la catégorie au score le plus élevé l'emporte, à égalité la
+    première déclarée. La première règle décisive rencontrée dans le texte
+    décide, et si toutes les règles ne concernent que l'en-tête, seuls les
+    premiers Ko sont lus.
+    """
+
+    def __init__(self, categories: Dict[str, List[Union[str, dict]]], defaut: str = "utils",
+                 taille_entete: int = TAILLE_ENTETE):
+        self.defaut = defaut
+        self.taille_entete = taille_entete
+        self.ordre = list(categories)
+        self.regles: List[dict] = []
+        for categorie, regles in categories.items():
+            for regle in regles:
+                if isinstance(regle, str):
+                    regle = {"motif": regle}
+                self.regles.append({
+                    "categorie": categorie,
+                    "motif": regle["motif"],
+                    "regex": bool(regle.get("regex")),
+                    "poids": regle.get("poids", 1),
+                    "decisif": bool(regle.get("decisif")),
+                    "entete": bool(regle.get("entete"))
+                })
+        self.entete_seulement = bool(self.regles) and all(r["entete"] for r in self.regles)
+
+        # Mots-clés les plus longs d'abord ; les mots-clés plus courts qui en sont
+        # des préfixes sont crédités via la table des préfixes.
+        mots_cles = sorted((i for i, regle in enumerate(self.regles) if not regle["regex"]),
+                           key=lambda i: -len(self.regles[i]["motif"]))
+        self.nb_mots_cles = len(mots_cles)
+        alternatives = [f"(?P<r{i}>{re.escape(self.regles[i]['motif'])})" for i in mots_cles]
+        self.motif = re.compile("(?=" + "|".join(alternatives) + ")", re.IGNORECASE) if alternatives else None
+        self.prefixes = {
+            i: [j for j in mots_cles
+                if j != i and self.regles[i]["motif"].lower().startswith(self.regles[j]["motif"].lower())]
+            for i in mots_cles
+        }
+        self.expressions = [(i, re.compile(regle["motif"], re.IGNORECASE))
+                            for i, regle in enumerate(self.regles) if regle["regex"]]
+
+    @classmethod
+    def depuis_fichier(cls, chemin: Path) -> "Classificateur":
+        donnees = json.loads(chemin.read_text(encoding="utf-8"))
+        return cls(donnees["categories"], donnees.get("defaut", "utils"),
+                   donnees.get("taille_entete", TAILLE_ENTETE))
+
+    def classer_texte(self, texte: str) -> str:
+        if not self.regles:
+            return self.defaut
+        scores = dict.fromkeys(self.ordre, 0)
+        limite_entete = self.taille_entete
+
+        # Règles regex : première correspondance de chacune
+        decisive: Optional[tuple] = None  # (position, catégorie) de la première regex décisive
+        for i, expression in self.expressions:
+            regle = self.regles[i]
+            correspondance = expression.search(texte)
+            if correspondance is None or (regle["entete"] and correspondance.start() >= limite_entete):
+                continue
+            if regle["decisif"]:
+                if decisive is None or correspondance.start() < decisive[0]:
+                    decisive = (correspondance.start(), regle["categorie"])
+            else:
+                scores[regle["categorie"]] += regle["poids"]
+
+        trouvees = set()
+        for correspondance in (self.motif.finditer(texte) if self.motif else ()):
+            if decisive is not None and correspondance.start() > decisive[0]:
+                break
+            index = int(correspondance.lastgroup[1:])
+            for i in [index] + self.prefixes[index]:
+                if i in trouvees:
+                    continue
+                regle = self.regles[i]
+                if regle["entete"] and correspondance.start() >= limite_entete:
+                    continue
+                trouvees.add(i)
+                if regle["decisif"]:
+                    return regle["categorie"]
+                scores[regle["categorie"]] += regle["poids"]
+            if len(trouvees) == self.nb_mots_cles:
+                break
+        if decisive is not None:
+            return decisive[1]
+        meilleure = max(self.ordre, key=lambda c: scores[c])
+        return meilleure if scores[meilleure] > 0 else self.defaut
+
+    def classer_fichier(self, chemin: Path) -> str:
+        """Classe un fichier ; ne lit que l'en-tête si toutes les règles le permettent."""
+        if self.entete_seulement:
+            with chemin.open("rb") as flux:
+                texte = flux.read(self.taille_entete).decode("utf-8", errors="ignore")
+        else:
+            texte = chemin.read_text(encoding="utf-8")
+        return self.classer_texte(texte)
+
+
+def charger_classificateur(chemin: Optional[Path], categories: Dict[str, List[str]],
+                           defaut: str = "utils") -> Classificateur:
+    """Charge les règles depuis le fichier s'il existe, sinon utilise les règles fournies."""
+    if chemin is not None and chemin.exists():
+        try:
+            return Classificateur.depuis_fichier(chemin)
+        except (OSError, ValueError, KeyError, re.error) as err:
+            logging.warning(f"Règles de classification ignorées ({chemin.name}) : {err}")
+    return Classificateur(categories, defaut)
@@ -4,11 +4,14 @@
 
 import sys
 import re
-import py_compile
 import unicodedata
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
+from cache_ast import SEUIL_PARALLELE, cache
+from audit_encodage import auditer_fichier, decrire
+from transaction_reecriture import TransactionReecriture, ecrire_fichier
 
 # === Configuration
 BASE_DIR = Path(__file__).resolve().parent
@@ -18,26 +21,48 @@ logging.basicConfig(level=logging.INFO, format="[AUDIT] %(message)s")
 def normalize_ascii(text: str) -> str:
     return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
 
-def fix_non_ascii(path: Path) -> str:
+CONFLIT_ASCII = " ASCII non corrige (fichier modifie pendant la passe)"
+
+def nettoyer_ascii(path: Path) -> Tuple[str, Optional[str]]:
+    """Statut ASCII du fichier et, s'il faut le corriger, son contenu nettoye (rien n'est ecrit).
+
+    Seuls les fichiers UTF-8 non ASCII (reperes en flux) sont decodes.
+    """
     try:
+        audit = auditer_fichier(path)
+        if audit["ascii"]:
+            return " ASCII OK", None
+        if not audit["utf8"]:
+            return f" Erreur lecture/ecriture : {decrire(audit)}", None
         original = path.read_text(encoding="utf-8")
         cleaned = normalize_ascii(original)
         if original != cleaned:
-            path.write_text(cleaned, encoding="utf-8")
-            return " ASCII corrige"
-        return " ASCII OK"
+            return " ASCII corrige", cleaned
+        return " ASCII OK", None
     except (OSError, UnicodeDecodeError) as err:
+        return f" Erreur lecture/ecriture : {type(err).__name__}", None
+
+def fix_non_ascii(path: Path, transaction: Optional[TransactionReecriture] = None) -> str:
+    statut, cleaned = nettoyer_ascii(path)
+    if cleaned is None:
+        return statut
+    try:
+        ecrit = ecrire_fichier(path, cleaned, transaction, outil="correcteur_ASCII_syntaxe")
+    except OSError as err:
         return f" Erreur lecture/ecriture : {type(err).__name__}"
+    return statut if ecrit or transaction is not None else CONFLIT_ASCII
+
+# === Verification de syntaxe (compilation en memoire via le cache AST, aucun .pyc ecrit)
+def format_syntax(resume: Optional[dict]) -> str:
+    if resume is None:
+        return " Erreur compilation : OSError"
+    erreur = resume["syntaxe"]
+    if erreur:
+        return f" Erreur de syntaxe : {erreur['message']} (ligne {erreur['ligne']})"
+    return " Syntaxe OK"
 
-# === Verification de syntaxe
 def check_syntax(path: Path) -> str:
-    try:
-        py_compile.compile(str(path), doraise=True)
-        return " Syntaxe OK"
-    except py_compile.PyCompileError as err:
-        return f" Erreur de syntaxe : {err.msg}"
-    except Exception as err:
-        return f" Erreur compilation : {type(err).__name__}"
+    return format_syntax(cache().resumer(path))
 
 def attempt_fix_syntax(path: Path) -> str:
     try:
@@ -45,7 +70,7 @@ def attempt_fix_syntax(path: Path) -> str:
         code = re.sub(r"^\s+\n", "\n", code, flags=re.MULTILINE)
         if code.count("(") > code.count(")"):
             code += ")" * (code.count("(") - code.count(")"))
-        path.write_text(code, encoding="utf-8")
+        ecrire_fichier(path, code, outil="correcteur_ASCII_syntaxe")
         return " Correction syntaxe appliquee"
     except Exception as err:
         return f" Echec correction : {type(err).__name__}"
@@ -54,22 +79,51 @@ def attempt_fix_syntax(path: Path) -> str:
 def list_py_files(root: Path) -> List[Path]:
     return [p for p in root.rglob("*.py") if p.is_file()]
 
-def find_ghost_files(root: Path, known_files: List[Path]) -> List[Path]:
-    all_py = [p for p in root.rglob("*.py")]
-    return [p for p in all_py if p not in known_files]
+def partition_py_files(root: Path) -> Tuple[List[Path], List[Path]]:
+    """Un seul parcours : fichiers .py reels et entrees fantomes (dossiers, liens casses)."""
+    py_files, ghost_files = [], []
+    for p in root.rglob("*.py"):
+        (py_files if p.is_file() else ghost_files).append(p)
+    return py_files, ghost_files
+
+def fix_non_ascii_all(py_files: List[Path], max_workers: Optional[int] = None) -> List[str]:
+    """Corrige l'ASCII de tous les fichiers.
+
+    L'analyse passe par un pool de threads au-dela de SEUIL_PARALLELE fichiers ;
+    les contenus nettoyes sont ensuite ecrits dans une seule transaction (une
+    seule sauvegarde pour toute la passe).
+    """
+    if len(py_files) >= SEUIL_PARALLELE and max_workers != 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            resultats = list(pool.map(nettoyer_ascii, py_files))
+    else:
+        resultats = [nettoyer_ascii(path) for path in py_files]
+
+    statuts = []
+    with TransactionReecriture("correcteur_ASCII_syntaxe") as transaction:
+        for path, (statut, cleaned) in zip(py_files, resultats):
+            if cleaned is not None:
+                try:
+                    transaction.ecrire(path, cleaned)
+                except OSError as err:
+                    statut = f" Erreur lecture/ecriture : {type(err).__name__}"
+            statuts.append(statut)
+    conflits = set(transaction.en_conflit)
+    return [CONFLIT_ASCII if str(path) in conflits else statut for path, statut in zip(py_files, statuts)]
 
 # === Audit principal
-def audit_and_fix(root: Path) -> None:
-    py_files = list_py_files(root)
-    ghost_files = find_ghost_files(root, py_files)
+def audit_and_fix(root: Path, max_workers: Optional[int] = None) -> None:
+    py_files, ghost_files = partition_py_files(root)
     report_lines: List[str] = []
 
     logging.info(f" Audit en cours dans : {root}\n")
 
-    for path in py_files:
+    ascii_results = fix_non_ascii_all(py_files, max_workers)
+    syntaxes = cache().resumer_lot(py_files, max_workers)
+
+    for path, ascii_result in zip(py_files, ascii_results):
         logging.info(f" Fichier : {path.name}")
-        ascii_result = fix_non_ascii(path)
-        syntax_result = check_syntax(path)
+        syntax_result = format_syntax(syntaxes[str(path)][0])
 
         logging.info(f"   {ascii_result}")
         logging.info(f"   {syntax_result}")
@@ -90,6 +144,7 @@ def audit_and_fix(root: Path) -> None:
         for ghost in ghost_files:
             report_lines.append(f"   - {ghost}")
 
+    cache().sauvegarder()
     report_path = BASE_DIR / "python_audit_report.txt"
     try:
         report_path.write_text("\n\n".join(report_lines), encoding="utf-8")
@@ -4,7 +4,9 @@
 import re
 import logging
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
+from transaction_reecriture import TransactionReecriture, ecrire_fichier
+from index_trigrammes import filtrer_fichiers
 
 # === Configuration
 logging.basicConfig(level=logging.INFO, format="[EVAL] %(message)s")
@@ -12,7 +14,8 @@ report: list[str] = []
 
 class CorrecteurEval:
     @staticmethod
-    def replace_eval(file_path: Path, dry_run: bool = False) -> bool:
+    def replace_eval(file_path: Path, dry_run: bool = False,
+                     transaction: Optional[TransactionReecriture] = None) -> bool:
         """Remplace les appels a eval() par ast.literal_eval() dans un fichier Python."""
         try:
             lines = file_path.read_text(encoding="utf-8").splitlines(keepends=True)
@@ -47,10 +50,14 @@ class CorrecteurEval:
 
             if not dry_run:
                 try:
-                    file_path.write_text("".join(modified_lines), encoding="utf-8")
+                    ecrit = ecrire_fichier(file_path, "".join(modified_lines), transaction, outil="correcteur_eval")
                 except OSError:
                     logging.warning(f"Erreur decriture : {file_path}")
                     return False
+                if transaction is not None:
+                    return True  # rapporte apres la validation de la transaction
+                if not ecrit:
+                    return False
 
             report.append(str(file_path))
             return True
@@ -59,12 +66,19 @@ class CorrecteurEval:
 
     @staticmethod
     def scan_directory(root: Union[str, Path], dry_run: bool = False, exclude: Path = None) -> None:
-        """Parcourt le repertoire et corrige les fichiers contenant eval()."""
+        """Parcourt le repertoire et corrige les fichiers contenant eval().
+
+        Seuls les fichiers que l'index de trigrammes donne comme contenant
+        eval( sont lus ; les fichiers modifies sont reecrits ensemble a la fin
+        du parcours (transaction).
+        """
         root_path = Path(root).resolve()
-        for file in root_path.rglob("*.py"):
-            if exclude and file.resolve() == exclude.resolve():
-                continue
-            CorrecteurEval.replace_eval(file, dry_run=dry_run)
+        fichiers = [f for f in root_path.rglob("*.py")
+                    if not (exclude and f.resolve() == exclude.resolve())]
+        with TransactionReecriture("correcteur_eval") as transaction:
+            for file in filtrer_fichiers(fichiers, ["eval("]):
+                CorrecteurEval.replace_eval(file, dry_run=dry_run, transaction=transaction)
+        report.extend(transaction.ecrits)
 
     @staticmethod
     def afficher_rapport() -> None:
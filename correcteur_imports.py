@@ -5,8 +5,9 @@ import os
 import re
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from assistant_pdg import AssistantPDG
+from transaction_reecriture import TransactionReecriture, ecrire_fichier
 
 # === Configuration
 IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages"}
@@ -22,52 +23,78 @@ logging.basicConfig(level=logging.INFO, format="[AUDIT] %(message)s")
 def nettoyer_typographie(contenu: str) -> str:
     return contenu.replace('\u00A0', ' ')
 
-def corriger_exceptions(filepath: str, contenu: str) -> str:
-    if EXCEPT_PATTERN.search(contenu):
-        contenu = EXCEPT_PATTERN.sub("except Exception:", contenu)
-        rapport_except.append(filepath)
-        logging.info(f"  Clause 'except:' corrigée dans : {filepath}")
-    return contenu
+def corriger_exceptions(contenu: str) -> str:
+    return EXCEPT_PATTERN.sub("except Exception:", contenu)
 
-def corriger_imports(filepath: str, contenu: str) -> str:
+def corriger_imports(contenu: str) -> str:
     if IMPORT_PATTERN.search(contenu):
         header = (
             "import sys\nimport os\n"
             "sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))\n\n"
         )
         contenu = header + contenu
+    return contenu
+
+def rapporter(filepath: str, corrections: List[str]) -> None:
+    if "except" in corrections:
+        rapport_except.append(filepath)
+        logging.info(f"  Clause 'except:' corrigée dans : {filepath}")
+    if "imports" in corrections:
         rapport_imports.append(filepath)
         logging.info(f"  Import racine corrigé dans : {filepath}")
-    return contenu
 
-def traiter_fichier(filepath: str, dry_run: bool = False) -> None:
+def traiter_fichier(filepath: str, dry_run: bool = False,
+                    transaction: Optional[TransactionReecriture] = None) -> List[str]:
+    """Corrige un fichier ; retourne les corrections ("except", "imports") appliquées.
+
+    Avec une transaction, les corrections ne sont rapportées qu'une fois la
+    transaction validée (voir parcourir_dossier).
+    """
     try:
         with open(filepath, "r", encoding="utf-8") as f:
             contenu = f.read()
     except (OSError, UnicodeDecodeError) as err:
         logging.warning(f"  Erreur lecture : {filepath} ({type(err).__name__})")
-        return
+        return []
 
     contenu = nettoyer_typographie(contenu)
-    original = contenu
-
-    contenu = corriger_exceptions(filepath, contenu)
-    contenu = corriger_imports(filepath, contenu)
-
-    if contenu != original and not dry_run:
+    corrections = []
+    for nom, corriger in (("except", corriger_exceptions), ("imports", corriger_imports)):
+        corrige = corriger(contenu)
+        if corrige != contenu:
+            corrections.append(nom)
+            contenu = corrige
+    if not corrections:
+        return []
+
+    if not dry_run:
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(contenu)
+            ecrit = ecrire_fichier(filepath, contenu, transaction, outil="correcteur_imports")
         except (OSError, IOError) as err:
             logging.error(f"  Erreur écriture : {filepath} ({type(err).__name__})")
+            return []
+        if transaction is not None:
+            return corrections
+        if not ecrit:
+            return []
+    rapporter(filepath, corrections)
+    return corrections
 
 def parcourir_dossier(dossier: str, dry_run: bool = False) -> None:
-    for root, dirs, files in os.walk(dossier):
-        dirs[:] = [d for d in dirs if d not in IGNORES]
-        for filename in files:
-            if filename.endswith(".py") and filename != os.path.basename(__file__):
-                chemin = os.path.join(root, filename)
-                traiter_fichier(chemin, dry_run=dry_run)
+    """Corrige le dossier ; les reecritures sont validees ensemble en fin de parcours."""
+    en_attente = {}
+    with TransactionReecriture("correcteur_imports") as transaction:
+        for root, dirs, files in os.walk(dossier):
+            dirs[:] = [d for d in dirs if d not in IGNORES]
+            for filename in files:
+                if filename.endswith(".py") and filename != os.path.basename(__file__):
+                    chemin = os.path.join(root, filename)
+                    corrections = traiter_fichier(chemin, dry_run=dry_run, transaction=transaction)
+                    if corrections and not dry_run:
+                        en_attente[chemin] = corrections
+    # Seuls les fichiers effectivement réécrits (hors conflits) sont rapportés
+    for chemin in transaction.ecrits:
+        rapporter(chemin, en_attente[chemin])
 
 def afficher_rapport() -> None:
     if rapport_except:
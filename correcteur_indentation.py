@@ -3,7 +3,8 @@
 
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from transaction_reecriture import TransactionReecriture, ecrire_fichier
 
 IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages"}
 report: List[str] = []
@@ -16,7 +17,8 @@ class CorrecteurIndentation:
         return texte.replace('\u00A0', ' ')
 
     @staticmethod
-    def corriger_indentation(filepath: Path, dry_run: bool = False) -> bool:
+    def corriger_indentation(filepath: Path, dry_run: bool = False,
+                             transaction: Optional[TransactionReecriture] = None) -> bool:
         try:
             contenu = filepath.read_text(encoding="utf-8")
         except FileNotFoundError:
@@ -41,22 +43,30 @@ class CorrecteurIndentation:
         if modifie:
             if not dry_run:
                 try:
-                    filepath.write_text("".join(lignes_corrigees), encoding="utf-8")
-                    logging.info(f" Indentation corrigee dans : {filepath}")
+                    ecrit = ecrire_fichier(filepath, "".join(lignes_corrigees), transaction, outil="correcteur_indentation")
                 except OSError:
                     logging.error(f" Erreur decriture : {filepath}")
                     return False
+                if transaction is not None:
+                    return True  # rapporte apres la validation de la transaction
+                if not ecrit:
+                    return False
+                logging.info(f" Indentation corrigee dans : {filepath}")
             report.append(str(filepath))
         return modifie
 
     @staticmethod
     def parcourir_dossier(dossier: Path, dry_run: bool = False, exclude: Path = None) -> None:
-        for fichier in dossier.rglob("*.py"):
-            if any(part in IGNORES for part in fichier.parts):
-                continue
-            if exclude and fichier.resolve() == exclude.resolve():
-                continue
-            CorrecteurIndentation.corriger_indentation(fichier, dry_run=dry_run)
+        with TransactionReecriture("correcteur_indentation") as transaction:
+            for fichier in dossier.rglob("*.py"):
+                if any(part in IGNORES for part in fichier.parts):
+                    continue
+                if exclude and fichier.resolve() == exclude.resolve():
+                    continue
+                CorrecteurIndentation.corriger_indentation(fichier, dry_run=dry_run, transaction=transaction)
+        for chemin in transaction.ecrits:
+            logging.info(f" Indentation corrigee dans : {chemin}")
+            report.append(chemin)
 
     @staticmethod
     def afficher_rapport() -> None:
@@ -3,7 +3,8 @@
 
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
+from transaction_reecriture import TransactionReecriture, ecrire_fichier
 
 IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages"}
 rapport: List[str] = []
@@ -22,7 +23,8 @@ class CorrecteurOS:
         return False
 
     @staticmethod
-    def corriger_fichier(filepath: Path, dry_run: bool = False) -> bool:
+    def corriger_fichier(filepath: Path, dry_run: bool = False,
+                         transaction: Optional[TransactionReecriture] = None) -> bool:
         try:
             contenu = filepath.read_text(encoding="utf-8")
         except FileNotFoundError:
@@ -39,7 +41,6 @@ class CorrecteurOS:
             logging.info(f" Deja correct : {filepath}")
             return False
 
-        logging.info(f" Correction : {filepath}")
         lignes = contenu.splitlines()
         index_insertion = next(
             (i + 1 for i, ligne in enumerate(lignes)
@@ -51,22 +52,31 @@ class CorrecteurOS:
 
         if not dry_run:
             try:
-                filepath.write_text(nouveau_contenu, encoding="utf-8")
+                ecrit = ecrire_fichier(filepath, nouveau_contenu, transaction, outil="correcteur_os")
             except OSError:
                 logging.error(f" Erreur decriture : {filepath}")
                 return False
+            if transaction is not None:
+                return True  # rapporte apres la validation de la transaction
+            if not ecrit:
+                return False
 
+        logging.info(f" Correction : {filepath}")
         rapport.append(str(filepath))
         return True
 
     @staticmethod
     def corriger_dossier(dossier: Path, dry_run: bool = False, exclude: Path = None) -> None:
-        for fichier in dossier.rglob("*.py"):
-            if any(part in IGNORES for part in fichier.parts):
-                continue
-            if exclude and fichier.resolve() == exclude.resolve():
-                continue
-            CorrecteurOS.corriger_fichier(fichier, dry_run=dry_run)
+        with TransactionReecriture("correcteur_os") as transaction:
+            for fichier in dossier.rglob("*.py"):
+                if any(part in IGNORES for part in fichier.parts):
+                    continue
+                if exclude and fichier.resolve() == exclude.resolve():
+                    continue
+                CorrecteurOS.corriger_fichier(fichier, dry_run=dry_run, transaction=transaction)
+        for chemin in transaction.ecrits:
+            logging.info(f" Correction : {chemin}")
+            rapport.append(chemin)
 
     @staticmethod
     def afficher_rapport() -> None:
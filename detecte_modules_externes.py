@@ -3,12 +3,13 @@
 
 import os
 import sys
-import importlib.util
 import logging
 import subprocess
 import argparse
 from pathlib import Path
 from typing import Union, Dict, List, Set
+from cache_ast import cache
+from resolution_modules import resolveur
 
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
@@ -19,26 +20,20 @@ logging.basicConfig(level=logging.INFO, format="[MODULES] %(message)s")
 
 def extract_imports(source_file: Union[str, Path]) -> List[str]:
     """Extrait les noms de modules importés dans un fichier Python."""
-    try:
-        with open(str(source_file), "r", encoding="utf-8") as file:
-            return [
-                line.split()[1].split(".")[0]
-                for line in file
-                if line.strip().startswith(("import ", "from "))
-                and len(line.split()) >= 2
-            ]
-    except (FileNotFoundError, PermissionError, UnicodeDecodeError, OSError):
+    resume = cache().resumer(source_file)
+    if resume is None:
         return []
+    return list(resume["imports"])
 
 def is_external_module(module_name: str) -> bool:
     """Determine si un module est externe (non standard)."""
     if module_name in sys.builtin_module_names:
         return False
-    spec = importlib.util.find_spec(module_name)
-    return spec is None or "site-packages" in (spec.origin or "")
+    return resolveur().est_externe(module_name)
 
 def scan_directory_for_externals(target_dir: Union[str, Path]) -> None:
     """Parcourt les fichiers .py et detecte les modules externes utilises."""
+    resolveur().pre_resoudre()
     for root, _, files in os.walk(str(target_dir)):
         for file_name in files:
             if file_name.endswith(".py") and file_name != "__init__.py":
@@ -48,6 +43,8 @@ def scan_directory_for_externals(target_dir: Union[str, Path]) -> None:
                 if externals:
                     external_modules_by_file[file_path] = sorted(set(externals))
                     modules_to_install.update(externals)
+    cache().sauvegarder()
+    resolveur().sauvegarder()
 
 def installer_modules(modules: Set[str], dry_run: bool = False) -> None:
     """Installe les modules externes detectes et genere requirements.txt."""
@@ -3,13 +3,16 @@
 
 import os
 import re
+import sqlite3
 import logging
 from pathlib import Path
-from typing import Set
+from typing import Dict, List, Optional, Set, Tuple
+from cache_ast import cache
 
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
 DICTIONNAIRE_PATH = BASE_DIR / "dictionnaire_personnel.txt"
+SYMBOLES_PATH = BASE_DIR / ".luxuria_cache" / "dictionnaire_symboles.sqlite"
 IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages"}
 
 logging.basicConfig(level=logging.INFO, format="[DICTIONNAIRE] %(message)s")
@@ -42,27 +45,122 @@ def collecter_fichiers_python() -> Set[Path]:
                 fichiers.add(Path(root) / file)
     return fichiers
 
+# === Empreintes et symboles (SQLite : une ligne par fichier et par symbole)
+# Les empreintes ne valent que pour la version du dictionnaire enregistrée avec
+# elles (table meta) : s'il est modifié ou supprimé, tous les fichiers sont relus.
+def signature_dictionnaire(chemin: Path = DICTIONNAIRE_PATH) -> Optional[str]:
+    try:
+        infos = chemin.stat()
+    except OSError:
+        return None
+    return f"{infos.st_size}:{infos.st_mtime_ns}"
+
+def ouvrir_base(chemin: Path = SYMBOLES_PATH) -> sqlite3.Connection:
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    base = sqlite3.connect(chemin)
+    base.executescript("""
+        CREATE TABLE IF NOT EXISTS fichiers (
+            chemin TEXT PRIMARY KEY, taille INTEGER, mtime_ns INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS symboles (
+            nom TEXT NOT NULL, type TEXT NOT NULL, fichier TEXT NOT NULL, ligne INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS symboles_nom ON symboles (nom);
+        CREATE INDEX IF NOT EXISTS symboles_fichier ON symboles (fichier);
+        CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT);
+    """)
+    return base
+
+def dictionnaire_a_jour(base: sqlite3.Connection) -> bool:
+    """True si le dictionnaire est celui que les empreintes enregistrées ont alimenté."""
+    ligne = base.execute("SELECT valeur FROM meta WHERE cle = 'dictionnaire'").fetchone()
+    return ligne is not None and ligne[0] == signature_dictionnaire()
+
+def fichiers_modifies(base: sqlite3.Connection, fichiers: Set[Path],
+                      tous: bool = False) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+    """Retourne les fichiers nouveaux ou modifiés (tous si demandé, avec leur stat) et les chemins disparus."""
+    connus = {chemin: (taille, mtime) for chemin, taille, mtime in base.execute("SELECT * FROM fichiers")}
+    modifies = {}
+    for fichier in fichiers:
+        try:
+            infos = fichier.stat()
+        except OSError:
+            continue
+        empreinte = (infos.st_size, infos.st_mtime_ns)
+        if tous or connus.get(str(fichier)) != empreinte:
+            modifies[str(fichier)] = empreinte
+    disparus = set(connus) - {str(f) for f in fichiers}
+    return modifies, disparus
+
+def mettre_a_jour_symboles(base: sqlite3.Connection, modifies: Dict[str, Tuple[int, int]], disparus: Set[str]) -> None:
+    """Réindexe uniquement les fonctions et classes des fichiers modifiés."""
+    with base:
+        for chemin in disparus:
+            base.execute("DELETE FROM symboles WHERE fichier = ?", (chemin,))
+            base.execute("DELETE FROM fichiers WHERE chemin = ?", (chemin,))
+        for chemin, (taille, mtime) in modifies.items():
+            resume = cache().resumer(chemin)
+            base.execute("DELETE FROM symboles WHERE fichier = ?", (chemin,))
+            if resume is not None:
+                base.executemany(
+                    "INSERT INTO symboles (nom, type, fichier, ligne) VALUES (?, ?, ?, ?)",
+                    [(d["nom"], d["type"], chemin, d["ligne"]) for d in resume["definitions"]]
+                )
+            base.execute("INSERT OR REPLACE INTO fichiers VALUES (?, ?, ?)", (chemin, taille, mtime))
+    cache().sauvegarder()
+
+def chercher_symboles(prefixe: str, limite: int = 50, chemin: Path = SYMBOLES_PATH) -> List[Dict]:
+    """Recherche par préfixe (sensible à la casse) via l'index, sans charger le dictionnaire.
+
+    La base est ouverte en lecture seule : sans index, la recherche ne trouve rien.
+    """
+    try:
+        base = sqlite3.connect(f"{chemin.resolve().as_uri()}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return []
+    try:
+        lignes = base.execute(
+            "SELECT nom, type, fichier, ligne FROM symboles WHERE nom >= ? AND nom < ? ORDER BY nom LIMIT ?",
+            (prefixe, prefixe + "\U0010ffff", limite)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        base.close()
+    return [{"nom": n, "type": t, "fichier": f, "ligne": l} for n, t, f, l in lignes]
+
 def mettre_a_jour_dictionnaire() -> None:
-    """Analyse les fichiers et met à jour le dictionnaire personnel."""
+    """Analyse les fichiers modifiés depuis le dernier passage et met à jour les dictionnaires."""
     fichiers_python = collecter_fichiers_python()
-    mots_enregistres = charger_dictionnaire()
-    nouveaux_mots: Set[str] = set()
-
-    for fichier_source in fichiers_python:
-        mots_du_fichier = extraire_mots_depuis_fichier(fichier_source)
-        mots_inconnus = mots_du_fichier - mots_enregistres
-        nouveaux_mots.update(mots_inconnus)
-
-    if nouveaux_mots:
-        try:
-            with open(DICTIONNAIRE_PATH, "a", encoding="utf-8") as dict_file:
-                for mot in sorted(nouveaux_mots):
-                    dict_file.write(mot + "\n")
-            logging.info("{} nouveau(x) mot(s) ajoute(s) au dictionnaire.".format(len(nouveaux_mots)))
-        except OSError as err:
-            logging.error("Erreur ecriture dictionnaire ({})".format(type(err).__name__))
-    else:
-        logging.info("Aucun nouveau mot a ajouter. Le dictionnaire est a jour.")
+    base = ouvrir_base()
+    try:
+        modifies, disparus = fichiers_modifies(base, fichiers_python, tous=not dictionnaire_a_jour(base))
+        logging.info("{} fichier(s) modifie(s) sur {}.".format(len(modifies), len(fichiers_python)))
+
+        mots_enregistres = charger_dictionnaire()
+        nouveaux_mots: Set[str] = set()
+        for fichier_source in modifies:
+            mots_du_fichier = extraire_mots_depuis_fichier(Path(fichier_source))
+            mots_inconnus = mots_du_fichier - mots_enregistres
+            nouveaux_mots.update(mots_inconnus)
+
+        if nouveaux_mots:
+            try:
+                with open(DICTIONNAIRE_PATH, "a", encoding="utf-8") as dict_file:
+                    for mot in sorted(nouveaux_mots):
+                        dict_file.write(mot + "\n")
+                logging.info("{} nouveau(x) mot(s) ajoute(s) au dictionnaire.".format(len(nouveaux_mots)))
+            except OSError as err:
+                logging.error("Erreur ecriture dictionnaire ({})".format(type(err).__name__))
+                return  # les empreintes ne sont pas enregistrées : nouvel essai au prochain passage
+        else:
+            logging.info("Aucun nouveau mot a ajouter. Le dictionnaire est a jour.")
+
+        mettre_a_jour_symboles(base, modifies, disparus)
+        with base:
+            base.execute("INSERT OR REPLACE INTO meta VALUES ('dictionnaire', ?)", (signature_dictionnaire(),))
+    finally:
+        base.close()
 
 def main() -> None:
     logging.info("Analyse des fichiers Python en cours...")
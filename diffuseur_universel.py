@@ -1,68 +1,122 @@
 # -*- coding: utf-8 -*-
-"""Extraction automatique de vocabulaire depuis les scripts Python - Luxuria Studio"""
+"""Diffusion de blocs de code et extraction de vocabulaire - Luxuria Studio"""
 
-import os
 import re
+import json
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Set
+from typing import Dict, List, Optional, Tuple
+from sauvegarde_contenu import ecrire_atomique
+# Le vocabulaire est tenu par la passe incrémentale de dictionnaire_auto
+from dictionnaire_auto import (  # noqa: F401
+    DICTIONNAIRE_PATH,
+    charger_dictionnaire,
+    collecter_fichiers_python,
+    extraire_mots_depuis_fichier,
+    mettre_a_jour_dictionnaire,
+)
 
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
-DICTIONNAIRE_PATH = BASE_DIR / "dictionnaire_personnel.txt"
-IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages"}
+ETAT_DIFFUSION_PATH = BASE_DIR / ".luxuria_cache" / "diffusion.json"
+MAX_WORKERS = 8
 
 logging.basicConfig(level=logging.INFO, format="[DICTIONNAIRE] %(message)s")
 
-def charger_dictionnaire() -> Set[str]:
-    """Charge les mots deja enregistrés dans le dictionnaire."""
-    if DICTIONNAIRE_PATH.exists():
-        return set(DICTIONNAIRE_PATH.read_text(encoding="utf-8").splitlines())
-    return set()
+# === Diffusion d'un bloc de code
+# Le bloc diffusé est délimité par deux marqueurs ; celui d'ouverture porte
+# l'empreinte du bloc, ce qui permet de reconnaître une cible déjà à jour.
+def marqueur_debut(nom: str, empreinte: str) -> str:
+    return f"# >>> luxuria:{nom} sha256={empreinte}"
 
-def extraire_mots_depuis_fichier(fichier_cible: Path) -> Set[str]:
-    """Extrait les mots de trois lettres ou plus depuis un fichier source."""
+def marqueur_fin(nom: str) -> str:
+    return f"# <<< luxuria:{nom}"
+
+def motif_bloc(nom: str) -> re.Pattern:
+    return re.compile(
+        rf"^# >>> luxuria:{re.escape(nom)} sha256=(?P<empreinte>[0-9a-f]+)\r?\n(?P<corps>.*?)^# <<< luxuria:{re.escape(nom)}[^\n]*\n?",
+        re.MULTILINE | re.DOTALL
+    )
+
+def diffuser_dans(cible: Path, nom: str, bloc: str, empreinte: str) -> Tuple[str, int]:
+    """Insère ou remplace le bloc dans la cible ; retourne (statut, octets écrits)."""
+    contenu = cible.read_bytes().decode("utf-8", errors="surrogateescape")
+    motif = motif_bloc(nom)
+    existant = motif.search(contenu)
+    if (existant and existant.group("empreinte") == empreinte
+            and existant.group("corps").rstrip() == bloc.rstrip()):
+        return "ignore", 0
+
+    nouveau_bloc = f"{marqueur_debut(nom, empreinte)}\n{bloc.rstrip()}\n{marqueur_fin(nom)}\n"
+    if existant:
+        contenu = contenu[:existant.start()] + nouveau_bloc + contenu[existant.end():]
+    else:
+        separateur = "" if not contenu or contenu.endswith("\n\n") else ("\n" if contenu.endswith("\n") else "\n\n")
+        contenu = contenu + separateur + nouveau_bloc
+    donnees = contenu.encode("utf-8", errors="surrogateescape")
+    ecrire_atomique(cible, donnees)
+    return "modifie", len(donnees)
+
+def charger_etat() -> Dict[str, Dict]:
     try:
-        contenu = fichier_cible.read_text(encoding="utf-8")
-    except (OSError, UnicodeDecodeError) as err:
-        logging.warning("Erreur lecture : {} ({})".format(fichier_cible, type(err).__name__))
-        return set()
-
-    # Expression reguliere etendue pour inclure lettres accentuees
-    mots_detectes = re.findall(r"\b[\wA-y]{3,}\b", contenu)
-    return set(mots_detectes)
-
-def collecter_fichiers_python() -> Set[Path]:
-    """Collecte tous les fichiers .py à analyser, sauf ce script et les dossiers ignorés."""
-    fichiers = set()
-    for root, dirs, files in os.walk(BASE_DIR):
-        dirs[:] = [d for d in dirs if d not in IGNORES]
-        for file in files:
-            if file.endswith(".py") and file != Path(__file__).name:
-                fichiers.add(Path(root) / file)
-    return fichiers
-
-def mettre_a_jour_dictionnaire() -> None:
-    """Analyse les fichiers et met à jour le dictionnaire personnel."""
-    fichiers_python = collecter_fichiers_python()
-    mots_enregistres = charger_dictionnaire()
-    nouveaux_mots: Set[str] = set()
-
-    for fichier_source in fichiers_python:
-        mots_du_fichier = extraire_mots_depuis_fichier(fichier_source)
-        mots_inconnus = mots_du_fichier - mots_enregistres
-        nouveaux_mots.update(mots_inconnus)
-
-    if nouveaux_mots:
+        return json.loads(ETAT_DIFFUSION_PATH.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def sauvegarder_etat(etat: Dict[str, Dict]) -> None:
+    ETAT_DIFFUSION_PATH.parent.mkdir(parents=True, exist_ok=True)
+    ecrire_atomique(ETAT_DIFFUSION_PATH, json.dumps(etat).encode("utf-8"))
+
+def diffuser(source: Path, cibles: List[Path], nom: Optional[str] = None,
+             max_workers: int = MAX_WORKERS) -> Dict[str, int]:
+    """Diffuse le contenu de source dans chaque cible, uniquement là où il a changé.
+
+    Une cible dont la taille, la date et l'empreinte diffusée sont celles du
+    dernier passage n'est même pas relue ; les autres sont traitées en
+    parallèle et réécrites de façon atomique si leur bloc n'est pas à jour.
+    """
+    nom = nom or source.stem
+    bloc = source.read_text(encoding="utf-8")
+    empreinte = hashlib.sha256(bloc.rstrip().encode("utf-8")).hexdigest()
+    etat = charger_etat()
+    connus = etat.setdefault(nom, {})
+    verrou = threading.Lock()
+    bilan = {"modifies": 0, "ignores": 0, "echecs": 0, "octets_ecrits": 0}
+
+    def traiter(cible: Path) -> None:
+        cle = str(cible)
         try:
-            with open(DICTIONNAIRE_PATH, "a", encoding="utf-8") as dict_file:
-                for mot in sorted(nouveaux_mots):
-                    dict_file.write(mot + "\n")
-            logging.info("{} nouveau(x) mot(s) ajoute(s) au dictionnaire.".format(len(nouveaux_mots)))
-        except OSError as err:
-            logging.error("Erreur ecriture dictionnaire ({})".format(type(err).__name__))
-    else:
-        logging.info("Aucun nouveau mot a ajouter. Le dictionnaire est a jour.")
+            infos = cible.stat()
+            precedent = connus.get(cle)
+            if precedent == {"empreinte": empreinte, "taille": infos.st_size, "mtime_ns": infos.st_mtime_ns}:
+                statut, octets = "ignore", 0
+            else:
+                statut, octets = diffuser_dans(cible, nom, bloc, empreinte)
+                infos = cible.stat()
+        except (OSError, UnicodeError) as err:
+            logging.warning("Echec diffusion : {} ({})".format(cible, type(err).__name__))
+            with verrou:
+                bilan["echecs"] += 1
+                connus.pop(cle, None)
+            return
+        with verrou:
+            bilan["modifies" if statut == "modifie" else "ignores"] += 1
+            bilan["octets_ecrits"] += octets
+            connus[cle] = {"empreinte": empreinte, "taille": infos.st_size, "mtime_ns": infos.st_mtime_ns}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(traiter, cibles))
+    try:
+        sauvegarder_etat(etat)
+    except OSError as err:
+        logging.warning("Etat de diffusion non enregistre ({})".format(type(err).__name__))
+
+    logging.info("Diffusion '{}' : {} modifie(s), {} ignore(s), {} echec(s), {} octet(s) ecrit(s).".format(
+        nom, bilan["modifies"], bilan["ignores"], bilan["echecs"], bilan["octets_ecrits"]))
+    return bilan
 
 def main() -> None:
     logging.info("Analyse des fichiers Python en cours...")
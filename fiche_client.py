@@ -2,10 +2,14 @@
 """Gestion des fiches clients - Luxuria Studio"""
 
 import json
+import time
+import heapq
+import tempfile
 import subprocess
 import logging
+import unicodedata
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple
 from datetime import datetime, timedelta
 from assistant_pdg import AssistantPDG
 
@@ -30,17 +34,169 @@ def charger_json(path: Path) -> Dict[str, Any]:
         logging.error(f"Erreur chargement {path.name} : {type(err).__name__}")
         return {}
 
+# === Index de recherche des fiches
+CHAMPS_INDEXES = ("identifiant", "nom", "email", "ville")
+TAILLE_NGRAMME = 3
+PAR_PAGE = 20
+
+def normaliser(texte: Any) -> str:
+    """Minuscules, sans accents, espaces réduits."""
+    texte = str(texte or "")
+    if not texte.isascii():
+        texte = "".join(c for c in unicodedata.normalize("NFKD", texte) if not unicodedata.combining(c))
+    return " ".join(texte.lower().split())
+
+def ngrammes(texte: str) -> Set[str]:
+    return {texte[i:i + TAILLE_NGRAMME] for i in range(len(texte) - TAILLE_NGRAMME + 1)}
+
+class IndexClients:
+    """Index secondaires des fiches, reconstruits quand clients.json change.
+
+    Chaque valeur normalisée (identifiant, nom, email, ville) donne les
+    positions des fiches qui la portent ; un index de n-grammes sert aux
+    recherches partielles, dont les candidats sont ensuite vérifiés. La clé du
+    dictionnaire, cle_acces et nom sont aussi indexés tels quels (en
+    minuscules seulement) pour chercher_client.
+    """
+
+    def __init__(self, chemin: Path = CLIENTS_FILE):
+        self.chemin = chemin
+        self.signature: Any = False
+        self.fiches: List[Dict[str, Any]] = []
+        self.textes: List[str] = []
+        self.exacts: Dict[str, Dict[str, List[int]]] = {}
+        self.index_ngrammes: Dict[str, Set[int]] = {}
+        self.cles: Dict[str, int] = {}
+        self.stricts: Dict[str, Dict[str, int]] = {}
+
+    def actualiser(self) -> "IndexClients":
+        try:
+            infos = self.chemin.stat()
+            signature = (infos.st_size, infos.st_mtime_ns)
+        except OSError:
+            signature = None
+        if signature == self.signature:
+            return self
+        fiches, textes = [], []
+        exacts: Dict[str, Dict[str, List[int]]] = {champ: {} for champ in CHAMPS_INDEXES}
+        index_ngrammes: Dict[str, Set[int]] = {}
+        cles: Dict[str, int] = {}
+        stricts: Dict[str, Dict[str, int]] = {"cle_acces": {}, "nom": {}}
+        for position, (identifiant, fiche) in enumerate(charger_json(self.chemin).items()):
+            if not isinstance(fiche, dict):
+                fiche = {}
+            cles[identifiant] = position
+            for champ, valeurs_strictes in stricts.items():
+                if isinstance(fiche.get(champ), str):
+                    valeurs_strictes.setdefault(fiche[champ].lower(), position)
+            nom, prenom = normaliser(fiche.get("nom")), normaliser(fiche.get("prenom"))
+            valeurs = {
+                "identifiant": {normaliser(identifiant), normaliser(fiche.get("identifiant"))},
+                "nom": {nom, f"{prenom} {nom}" if prenom else ""},
+                "email": {normaliser(fiche.get("email"))},
+                "ville": {normaliser(fiche.get("ville"))},
+            }
+            for champ, ensemble in valeurs.items():
+                for valeur in ensemble - {""}:
+                    exacts[champ].setdefault(valeur, []).append(position)
+            texte = "\n".join(sorted(set().union(*valeurs.values(), {prenom}) - {""}))
+            for ngramme in ngrammes(texte):
+                index_ngrammes.setdefault(ngramme, set()).add(position)
+            fiches.append(fiche)
+            textes.append(texte)
+        self.fiches, self.textes, self.exacts, self.index_ngrammes = fiches, textes, exacts, index_ngrammes
+        self.cles, self.stricts = cles, stricts
+        self.signature = signature
+        logging.info(f"Index clients reconstruit : {len(fiches)} fiche(s)")
+        return self
+
+    def exact(self, recherche: str, champs: Tuple[str, ...] = CHAMPS_INDEXES) -> List[int]:
+        """Positions des fiches dont un des champs vaut exactement la recherche."""
+        valeur = normaliser(recherche)
+        listes = [self.exacts[champ][valeur] for champ in champs if valeur in self.exacts.get(champ, {})]
+        if len(listes) == 1:
+            return list(listes[0])  # positions ajoutées dans l'ordre : déjà triées
+        return sorted(set().union(*listes))
+
+    def partiel(self, recherche: str, exclus: Iterable[int] = ()) -> Set[int]:
+        """Positions des fiches dont un champ contient la recherche (n-grammes puis vérification)."""
+        valeur = normaliser(recherche)
+        if len(valeur) < TAILLE_NGRAMME:
+            return set()
+        listes = sorted((self.index_ngrammes.get(n, set()) for n in ngrammes(valeur)), key=len)
+        candidats = set(listes[0])
+        for liste in listes[1:]:
+            if not candidats:
+                break
+            candidats &= liste
+        candidats.difference_update(exclus)
+        if len(valeur) == TAILLE_NGRAMME:
+            return candidats
+        return {p for p in candidats if valeur in self.textes[p]}
+
+INDEX_CLIENTS = IndexClients()
+
 def chercher_client(recherche: str) -> Optional[Dict[str, Any]]:
-    base_clients = charger_json(CLIENTS_FILE)
+    """Fiche dont la clé, la cle_acces ou le nom vaut la recherche (casse ignorée).
+
+    Correspondance stricte, sans accents repliés : la recherche élargie
+    (email, ville, valeurs partielles) est celle de rechercher_clients.
+    """
+    index = INDEX_CLIENTS.actualiser()
     recherche = recherche.strip().lower()
+    if recherche in index.cles:
+        return index.fiches[index.cles[recherche]]
+    positions = [valeurs[recherche] for valeurs in index.stricts.values() if recherche in valeurs]
+    return index.fiches[min(positions)] if positions else None
+
+def rechercher_clients(recherche: str, page: int = 1, par_page: int = PAR_PAGE) -> Dict[str, Any]:
+    """Fiches correspondant à la recherche, paginées.
 
-    if recherche in base_clients:
-        return base_clients[recherche]
+    Les correspondances exactes (identifiant, nom, email, ville) viennent en
+    premier, puis les correspondances partielles, dans l'ordre du fichier.
+    """
+    index = INDEX_CLIENTS.actualiser()
+    exacts = index.exact(recherche)
+    partiels = index.partiel(recherche, exacts)
+    debut = (max(page, 1) - 1) * par_page
+    fin = debut + par_page
+    positions = exacts[debut:fin]
+    if len(positions) < par_page and partiels:
+        reste = fin - len(exacts)
+        positions += heapq.nsmallest(reste, partiels)[max(debut - len(exacts), 0):]
+    return {
+        "total": len(exacts) + len(partiels),
+        "page": max(page, 1),
+        "par_page": par_page,
+        "resultats": [index.fiches[p] for p in positions]
+    }
 
-    for fiche in base_clients.values():
-        if fiche.get("cle_acces", "").lower() == recherche or fiche.get("nom", "").lower() == recherche:
-            return fiche
-    return None
+def benchmark_recherche(nb_clients: int = 100_000, nb_requetes: int = 1000) -> Dict[str, float]:
+    """Mesure la construction de l'index et le temps moyen d'une recherche."""
+    villes = ["Bellac", "Limoges", "Bordeaux", "Poitiers", "Périgueux"]
+    with tempfile.TemporaryDirectory() as tmp:
+        chemin = Path(tmp) / "clients.json"
+        chemin.write_text(json.dumps({
+            f"client_{i}": {"prenom": f"Prénom{i % 997}", "nom": f"Nom{i}",
+                            "email": f"client{i}@example.com", "ville": villes[i % len(villes)]}
+            for i in range(nb_clients)
+        }), encoding="utf-8")
+        index = IndexClients(chemin)
+        debut = time.perf_counter()
+        index.actualiser()
+        resultats: Dict[str, float] = {"clients": nb_clients,
+                                       "construction_s": round(time.perf_counter() - debut, 2)}
+        for nom, motif in (("exacte_ms", "client{}@example.com"), ("partielle_ms", "nom{}"),
+                           ("ville_ms", "limoges")):
+            debut = time.perf_counter()
+            for i in range(nb_requetes):
+                recherche = motif.format((i * 7919) % nb_clients)
+                exacts = index.exact(recherche)
+                partiels = index.partiel(recherche, exacts)
+                exacts[:PAR_PAGE] + heapq.nsmallest(PAR_PAGE, partiels)
+            resultats[nom] = round((time.perf_counter() - debut) * 1000 / nb_requetes, 3)
+    logging.info(f"Benchmark recherche clients : {resultats}")
+    return resultats
 
 def est_cle_valide(fiche: Dict[str, Any]) -> bool:
     date_str = fiche.get("date_cle", "")
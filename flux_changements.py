@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""Flux des changements de fichiers du projet - Luxuria Studio.
+
+Les créations, modifications et suppressions de fichiers sont inscrites dans
+un journal SQLite numéroté. Chaque outil conserve son curseur (le dernier
+numéro traité) et demande « qu'est-ce qui a changé depuis ? » au lieu de
+reparcourir toute l'arborescence.
+
+Deux sources alimentent le journal :
+  - surveiller() : service inotify (Linux), qui suit les événements du noyau ;
+  - sonder() : sondage, qui ne relit que les dossiers dont la date a changé
+    et se contente d'un stat pour les fichiers des autres dossiers.
+Quand aucun service de surveillance n'est actif, nouveautes() sonde d'abord.
+"""
+
+import os
+import sys
+import time
+import stat
+import select
+import struct
+import sqlite3
+import logging
+import posixpath
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# === Configuration
+BASE_DIR = Path(__file__).resolve().parent
+FLUX_PATH = BASE_DIR / ".luxuria_cache" / "flux_changements.sqlite"
+IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages", ".git", ".luxuria_cache", "backups"}
+INTERVALLE = 2.0     # secondes entre deux sondages / battements du service
+
+CREE, MODIFIE, SUPPRIME = "cree", "modifie", "supprime"
+
+
+# === inotify (Linux) par ctypes, sans dépendance
+class _Inotify:
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASQUE = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+    _ENTETE = struct.Struct("iIII")
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._ctypes = ctypes
+        self.fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dossiers: Dict[int, str] = {}
+
+    def surveiller(self, absolu: str, relatif: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(absolu), self.MASQUE)
+        if wd < 0:
+            code = self._ctypes.get_errno()
+            raise OSError(code, f"inotify_add_watch : {os.strerror(code)}", absolu)
+        self.dossiers[wd] = relatif
+
+    def lire(self, delai: float) -> List[Tuple[int, str]]:
+        """Événements (masque, chemin relatif) ; liste vide après le délai."""
+        if not select.select([self.fd], [], [], delai)[0]:
+            return []
+        try:
+            donnees = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        evenements, position = [], 0
+        while position < len(donnees):
+            wd, masque, _, longueur = self._ENTETE.unpack_from(donnees, position)
+            position += self._ENTETE.size
+            nom = os.fsdecode(donnees[position:position + longueur].rstrip(b"\0"))
+            position += longueur
+            if masque & self.IN_IGNORED:
+                self.dossiers.pop(wd, None)
+                continue
+            dossier = self.dossiers.get(wd)
+            if dossier is None and not masque & self.IN_Q_OVERFLOW:
+                continue
+            evenements.append((masque, posixpath.join(dossier, nom) if nom else (dossier or "")))
+        return evenements
+
+    def fermer(self) -> None:
+        os.close(self.fd)
+
+
+class FluxChangements:
+    """Journal des changements d'une arborescence, avec curseurs par outil."""
+
+    def __init__(self, racine: Path = BASE_DIR, chemin: Path = FLUX_PATH, ignores: set = IGNORES):
+        self.racine = Path(racine).resolve()
+        self.ignores = ignores
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        self.base = sqlite3.connect(chemin, timeout=30)
+        self.base.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS changements (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                chemin TEXT NOT NULL, type TEXT NOT NULL, horodatage REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS etat (
+                chemin TEXT PRIMARY KEY, dossier INTEGER NOT NULL,
+                taille INTEGER, mtime_ns INTEGER
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS curseurs (outil TEXT PRIMARY KEY, seq INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur REAL);
+        """)
+
+    # === Méta-données
+    def _meta(self, cle: str, defaut: float = 0) -> float:
+        ligne = self.base.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+        return ligne[0] if ligne else defaut
+
+    def _definir_meta(self, cle: str, valeur: float) -> None:
+        self.base.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (cle, valeur))
+
+    def dernier_seq(self) -> int:
+        # sqlite_sequence survit au compactage, contrairement à MAX(seq)
+        ligne = self.base.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changements'").fetchone()
+        return ligne[0] if ligne else 0
+
+    def absolu(self, relatif: str) -> Path:
+        return self.racine.joinpath(*relatif.split("/")) if relatif else self.racine
+
+    # === Enregistrement
+    def _noter(self, relatif: str, type_changement: str, infos: Optional[os.stat_result] = None) -> None:
+        if infos is None:
+            self.base.execute("DELETE FROM etat WHERE chemin = ?", (relatif,))
+        else:
+            self.base.execute("INSERT OR REPLACE INTO etat VALUES (?, ?, ?, ?)",
+                              (relatif, int(stat.S_ISDIR(infos.st_mode)), infos.st_size, infos.st_mtime_ns))
+            if stat.S_ISDIR(infos.st_mode):
+                return
+        self.base.execute("INSERT INTO changements (chemin, type, horodatage) VALUES (?, ?, ?)",
+                          (relatif, type_changement, time.time()))
+
+    def _ignore(self, relatif: str) -> bool:
+        return any(partie in self.ignores for partie in relatif.split("/"))
+
+    # === Sondage
+    def sonder(self) -> int:
+        """Compare l'arborescence à l'état connu ; retourne le nombre de changements notés.
+
+        Seuls les dossiers dont la date a changé sont relus (créations et
+        suppressions) ; les fichiers des autres dossiers sont vérifiés par stat.
+        Le premier sondage établit l'état de référence sans rien journaliser.
+        """
+        connus = {chemin: (dossier, taille, mtime)
+                  for chemin, dossier, taille, mtime in self.base.execute("SELECT * FROM etat")}
+        reference = not connus
+        enfants = defaultdict(list)
+        for chemin in connus:
+            if chemin:
+                enfants[posixpath.dirname(chemin)].append(chemin)
+
+        avant = self.dernier_seq()
+        vus = set()
+        with self.base:
+            a_visiter = [""]
+            while a_visiter:
+                dossier = a_visiter.pop()
+                try:
+                    infos = os.stat(self.absolu(dossier))
+                except OSError:
+                    continue
+                vus.add(dossier)
+                precedent = connus.get(dossier)
+                if precedent is None or precedent[2] != infos.st_mtime_ns:
+                    if precedent != (1, infos.st_size, infos.st_mtime_ns):
+                        self._noter(dossier, MODIFIE, infos)
+                    try:
+                        entrees = list(os.scandir(self.absolu(dossier)))
+                    except OSError:
+                        continue
+                    for entree in entrees:
+                        if entree.name in self.ignores:
+                            continue
+                        relatif = posixpath.join(dossier, entree.name) if dossier else entree.name
+                        try:
+                            if entree.is_dir(follow_symlinks=False):
+                                a_visiter.append(relatif)
+                                continue
+                            infos_fichier = entree.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        self._comparer(relatif, infos_fichier, connus, vus, reference)
+                else:
+                    # Liste inchangée : les sous-dossiers et fichiers connus suffisent
+                    for relatif in enfants.get(dossier, ()):
+                        if connus[relatif][0]:
+                            a_visiter.append(relatif)
+                            continue
+                        try:
+                            infos_fichier = os.stat(self.absolu(relatif), follow_symlinks=False)
+                        except OSError:
+                            continue
+                        self._comparer(relatif, infos_fichier, connus, vus, reference)
+
+            for chemin in set(connus) - vus:
+                if connus[chemin][0]:
+                    self.base.execute("DELETE FROM etat WHERE chemin = ?", (chemin,))
+                else:
+                    self._noter(chemin, SUPPRIME)
+        return self.dernier_seq() - avant
+
+    def _comparer(self, relatif: str, infos: os.stat_result, connus: Dict, vus: set, reference: bool) -> None:
+        vus.add(relatif)
+        precedent = connus.get(relatif)
+        if precedent == (0, infos.st_size, infos.st_mtime_ns):
+            return
+        if reference:
+            self.base.execute("INSERT OR REPLACE INTO etat VALUES (?, 0, ?, ?)",
+                              (relatif, infos.st_size, infos.st_mtime_ns))
+        else:
+            self._noter(relatif, CREE if precedent is None else MODIFIE, infos)
+
+    # === Service inotify
+    def surveiller(self, duree: Optional[float] = None, intervalle: float = INTERVALLE) -> None:
+        """Alimente le journal en continu (inotify, sinon sondage périodique)."""
+        fin = None if duree is None else time.monotonic() + duree
+        self.sonder()
+        try:
+            inotify = _Inotify() if sys.platform.startswith("linux") else None
+        except (OSError, AttributeError) as err:
+            logging.warning(f"inotify indisponible ({err}) : sondage toutes les {intervalle} s")
+            inotify = None
+
+        if inotify is not None:
+            try:
+                self._surveiller_arbre(inotify, "")
+            except OSError as err:
+                # Limite de surveillances atteinte (ENOSPC) ou dossier illisible
+                logging.warning(f"inotify limité ({err}) : sondage toutes les {intervalle} s")
+                inotify.fermer()
+                inotify = None
+
+        while fin is None or time.monotonic() < fin:
+            with self.base:
+                self._definir_meta("battement", time.time())
+            if inotify is None:
+                time.sleep(intervalle)
+                self.sonder()
+                continue
+            evenements = inotify.lire(intervalle)
+            if evenements:
+                self._appliquer(inotify, evenements)
+        if inotify is not None:
+            inotify.fermer()
+        with self.base:
+            self._definir_meta("battement", 0)
+
+    def _surveiller_arbre(self, inotify: _Inotify, relatif: str) -> None:
+        for dossier, sous_dossiers, _ in os.walk(self.absolu(relatif)):
+            sous_dossiers[:] = [d for d in sous_dossiers if d not in self.ignores]
+            rel = Path(dossier).relative_to(self.racine).as_posix()
+            inotify.surveiller(dossier, "" if rel == "." else rel)
+
+    def _appliquer(self, inotify: _Inotify, evenements: List[Tuple[int, str]]) -> None:
+        with self.base:
+            for masque, relatif in evenements:
+                if masque & _Inotify.IN_Q_OVERFLOW:
+                    # Événements perdus par le noyau : on resynchronise par sondage
+                    self.base.commit()
+                    self.sonder()
+                    continue
+                if self._ignore(relatif):
+                    continue
+                if masque & (_Inotify.IN_DELETE | _Inotify.IN_MOVED_FROM | _Inotify.IN_DELETE_SELF):
+                    self._supprimer_sous(relatif)
+                    continue
+                try:
+                    infos = os.stat(self.absolu(relatif), follow_symlinks=False)
+                except OSError:
+                    continue
+                connu = self.base.execute("SELECT dossier, taille, mtime_ns FROM etat WHERE chemin = ?",
+                                          (relatif,)).fetchone()
+                if stat.S_ISDIR(infos.st_mode):
+                    if connu is None:
+                        # Nouveau dossier : on le surveille et on note ce qu'il contient déjà
+                        self._noter(relatif, CREE, infos)
+                        try:
+                            self._surveiller_arbre(inotify, relatif)
+                        except OSError as err:
+                            logging.warning(f"Surveillance impossible : {relatif} ({err})")
+                        self._noter_contenu(relatif)
+                    continue
+                if connu != (0, infos.st_size, infos.st_mtime_ns):
+                    self._noter(relatif, CREE if connu is None else MODIFIE, infos)
+
+    def _noter_contenu(self, relatif: str) -> None:
+        for dossier, sous_dossiers, fichiers in os.walk(self.absolu(relatif)):
+            sous_dossiers[:] = [d for d in sous_dossiers if d not in self.ignores]
+            base = Path(dossier).relative_to(self.racine).as_posix()
+            for nom in sous_dossiers + fichiers:
+                try:
+                    infos = os.stat(os.path.join(dossier, nom), follow_symlinks=False)
+                except OSError:
+                    continue
+                self._noter(posixpath.join(base, nom), CREE, infos)
+
+    def _supprimer_sous(self, relatif: str) -> None:
+        prefixe = relatif + "/"
+        lignes = self.base.execute(
+            "SELECT chemin, dossier FROM etat WHERE chemin = ? OR (chemin >= ? AND chemin < ?)",
+            (relatif, prefixe, relatif + "0")).fetchall()
+        for chemin, dossier in lignes:
+            if dossier:
+                self.base.execute("DELETE FROM etat WHERE chemin = ?", (chemin,))
+            else:
+                self._noter(chemin, SUPPRIME)
+
+    def service_actif(self, intervalle: float = INTERVALLE) -> bool:
+        return time.time() - self._meta("battement") < 3 * intervalle
+
+    def actualiser(self) -> None:
+        """Sonde l'arborescence, sauf si un service de surveillance tient déjà le journal à jour."""
+        if not self.service_actif():
+            self.sonder()
+
+    # === Curseurs
+    def curseur(self, outil: str) -> Optional[int]:
+        ligne = self.base.execute("SELECT seq FROM curseurs WHERE outil = ?", (outil,)).fetchone()
+        return ligne[0] if ligne else None
+
+    def nouveautes(self, outil: str, sonder: Optional[bool] = None) -> Tuple[int, Optional[Dict[Path, str]]]:
+        """Retourne (jeton, changements depuis le curseur de l'outil).
+
+        changements vaut None si l'outil n'a pas de curseur ou si son curseur
+        est antérieur à la partie compactée du journal : il doit alors tout
+        reparcourir. Pour chaque chemin seul le dernier changement est gardé.
+        Le jeton est à passer à acquitter() une fois les changements traités.
+        """
+        if sonder:
+            self.sonder()
+        elif sonder is None:
+            self.actualiser()
+        jeton = self.dernier_seq()
+        depuis = self.curseur(outil)
+        if depuis is None or depuis < self._meta("plancher"):
+            return jeton, None
+        changements = {}
+        for chemin, type_changement in self.base.execute(
+                "SELECT chemin, type FROM changements WHERE seq > ? AND seq <= ? ORDER BY seq", (depuis, jeton)):
+            changements[self.absolu(chemin)] = type_changement
+        return jeton, changements
+
+    def acquitter(self, outil: str, jeton: int) -> None:
+        """Avance le curseur de l'outil ; si le plus en retard a avancé, le journal est compacté."""
+        requete = "SELECT MIN(seq) FROM curseurs"
+        with self.base:
+            avant = self.base.execute(requete).fetchone()[0]
+            self.base.execute("INSERT OR REPLACE INTO curseurs VALUES (?, ?)", (outil, jeton))
+            apres = self.base.execute(requete).fetchone()[0]
+        if avant is None or apres > avant:
+            self.compacter()
+
+    def fichiers(self, extensions: Optional[set] = None) -> List[str]:
+        """Fichiers connus (chemins relatifs), éventuellement filtrés par extension."""
+        chemins = [c for (c,) in self.base.execute("SELECT chemin FROM etat WHERE dossier = 0")]
+        if extensions:
+            chemins = [c for c in chemins if posixpath.splitext(c)[1] in extensions]
+        return chemins
+
+    def compacter(self) -> int:
+        """Supprime les changements déjà lus par tous les outils ; retourne leur nombre."""
+        minimum = self.base.execute("SELECT MIN(seq) FROM curseurs").fetchone()[0]
+        if minimum is None:
+            return 0
+        with self.base:
+            supprimes = self.base.execute("DELETE FROM changements WHERE seq <= ?", (minimum,)).rowcount
+            self._definir_meta("plancher", max(self._meta("plancher"), minimum))
+        return supprimes
+
+    def fermer(self) -> None:
+        self.base.close()
+
+
+_flux = None
+
+def flux() -> FluxChangements:
+    """Flux partagé du projet (ouvert au premier appel)."""
+    global _flux
+    if _flux is None:
+        _flux = FluxChangements()
+    return _flux
@@ -2,9 +2,14 @@
 """Analyse des erreurs dans les scripts Python - Luxuria Studio"""
 
 import os
+import re
+import sys
 import json
+import signal
 import logging
-import runpy
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from assistant_pdg import AssistantPDG
@@ -15,26 +20,125 @@ BASE_PATH = Path(__file__).resolve().parent
 THIS_FILE = Path(__file__).name
 EXCLUDED_FILES = {THIS_FILE, "assistant_pdg.py"}
 
-def scan_scripts_and_log_errors() -> dict:
-    """Exécute tous les scripts Python du dossier courant (sauf exclusions) et retourne un rapport d'erreurs."""
-    report = {}
-    py_files = [f for f in os.listdir(BASE_PATH) if f.endswith(".py") and f not in EXCLUDED_FILES]
-
-    for file_name in py_files:
-        file_path = BASE_PATH / file_name
-        logging.info(f"📂 Exécution du script : {file_name}")
-        try:
-            runpy.run_path(str(file_path))
-            report[file_name] = {"status": "OK", "error": None}
-            logging.info(f"✅ Script exécuté sans erreur : {file_name}")
-        except Exception as e:
-            report[file_name] = {
-                "status": "ERROR",
-                "error_type": type(e).__name__,
-                "error_message": str(e)
-            }
-            logging.warning(f"❌ Erreur dans {file_name} : {type(e).__name__} - {e}")
+# === Isolation des scripts
+TIMEOUT_SCRIPT = 30                   # secondes (durée réelle)
+LIMITE_CPU = 20                       # secondes de CPU (RLIMIT_CPU)
+LIMITE_MEMOIRE = 1024 * 1024 * 1024   # octets d'espace d'adressage (RLIMIT_AS)
+MAX_WORKERS = os.cpu_count() or 2
+MARQUEUR_RESULTAT = "__LUXURIA_RESULTAT__"
+# Scripts qui démarrent un serveur Flask (port 5000) : jamais exécutés en même temps
+MOTIF_SERVEUR = re.compile(r"^\s*app\.run\(", re.MULTILINE)
+
+# Exécuté dans chaque processus isolé : limites, exécution, résultat JSON sur stderr
+AMORCE = """
+import sys, json, runpy
+chemin, base, limite_cpu, limite_memoire, marqueur = sys.argv[1:6]
+try:
+    import resource
+    resource.setrlimit(resource.RLIMIT_CPU, (int(limite_cpu), int(limite_cpu)))
+    resource.setrlimit(resource.RLIMIT_AS, (int(limite_memoire), int(limite_memoire)))
+except (ImportError, ValueError, OSError):
+    pass  # Windows ou limites refusées : seul le timeout s'applique
+sys.path.insert(0, base)
+sys.argv = [chemin]
+resultat = {"status": "OK", "error": None}
+try:
+    runpy.run_path(chemin)
+except SystemExit as e:
+    if e.code not in (None, 0):
+        resultat = {"status": "ERROR", "error_type": "SystemExit", "error_message": str(e.code)}
+except BaseException as e:
+    resultat = {"status": "ERROR", "error_type": type(e).__name__, "error_message": str(e)}
+sys.stderr.flush()
+sys.stderr.write("\\n" + marqueur + json.dumps(resultat) + "\\n")
+sys.stderr.flush()
+"""
+
+def lance_serveur(file_path: Path) -> bool:
+    try:
+        return bool(MOTIF_SERVEUR.search(file_path.read_text(encoding="utf-8", errors="replace")))
+    except OSError:
+        return False
+
+def tuer_groupe(processus: subprocess.Popen) -> None:
+    """Tue le script et tous les processus qu'il a lancés (même session ou groupe)."""
+    try:
+        if os.name == "posix":
+            os.killpg(processus.pid, signal.SIGKILL)
+        else:
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(processus.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass  # Groupe déjà terminé
+
+def executer_script_isole(file_path: Path, timeout: int = TIMEOUT_SCRIPT) -> dict:
+    """Exécute un script dans un processus isolé (stdin fermé, dossier temporaire, limites).
 
+    Le script est lancé dans sa propre session (son propre groupe sous
+    Windows) : à la fin, ou au timeout, tous ses descendants sont tués avec lui.
+    """
+    isolation = ({"start_new_session": True} if os.name == "posix"
+                 else {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP})
+    with tempfile.TemporaryDirectory(prefix="luxuria_report_") as dossier_travail:
+        # stderr dans un fichier : un descendant resté ouvert ne bloque pas la lecture
+        sortie_erreurs = Path(dossier_travail) / "stderr.txt"
+        with sortie_erreurs.open("w", encoding="utf-8") as flux_erreurs:
+            processus = subprocess.Popen(
+                [sys.executable, "-c", AMORCE, str(file_path), str(BASE_PATH),
+                 str(LIMITE_CPU), str(LIMITE_MEMOIRE), MARQUEUR_RESULTAT],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=flux_erreurs,
+                cwd=dossier_travail,
+                **isolation
+            )
+            try:
+                processus.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                tuer_groupe(processus)
+                processus.wait()
+                return {"status": "TIMEOUT", "error_type": "TimeoutExpired",
+                        "error_message": f"Interrompu après {timeout} s"}
+            finally:
+                tuer_groupe(processus)
+        erreurs = sortie_erreurs.read_text(encoding="utf-8", errors="replace")
+
+    for ligne in reversed(erreurs.splitlines()):
+        if ligne.startswith(MARQUEUR_RESULTAT):
+            return json.loads(ligne[len(MARQUEUR_RESULTAT):])
+    # Pas de résultat : processus tué (limite CPU/mémoire) ou arrêt brutal (os._exit)
+    derniere_ligne = erreurs.strip().splitlines()[-1:] or [""]
+    return {"status": "ERROR", "error_type": "ProcessusInterrompu",
+            "error_message": f"Code retour {processus.returncode} {derniere_ligne[0]}".strip()}
+
+def scan_scripts_and_log_errors(max_workers: int = MAX_WORKERS, timeout: int = TIMEOUT_SCRIPT) -> dict:
+    """Exécute tous les scripts Python du dossier courant (sauf exclusions) et retourne un rapport d'erreurs.
+
+    Chaque script tourne dans son propre processus ; plusieurs scripts sont
+    exécutés en parallèle et leurs résultats fusionnés dans le rapport. Les
+    scripts qui démarrent un serveur partagent le même port : ils passent un
+    par un, dans une seule tâche du pool.
+    """
+    py_files = sorted(f for f in os.listdir(BASE_PATH) if f.endswith(".py") and f not in EXCLUDED_FILES)
+    serveurs = [nom for nom in py_files if lance_serveur(BASE_PATH / nom)]
+    autres = [nom for nom in py_files if nom not in serveurs]
+    logging.info(f"📂 Exécution isolée de {len(py_files)} script(s) ({max_workers} en parallèle, "
+                 f"{len(serveurs)} serveur(s) un par un)")
+
+    def executer_serveurs() -> list:
+        return [executer_script_isole(BASE_PATH / nom, timeout) for nom in serveurs]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        resultats_serveurs = pool.submit(executer_serveurs)
+        resultats = dict(zip(autres, pool.map(lambda nom: executer_script_isole(BASE_PATH / nom, timeout), autres)))
+        resultats.update(zip(serveurs, resultats_serveurs.result()))
+    report = {nom: resultats[nom] for nom in py_files}
+
+    for file_name, resultat in report.items():
+        if resultat["status"] == "OK":
+            logging.info(f"✅ Script exécuté sans erreur : {file_name}")
+        else:
+            logging.warning(f"❌ Erreur dans {file_name} : {resultat['error_type']} - {resultat['error_message']}")
     return report
 
 def save_report(report: dict) -> Path:
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""Index de trigrammes des sources et pages HTML - Luxuria Studio.
+
+Chaque fichier indexé est réduit à l'ensemble de ses trigrammes (texte mis en
+minuscules). Une recherche littérale ou par expression régulière est traduite
+en trigrammes obligatoires : seuls les fichiers qui les contiennent tous sont
+candidats et méritent d'être lus. L'index est conservé dans SQLite et mis à
+jour à partir de la taille et de la date des fichiers.
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# === Configuration
+BASE_DIR = Path(__file__).resolve().parent
+INDEX_PATH = BASE_DIR / ".luxuria_cache" / "index_trigrammes.sqlite"
+EXTENSIONS = {".py", ".html", ".htm"}
+IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages", ".git", ".luxuria_cache", "backups"}
+
+_REPETITIONS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPETITIONS.add(sre_constants.POSSESSIVE_REPEAT)
+
+# Une exigence est un littéral (str) ou une alternative ("ou", [exigences, ...])
+Exigence = Union[str, Tuple[str, List[List]]]
+
+
+def trigrammes(texte: str) -> Set[str]:
+    texte = texte.lower()
+    return set(map("".join, zip(texte, texte[1:], texte[2:])))
+
+
+# === Traduction d'une expression régulière en littéraux obligatoires
+def _exigences(sequence) -> List[Exigence]:
+    """Littéraux (>= 3 caractères) que toute correspondance doit contenir."""
+    exigences: List[Exigence] = []
+    courant: List[str] = []
+
+    def couper() -> None:
+        if len(courant) >= 3:
+            exigences.append("".join(courant))
+        courant.clear()
+
+    for operation, argument in sequence:
+        if operation is sre_constants.LITERAL:
+            courant.append(chr(argument))
+            continue
+        couper()
+        if operation is sre_constants.SUBPATTERN:
+            exigences.extend(_exigences(argument[-1]))
+        elif operation in _REPETITIONS:
+            minimum, _, motif = argument
+            if minimum >= 1:
+                exigences.extend(_exigences(motif))
+        elif operation is sre_constants.BRANCH:
+            branches = [_exigences(branche) for branche in argument[1]]
+            # Une branche sans exigence peut tout accepter : l'alternative ne filtre rien
+            if all(branches):
+                exigences.append(("ou", branches))
+        elif getattr(sre_constants, "ATOMIC_GROUP", None) is operation:
+            exigences.extend(_exigences(argument))
+    couper()
+    return exigences
+
+def exigences_regex(motif: str, flags: int = 0) -> List[Exigence]:
+    return _exigences(sre_parse.parse(motif, flags))
+
+
+class IndexTrigrammes:
+    """Index persistant : fichiers (empreinte) et trigrammes -> fichiers."""
+
+    def __init__(self, chemin: Path = INDEX_PATH):
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        self.base = sqlite3.connect(chemin)
+        self.base.executescript("""
+            CREATE TABLE IF NOT EXISTS fichiers (
+                id INTEGER PRIMARY KEY, chemin TEXT UNIQUE NOT NULL,
+                taille INTEGER, mtime_ns INTEGER, sha256 TEXT
+            );
+            CREATE TABLE IF NOT EXISTS trigrammes (
+                tri TEXT NOT NULL, fichier INTEGER NOT NULL, PRIMARY KEY (tri, fichier)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS trigrammes_fichier ON trigrammes (fichier);
+        """)
+
+    # === Mise à jour
+    @staticmethod
+    def parcourir(racine: Path = BASE_DIR) -> Iterator[Path]:
+        """Fichiers .py et .html sous la racine, dossiers ignorés élagués."""
+        for dossier, sous_dossiers, fichiers in os.walk(racine):
+            sous_dossiers[:] = [d for d in sous_dossiers if d not in IGNORES]
+            for nom in fichiers:
+                if os.path.splitext(nom)[1].lower() in EXTENSIONS:
+                    yield Path(dossier) / nom
+
+    def mettre_a_jour(self, fichiers: Optional[Iterable[Union[str, Path]]] = None,
+                      racine: Path = BASE_DIR) -> Dict[str, int]:
+        """Réindexe les fichiers nouveaux ou modifiés.
+
+        Sans liste, toute la racine est parcourue et les fichiers disparus sont
+        retirés de l'index ; avec une liste, seuls ces fichiers sont vérifiés.
+        """
+        complet = fichiers is None
+        chemins = [os.path.abspath(f) for f in (self.parcourir(racine) if complet else fichiers)]
+        connus = {chemin: (id_, taille, mtime, sha)
+                  for id_, chemin, taille, mtime, sha in self.base.execute("SELECT * FROM fichiers")}
+        bilan = {"indexes": 0, "inchanges": 0, "retires": 0}
+
+        with self.base:
+            for chemin in chemins:
+                try:
+                    infos = os.stat(chemin)
+                except OSError:
+                    continue
+                precedent = connus.get(chemin)
+                if precedent and precedent[1:3] == (infos.st_size, infos.st_mtime_ns):
+                    bilan["inchanges"] += 1
+                    continue
+                try:
+                    with open(chemin, "rb") as flux:
+                        donnees = flux.read()
+                except OSError:
+                    continue
+                sha = hashlib.sha256(donnees).hexdigest()
+                if precedent and precedent[3] == sha:
+                    # Date modifiée, contenu identique : seule l'empreinte change
+                    self.base.execute("UPDATE fichiers SET taille = ?, mtime_ns = ? WHERE id = ?",
+                                      (infos.st_size, infos.st_mtime_ns, precedent[0]))
+                    bilan["inchanges"] += 1
+                    continue
+                if precedent:
+                    id_ = precedent[0]
+                    self.base.execute("DELETE FROM trigrammes WHERE fichier = ?", (id_,))
+                    self.base.execute("UPDATE fichiers SET taille = ?, mtime_ns = ?, sha256 = ? WHERE id = ?",
+                                      (infos.st_size, infos.st_mtime_ns, sha, id_))
+                else:
+                    id_ = self.base.execute(
+                        "INSERT INTO fichiers (chemin, taille, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                        (chemin, infos.st_size, infos.st_mtime_ns, sha)).lastrowid
+                self.base.executemany("INSERT INTO trigrammes VALUES (?, ?)",
+                                      ((tri, id_) for tri in trigrammes(donnees.decode("utf-8", errors="replace"))))
+                bilan["indexes"] += 1
+
+            presents = set(chemins)
+            prefixe = os.path.join(os.path.abspath(racine), "")
+            for chemin, (id_, *_) in connus.items():
+                absent = (complet and chemin.startswith(prefixe) and chemin not in presents) \
+                    or (not complet and chemin in presents and not os.path.exists(chemin))
+                if absent:
+                    self.base.execute("DELETE FROM trigrammes WHERE fichier = ?", (id_,))
+                    self.base.execute("DELETE FROM fichiers WHERE id = ?", (id_,))
+                    bilan["retires"] += 1
+        if bilan["indexes"] or bilan["retires"]:
+            logging.info(f"Index de trigrammes : {bilan}")
+        return bilan
+
+    # === Requêtes
+    def _contenant(self, litteral: str) -> Optional[Set[str]]:
+        """Fichiers contenant tous les trigrammes du littéral (None : pas de filtre)."""
+        tris = sorted(trigrammes(litteral))
+        if not tris:
+            return None
+        requete = (
+            "SELECT f.chemin FROM trigrammes t JOIN fichiers f ON f.id = t.fichier "
+            f"WHERE t.tri IN ({','.join('?' * len(tris))}) GROUP BY t.fichier HAVING COUNT(*) = ?"
+        )
+        return {chemin for (chemin,) in self.base.execute(requete, (*tris, len(tris)))}
+
+    def _evaluer(self, exigences: List[Exigence]) -> Optional[Set[str]]:
+        resultat: Optional[Set[str]] = None
+        for exigence in exigences:
+            if isinstance(exigence, str):
+                ensemble = self._contenant(exigence)
+            else:
+                branches = [self._evaluer(branche) for branche in exigence[1]]
+                ensemble = None if any(b is None for b in branches) else set().union(*branches)
+            if ensemble is None:
+                continue
+            resultat = ensemble if resultat is None else resultat & ensemble
+            if not resultat:
+                break
+        return resultat
+
+    def _tous(self) -> Set[str]:
+        return {chemin for (chemin,) in self.base.execute("SELECT chemin FROM fichiers")}
+
+    def candidats(self, litteral: str) -> Set[str]:
+        """Fichiers indexés pouvant contenir le littéral (sans distinction de casse)."""
+        resultat = self._contenant(litteral)
+        return self._tous() if resultat is None else resultat
+
+    def candidats_parmi(self, litteraux: Iterable[str]) -> Set[str]:
+        """Fichiers pouvant contenir au moins un des littéraux."""
+        branches = [[litteral] if len(litteral) >= 3 else [] for litteral in litteraux]
+        resultat = self._evaluer([("ou", branches)]) if all(branches) else None
+        return self._tous() if resultat is None else resultat
+
+    def candidats_regex(self, motif: str, flags: int = 0) -> Set[str]:
+        """Fichiers indexés dans lesquels l'expression peut avoir une correspondance."""
+        resultat = self._evaluer(exigences_regex(motif, flags))
+        return self._tous() if resultat is None else resultat
+
+    def rechercher(self, motif: str, regex: bool = False, flags: int = 0) -> Iterator[Tuple[str, int, str]]:
+        """Parcourt les seuls candidats et retourne (fichier, ligne, texte) de chaque correspondance."""
+        expression = re.compile(motif if regex else re.escape(motif), flags)
+        candidats = self.candidats_regex(motif, flags) if regex else self.candidats(motif)
+        for chemin in sorted(candidats):
+            try:
+                with open(chemin, encoding="utf-8", errors="replace") as flux:
+                    for numero, ligne in enumerate(flux, start=1):
+                        if expression.search(ligne):
+                            yield chemin, numero, ligne.rstrip("\n")
+            except OSError:
+                continue
+
+    def fermer(self) -> None:
+        self.base.close()
+
+
+_index = None
+
+def index_trigrammes() -> IndexTrigrammes:
+    """Index partagé (ouvert au premier appel)."""
+    global _index
+    if _index is None:
+        _index = IndexTrigrammes()
+    return _index
+
+def filtrer_fichiers(fichiers: Iterable[Union[str, Path]], litteraux: Iterable[str]) -> List[Path]:
+    """Garde, parmi les fichiers donnés, ceux qui peuvent contenir un des littéraux.
+
+    L'index est d'abord mis à jour pour ces fichiers (seuls les fichiers
+    modifiés depuis le dernier passage sont relus).
+    """
+    fichiers = [Path(f) for f in fichiers]
+    index = index_trigrammes()
+    index.mettre_a_jour(fichiers)
+    candidats = index.candidats_parmi(litteraux)
+    return [f for f in fichiers if os.path.abspath(f) in candidats]
@@ -6,6 +6,7 @@ import io
 import json
 import logging
 import assistant_pdg  # Orchestrateur passif
+from journal_menaces import journal
 
 admin_bp = Blueprint("admin", __name__, template_folder="templates")
 ROOT = Path(__file__).resolve().parent
@@ -67,7 +68,8 @@ def dashboard_ca():
         {"titre": "Conversations de la communauté", "url": url_for("admin.conversations")},
         {"titre": "Signatures de la charte", "url": url_for("admin.signatures_charte")},
         {"titre": "Clés d'accès", "url": url_for("admin.cles_acces")},
-        {"titre": "Notifications", "url": url_for("admin.notifications")}
+        {"titre": "Notifications", "url": url_for("admin.notifications")},
+        {"titre": "Menaces détectées", "url": url_for("admin.menaces")}
     ]
 
     return render_template("admin_dashboard.html", sections=sections)
@@ -110,6 +112,15 @@ def cles_acces():
 def notifications():
     return render_template("admin_section.html", titre="Notifications", contenu="Aucune alerte pour le moment.")
 
+@admin_bp.route("/admin/menaces")
+def menaces():
+    if session.get("user") != "admin":
+        return redirect(url_for("admin.login"))
+    limite = request.args.get("limite", 50, type=int)
+    historique = journal()
+    contenu = {"resume": historique.resume, "recentes": historique.recentes(limite)}
+    return render_template("admin_section.html", titre="Menaces détectées", contenu=contenu)
+
 @admin_bp.route("/admin/assistant-pdg")
 def assistant_pdg_view():
     return jsonify({
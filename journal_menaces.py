@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""Journal des menaces Luxuria Studio (JSONL en ajout seul, avec rotation)."""
+
+import os
+import copy
+import json
+import logging
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# === Répertoires
+BASE_DIR = Path(__file__).resolve().parent
+DEFENSE_DIR = BASE_DIR / "luxuria_defense"
+THREATS_LOG = DEFENSE_DIR / "menaces.jsonl"
+SUMMARY_JSON = DEFENSE_DIR / "menaces_resume.json"
+LEGACY_JSON = DEFENSE_DIR / "menaces_detectees.json"
+
+# === Rotation
+TAILLE_MAX = 5 * 1024 * 1024
+ARCHIVES_MAX = 5
+TAILLE_BLOC = 64 * 1024
+
+
+@contextmanager
+def _verrou_fichier(chemin: Path) -> Iterator[None]:
+    """Verrou exclusif entre processus, porté par un fichier .lock."""
+    with open(chemin, "a+b") as flux:
+        if fcntl is not None:
+            fcntl.flock(flux.fileno(), fcntl.LOCK_EX)
+        else:
+            flux.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(flux.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK abandonne après 10 s : on réessaie
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(flux.fileno(), fcntl.LOCK_UN)
+            else:
+                flux.seek(0)
+                msvcrt.locking(flux.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JournalMenaces:
+    """Journal des menaces : ajout en fin de fichier et résumé tenu à jour.
+
+    Le résumé (compteurs par type et par jour) est mis à jour à chaque ajout et
+    conservé dans un petit fichier JSON ; il n'est reconstruit à partir des
+    journaux que s'il est absent ou illisible. Il couvre les journaux conservés :
+    l'archive supprimée par une rotation en est décomptée. Les ajouts se font sous un
+    verrou de fichier, et le résumé est relu dès que le fichier a été modifié
+    par un autre processus.
+    """
+
+    def __init__(self, journal: Path = THREATS_LOG, resume: Path = SUMMARY_JSON,
+                 taille_max: int = TAILLE_MAX, archives_max: int = ARCHIVES_MAX):
+        self.journal = journal
+        self.resume_path = resume
+        self.taille_max = taille_max
+        self.archives_max = archives_max
+        self.verrou_path = journal.with_suffix(".lock")
+        self.journal.parent.mkdir(parents=True, exist_ok=True)
+        self._resume: dict = {}
+        self._signature: Optional[Tuple[int, int, int]] = None
+        with _verrou_fichier(self.verrou_path):
+            self._migrer_historique()
+            if not self._relire_resume():
+                self._reconstruire_resume()
+
+    # === Fichiers
+    def archive(self, rang: int) -> Path:
+        return self.journal.with_name(f"{self.journal.stem}.{rang}{self.journal.suffix}")
+
+    def fichiers(self) -> list:
+        """Journaux existants, du plus récent au plus ancien."""
+        candidats = [self.journal] + [self.archive(r) for r in range(1, self.archives_max + 1)]
+        return [f for f in candidats if f.exists()]
+
+    def _rotation(self, resume: dict) -> None:
+        """Décale les archives ; les menaces de l'archive supprimée sont retirées du résumé."""
+        if not self.journal.exists() or self.journal.stat().st_size < self.taille_max:
+            return
+        plus_ancienne = self.archive(self.archives_max)
+        if plus_ancienne.exists():
+            with plus_ancienne.open("r", encoding="utf-8") as flux:
+                for ligne in flux:
+                    if ligne.strip():
+                        self._compter(resume, json.loads(ligne), -1)
+            plus_ancienne.unlink()
+        for rang in range(self.archives_max - 1, 0, -1):
+            if self.archive(rang).exists():
+                self.archive(rang).replace(self.archive(rang + 1))
+        self.journal.replace(self.archive(1))
+        logging.info(f"Rotation du journal des menaces : {self.archive(1).name}")
+
+    def _migrer_historique(self) -> None:
+        """Convertit l'ancien historique JSON en JSONL (une seule fois)."""
+        if self.journal.exists() or not LEGACY_JSON.exists():
+            return
+        try:
+            historique = json.loads(LEGACY_JSON.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return
+        with self.journal.open("a", encoding="utf-8") as flux:
+            for menace in historique:
+                flux.write(json.dumps(menace, ensure_ascii=False) + "\n")
+        LEGACY_JSON.replace(LEGACY_JSON.with_suffix(".json.migre"))
+        logging.info(f"{len(historique)} menace(s) migrée(s) vers {self.journal.name}")
+
+    # === Résumé
+    @staticmethod
+    def _compter(resume: dict, menace: dict, sens: int = 1) -> None:
+        """Ajoute (sens=1) ou retire (sens=-1) une menace des compteurs."""
+        type_menace = menace.get("signature") or menace.get("type", "inconnu")
+        jour = str(menace.get("horodatage", ""))[:10] or "inconnu"
+        resume["total"] = resume.get("total", 0) + sens
+        for compteurs, cle in ((resume["par_type"], type_menace), (resume["par_jour"], jour)):
+            compteurs[cle] = compteurs.get(cle, 0) + sens
+            if compteurs[cle] <= 0:
+                del compteurs[cle]
+
+    def _signature_resume(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            infos = self.resume_path.stat()
+        except OSError:
+            return None
+        return infos.st_ino, infos.st_size, infos.st_mtime_ns
+
+    def _relire_resume(self) -> bool:
+        """Recharge le résumé si le fichier a changé ; False s'il est absent ou illisible."""
+        signature = self._signature_resume()
+        if signature is None:
+            return False
+        if signature == self._signature:
+            return True
+        try:
+            resume = json.loads(self.resume_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        self._resume, self._signature = resume, signature
+        return True
+
+    def _reconstruire_resume(self) -> None:
+        """Recompte toutes les menaces des journaux (sous verrou)."""
+        resume = {"total": 0, "par_type": {}, "par_jour": {}}
+        for fichier in reversed(self.fichiers()):
+            with fichier.open("r", encoding="utf-8") as flux:
+                for ligne in flux:
+                    if ligne.strip():
+                        self._compter(resume, json.loads(ligne))
+        self._sauvegarder_resume(resume)
+
+    def _sauvegarder_resume(self, resume: dict) -> None:
+        """Écrit le résumé dans un fichier temporaire puis le met en place (os.replace)."""
+        descripteur, temporaire = tempfile.mkstemp(dir=self.resume_path.parent,
+                                                   prefix=self.resume_path.stem, suffix=".tmp")
+        try:
+            with os.fdopen(descripteur, "w", encoding="utf-8") as flux:
+                json.dump(resume, flux, ensure_ascii=False)
+            os.replace(temporaire, self.resume_path)
+        except BaseException:
+            Path(temporaire).unlink(missing_ok=True)
+            raise
+        self._resume, self._signature = resume, self._signature_resume()
+
+    @property
+    def resume(self) -> dict:
+        """Résumé à jour, y compris des ajouts faits par d'autres processus."""
+        if not self._relire_resume():
+            with _verrou_fichier(self.verrou_path):
+                if not self._relire_resume():
+                    self._reconstruire_resume()
+        return self._resume
+
+    # === API
+    def ajouter(self, menaces: list) -> None:
+        """Ajoute les menaces en fin de journal (coût indépendant de l'historique)."""
+        if not menaces:
+            return
+        with _verrou_fichier(self.verrou_path):
+            # Compteurs relus sous verrou : les ajouts des autres processus sont conservés
+            if not self._relire_resume():
+                self._reconstruire_resume()
+            resume = copy.deepcopy(self._resume)
+            self._rotation(resume)
+            with self.journal.open("a", encoding="utf-8") as flux:
+                for menace in menaces:
+                    flux.write(json.dumps(menace, ensure_ascii=False) + "\n")
+                    self._compter(resume, menace)
+            self._sauvegarder_resume(resume)
+
+    def recentes(self, limite: int = 50) -> list:
+        """Retourne les dernières menaces (la plus récente en premier).
+
+        Les journaux sont lus à rebours par blocs : seules les dernières lignes
+        sont décodées, quelle que soit la taille de l'historique.
+        """
+        resultats = []
+        for fichier in self.fichiers():
+            for ligne in _lignes_a_rebours(fichier):
+                resultats.append(json.loads(ligne))
+                if len(resultats) >= limite:
+                    return resultats
+        return resultats
+
+
+def _lignes_a_rebours(fichier: Path):
+    with fichier.open("rb") as flux:
+        position = flux.seek(0, 2)
+        reste = b""
+        while position > 0:
+            lecture = min(TAILLE_BLOC, position)
+            position -= lecture
+            flux.seek(position)
+            lignes = (flux.read(lecture) + reste).split(b"\n")
+            reste = lignes.pop(0)
+            for ligne in reversed(lignes):
+                if ligne.strip():
+                    yield ligne.decode("utf-8")
+        if reste.strip():
+            yield reste.decode("utf-8")
+
+
+_journal = None
+
+def journal() -> JournalMenaces:
+    """Instance partagée du journal (créée au premier appel)."""
+    global _journal
+    if _journal is None:
+        _journal = JournalMenaces()
+    return _journal
@@ -6,6 +6,7 @@ import logging
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
+from sauvegarde_contenu import SessionSauvegarde, depot
 
 # === Configuration du logger ===
 LOG_DIR = Path(__file__).parent / "logs"
@@ -22,7 +23,7 @@ logging.basicConfig(
 )
 
 # === Parametres globaux ===
-DOSSIERS_EXCLUS = {".git", "__pycache__", "venv", "env", "logs"}
+DOSSIERS_EXCLUS = {".git", "__pycache__", "venv", "env", "logs", "backups", ".luxuria_cache"}
 SUPPRIMER_VIDES = True
 
 # === Suivi des operations ===
@@ -48,14 +49,21 @@ def calculer_hash(chemin: Path) -> Optional[str]:
         fichiers_erreurs.append(f"Erreur systeme : {chemin}  {e.strerror}")
     return None
 
-def nettoyer_dossier(racine: Path) -> None:
-    """Analyse recursivement le dossier et supprime doublons et fichiers vides."""
+def nettoyer_dossier(racine: Path, sauvegarde: Optional[SessionSauvegarde] = None) -> None:
+    """Analyse recursivement le dossier et supprime doublons et fichiers vides.
+
+    Avec une session de sauvegarde, chaque fichier est enregistre dans le depot
+    avant suppression (un doublon n'y occupe pas de place supplementaire) ; un
+    fichier qui n'a pas pu etre sauvegarde est conserve.
+    """
     for chemin in racine.rglob("*"):
-        if chemin.is_dir() and chemin.name in DOSSIERS_EXCLUS:
+        if any(partie in DOSSIERS_EXCLUS for partie in chemin.relative_to(racine).parts[:-1]):
             continue
         if chemin.is_file():
             try:
                 if SUPPRIMER_VIDES and chemin.stat().st_size == 0:
+                    if sauvegarde and sauvegarde.ajouter(chemin) is None:
+                        continue
                     chemin.unlink()
                     fichiers_vides.append(chemin)
                     continue
@@ -63,6 +71,8 @@ def nettoyer_dossier(racine: Path) -> None:
                 hash_val = calculer_hash(chemin)
                 if hash_val:
                     if hash_val in hash_index:
+                        if sauvegarde and sauvegarde.ajouter(chemin, sha256=hash_val) is None:
+                            continue
                         chemin.unlink()
                         fichiers_doublons.append(chemin)
                     else:
@@ -106,7 +116,8 @@ def lancer_nettoyage(chemin_base: Optional[Path] = None) -> None:
     """Fonction à appeler depuis un autre script pour lancer le nettoyage."""
     racine = chemin_base or Path(__file__).parent.resolve()
     logging.info(f"\n Lancement du nettoyage dans : {racine}")
-    nettoyer_dossier(racine)
+    with depot().session("luxuria_deduplicator") as sauvegarde:
+        nettoyer_dossier(racine, sauvegarde)
     afficher_resultats()
 
 # === Fonction main pour execution directe
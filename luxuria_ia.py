@@ -3,10 +3,15 @@
 
 from flask import Flask, request, render_template_string
 from pathlib import Path
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from datetime import date, datetime, timedelta
+from collections import deque
+from bisect import bisect_left
 import json
+import time
 import logging
+import tempfile
+import threading
 import colorama
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
 
@@ -60,6 +65,174 @@ def sauvegarder_json(path: Path, data: Dict[str, Any]) -> None:
     except OSError as e:
         log(f"[ERREUR] Impossible d'écrire dans {path.name} : {e}")
 
+# === Index des clés d'accès
+STATUTS_ACTIFS = ("actif", "renouvele")
+SANS_EXPIRATION = "9999-12-31"
+
+class IndexCles:
+    """Clés actives triées par identifiant, reconstruites quand le fichier change.
+
+    Les clés d'un client partagent le préfixe key_<client> et occupent donc une
+    plage contiguë de la liste triée, trouvée par dichotomie. Un arbre de
+    segments donne l'expiration la plus lointaine de cette plage : la
+    vérification d'accès est en O(log n), sans relire le fichier.
+    """
+
+    def __init__(self, chemin: Path = KEYS_PATH):
+        self.chemin = chemin
+        self.verrou = threading.Lock()
+        # (signature du fichier, identifiants triés, arbre des expirations)
+        self.etat: Tuple[Any, List[str], List[str]] = (False, [], [])
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            infos = self.chemin.stat()
+        except OSError:
+            return None
+        return infos.st_size, infos.st_mtime_ns
+
+    def actualiser(self) -> Tuple[Any, List[str], List[str]]:
+        signature = self._signature()
+        if self.etat[0] == signature:
+            return self.etat
+        with self.verrou:
+            if self.etat[0] != signature:
+                actives = sorted(
+                    (cle, str(infos.get("expiration") or SANS_EXPIRATION)[:10])
+                    for cle, infos in charger_json(self.chemin).items()
+                    if isinstance(infos, dict) and infos.get("statut") in STATUTS_ACTIFS
+                )
+                n = len(actives)
+                arbre = [""] * n + [expiration for _, expiration in actives]
+                for i in range(n - 1, 0, -1):
+                    arbre[i] = max(arbre[2 * i], arbre[2 * i + 1])
+                # Un seul tuple remplacé : les lecteurs concurrents voient l'ancien ou le nouvel index
+                self.etat = (signature, [cle for cle, _ in actives], arbre)
+            return self.etat
+
+    def invalider(self) -> None:
+        self.etat = (False, [], [])
+
+    @staticmethod
+    def _plage(cles: List[str], prefixe: str) -> Tuple[int, int]:
+        debut = bisect_left(cles, prefixe)
+        return debut, bisect_left(cles, prefixe + "\U0010ffff", debut)
+
+    @staticmethod
+    def _exacte(cles: List[str], cle: str) -> List[int]:
+        position = bisect_left(cles, cle)
+        return [position] if position < len(cles) and cles[position] == cle else []
+
+    def cles_actives(self, client_id: str) -> List[Tuple[str, str]]:
+        """(identifiant, expiration) des clés actives non expirées du client.
+
+        Seules key_<client_id> et key_<client_id>_* sont retenues : la liste est
+        affichée au client, elle ne doit pas contenir les clés d'un autre
+        client dont l'identifiant commence pareil (key_<client_id>2...).
+        """
+        _, cles, arbre = self.actualiser()
+        cle = f"key_{client_id}"
+        n, aujourd_hui = len(cles), date.today().isoformat()
+        positions = self._exacte(cles, cle)
+        positions.extend(range(*self._plage(cles, cle + "_")))
+        return [(cles[i], arbre[n + i]) for i in positions if arbre[n + i] >= aujourd_hui]
+
+    def expiration(self, client_id: str) -> Optional[str]:
+        """Expiration la plus lointaine des clés actives du client (None : aucune).
+
+        Mêmes clés que cles_actives : key_<client_id> et key_<client_id>_*,
+        jamais celles d'un client dont l'identifiant commence pareil.
+        """
+        _, cles, arbre = self.actualiser()
+        n = len(cles)
+        cle = f"key_{client_id}"
+        meilleure = max((arbre[n + i] for i in self._exacte(cles, cle)), default="")
+        debut, fin = (borne + n for borne in self._plage(cles, cle + "_"))
+        while debut < fin:
+            if debut & 1:
+                meilleure = max(meilleure, arbre[debut])
+                debut += 1
+            if fin & 1:
+                fin -= 1
+                meilleure = max(meilleure, arbre[fin])
+            debut >>= 1
+            fin >>= 1
+        return meilleure or None
+
+INDEX_CLES = IndexCles()
+
+# === Vues précalculées de l'espace client
+FACTURES_RECENTES = 50
+
+class VuesClients:
+    """Profil et factures récentes de chaque client, prêts à être affichés.
+
+    Les écritures de clients.json et factures.json passent par cette classe,
+    qui met à jour la vue du seul client concerné. Une modification faite
+    ailleurs (taille ou date des fichiers) provoque une reconstruction complète.
+    """
+
+    def __init__(self, clients: Path = CLIENTS_PATH, factures: Path = FACTURES_PATH):
+        self.chemins = (clients, factures)
+        self.verrou = threading.RLock()
+        # (signature des fichiers, profils par client, factures récentes par client)
+        self.etat: Tuple[Any, Dict[str, Dict], Dict[str, deque]] = (False, {}, {})
+
+    def _signature(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        signature = []
+        for chemin in self.chemins:
+            try:
+                infos = chemin.stat()
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((infos.st_size, infos.st_mtime_ns))
+        return tuple(signature)
+
+    def actualiser(self) -> Tuple[Any, Dict[str, Dict], Dict[str, deque]]:
+        signature = self._signature()
+        if self.etat[0] == signature:
+            return self.etat
+        with self.verrou:
+            if self.etat[0] != signature:
+                factures: Dict[str, deque] = {}
+                for facture in charger_json(self.chemins[1]).get("factures", []):
+                    client = facture.get("client")
+                    factures.setdefault(client, deque(maxlen=FACTURES_RECENTES)).append(facture)
+                self.etat = (signature, charger_json(self.chemins[0]), factures)
+            return self.etat
+
+    def _ecrire(self, chemin: Path, data: Dict[str, Any], mise_a_jour: Callable[[], None]) -> None:
+        with self.verrou:
+            a_jour = self.etat[0] == self._signature()
+            sauvegarder_json(chemin, data)
+            if a_jour:
+                mise_a_jour()
+                self.etat = (self._signature(),) + self.etat[1:]
+            else:
+                self.etat = (False, {}, {})
+
+    def enregistrer_client(self, identifiant: str, clients: Dict[str, Any]) -> None:
+        """Écrit clients.json et met à jour le profil du client."""
+        def mise_a_jour():
+            self.etat[1][identifiant] = clients[identifiant]
+        self._ecrire(self.chemins[0], clients, mise_a_jour)
+
+    def enregistrer_facture(self, facture: Dict[str, Any], data: Dict[str, Any]) -> None:
+        """Écrit factures.json (qui contient déjà la facture) et l'ajoute à la vue du client."""
+        def mise_a_jour():
+            self.etat[2].setdefault(facture["client"], deque(maxlen=FACTURES_RECENTES)).append(facture)
+        self._ecrire(self.chemins[1], data, mise_a_jour)
+
+    def vue(self, client_id: str) -> Optional[Dict[str, Any]]:
+        _, profils, factures = self.actualiser()
+        profil = profils.get(client_id)
+        if profil is None:
+            return None
+        return {"profil": profil, "factures": list(factures.get(client_id, ()))}
+
+VUES_CLIENTS = VuesClients()
+
 # === Fonctions métier
 def ajouter_client(nom: str, email: str, role: str, localisation: str):
     identifiant = f"{nom.strip().lower().replace(' ', '_')}_{role.lower()}"
@@ -72,7 +245,7 @@ def ajouter_client(nom: str, email: str, role: str, localisation: str):
         "date_acces": datetime.now().isoformat(),
         "statut": "actif"
     }
-    sauvegarder_json(CLIENTS_PATH, clients)
+    VUES_CLIENTS.enregistrer_client(identifiant, clients)
     log(f"[CLIENT] Ajout : {nom} ({role})")
     return identifiant
 
@@ -87,6 +260,7 @@ def ajouter_cle(nom: str, statut: str = "actif", expiration: Optional[str] = Non
         "date_creation": datetime.now().isoformat()
     }
     sauvegarder_json(KEYS_PATH, keys)
+    INDEX_CLES.invalider()
     log(f"[ACCES] Clé ajoutée : {nom} (expire le {expiration})")
 
 def generer_facture(nom: str, produit: str, montant: float = 0.0, statut: str = "gratuit"):
@@ -102,15 +276,46 @@ def generer_facture(nom: str, produit: str, montant: float = 0.0, statut: str =
     factures.append(facture)
     data["factures"] = factures
     data["meta"] = {"dernier_update": datetime.now().isoformat()}
-    sauvegarder_json(FACTURES_PATH, data)
+    VUES_CLIENTS.enregistrer_facture(facture, data)
     log(f"[FACTURE] Générée : {nom} / {produit} ({statut})")
 
 def client_a_acces(client_id: str) -> bool:
-    keys = charger_json(KEYS_PATH)
-    for k, v in keys.items():
-        if k.startswith(f"key_{client_id}") and v.get("statut") in ["actif", "renouvele"]:
-            return True
-    return False
+    """True si le client a une clé active non expirée (l'expiration est incluse)."""
+    expiration = INDEX_CLES.expiration(client_id)
+    return expiration is not None and expiration >= date.today().isoformat()
+
+def benchmark_acces(nb_cles: int = 100_000, nb_requetes: int = 10_000) -> Dict[str, float]:
+    """Compare le parcours du fichier de clés à l'index, par vérification d'accès."""
+    with tempfile.TemporaryDirectory() as tmp:
+        chemin = Path(tmp) / "luxuria_keys.json"
+        expiration = (date.today() + timedelta(days=30)).isoformat()
+        sauvegarder_json(chemin, {
+            f"key_client_{i}": {"nom": f"client {i}", "expiration": expiration,
+                                "statut": "actif" if i % 3 else "revoque"}
+            for i in range(nb_cles)
+        })
+        clients = [f"client_{(i * 7919) % nb_cles}" for i in range(nb_requetes)]
+        resultats: Dict[str, float] = {"cles": nb_cles}
+
+        debut = time.perf_counter()
+        for client_id in clients[:10]:
+            keys = charger_json(chemin)
+            attendu = any(k.startswith(f"key_{client_id}") and v.get("statut") in STATUTS_ACTIFS
+                          for k, v in keys.items())
+        resultats["parcours_ms"] = round((time.perf_counter() - debut) * 100, 3)
+
+        index = IndexCles(chemin)
+        debut = time.perf_counter()
+        index.actualiser()
+        resultats["construction_ms"] = round((time.perf_counter() - debut) * 1000, 1)
+        debut = time.perf_counter()
+        for client_id in clients:
+            index.expiration(client_id)
+        resultats["index_ms"] = round((time.perf_counter() - debut) * 1000 / nb_requetes, 4)
+        if (index.expiration(clients[9]) is not None) != attendu:
+            raise RuntimeError("L'index des clés diverge du parcours du fichier")
+    log(f"[BENCHMARK] Accès clients : {resultats}")
+    return resultats
 
 def afficher_galerie(path: Path) -> str:
     data = charger_json(path)
@@ -138,33 +343,35 @@ def accueil():
     </form>
     """)
 
+# Compilé une seule fois ; les données du client sont échappées au rendu
+TEMPLATE_ESPACE_CLIENT = app.jinja_env.from_string("""
+    <h2>Espace client : {{ client.nom }}</h2>
+    <h3>Factures</h3><ul>
+    {%- for f in factures %}
+        <li>{{ f.produit | default("Inconnu") }} - {{ f.montant | default(0.0) }} EUR - {{ f.statut | default("inconnu") }}</li>
+    {%- endfor %}
+    </ul>
+    <h3>Clés actives</h3><ul>
+    {%- for cle, expiration in cles %}
+        <li>{{ cle }} - expire le {{ expiration }}</li>
+    {%- endfor %}
+    </ul>
+    <h3>Galerie privée</h3>{{ galerie_privee | safe }}
+    <h3>Galerie globale</h3>{{ galerie_globale | safe }}
+    """)
+
 @app.route("/espace-client", methods=["POST"])
 def espace_client():
     cle = request.form.get("cle", "").strip()
-    clients = charger_json(CLIENTS_PATH)
-    client = clients.get(cle)
-    if not client:
+    vue = VUES_CLIENTS.vue(cle)
+    if vue is None:
         return "<h3>Clé invalide</h3><p>Aucun client trouvé.</p>"
 
-    factures = charger_json(FACTURES_PATH).get("factures", [])
+    cles = INDEX_CLES.cles_actives(cle)
     galerie_privee = afficher_galerie(CLIENTS_GALLERY / f"{cle}.json")
     galerie_globale = afficher_galerie(GALLERY_GLOBAL) if client_a_acces(cle) else "<p>Accès refusé.</p>"
-
-    html_factures = "<ul>"
-    for f in factures:
-        if f.get("client") == cle:
-            produit = f.get("produit", "Inconnu")
-            montant = f.get("montant", 0.0)
-            statut = f.get("statut", "inconnu")
-            html_factures += f"<li>{produit} - {montant} EUR - {statut}</li>"
-    html_factures += "</ul>"
-
-    return render_template_string(f"""
-    <h2>Espace client : {client['nom']}</h2>
-    <h3>Factures</h3>{html_factures}
-    <h3>Galerie privée</h3>{galerie_privee}
-    <h3>Galerie globale</h3>{galerie_globale}
-    """)
+    return TEMPLATE_ESPACE_CLIENT.render(client=vue["profil"], factures=vue["factures"], cles=cles,
+                                         galerie_privee=galerie_privee, galerie_globale=galerie_globale)
 
 # === Orchestration centrale
 def run():
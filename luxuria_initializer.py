@@ -4,14 +4,18 @@
 import os
 import sys
 import re
+import json
 import shutil
+import tempfile
 import importlib
 import traceback
+import subprocess
 import logging
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
+from sauvegarde_contenu import depot
 
 # === Base directory
 BASE_DIR = Path(__file__).resolve().parent
@@ -19,9 +23,12 @@ sys.path.insert(0, str(BASE_DIR))
 
 # === Configuration
 DRY_RUN = False
+PARALLEL_IMPORTS = False  # True = each module imported in its own interpreter, with timings
 EXCLUDED_DIRS = {'.venv', '__pycache__', 'venv', '.vscode'}
 BACKUP_DIR = BASE_DIR / "backups"
 BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+IMPORT_TIMEOUT = 60
+IMPORT_WORKERS = os.cpu_count() or 2
 
 # === Logging
 LOG_FILE = BACKUP_DIR / "initializer.log"
@@ -37,96 +44,141 @@ pattern_import = re.compile(r'from\s+LuxuriaProject(\.[\w.]+)?\s+import')
 pattern_sys_path = re.compile(r'sys\.path\.append\([^)]+\)')
 pattern_file_access = re.compile(r'(open|read_csv|read_excel|load|save|to_csv|to_excel)\((["\'])(.+?)(["\'])')
 
+# Files written (or that would be written in DRY_RUN) during the current scan
+WRITE_STATS = {"files": 0, "bytes": 0}
+
+# Backup session of the running scan (one manifest per scan in the shared store)
+BACKUP_SESSION = None
+
 # === Utilities
-def create_backup(filepath: Path) -> Path:
-    rel_path = filepath.relative_to(BASE_DIR)
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup_path = BACKUP_DIR / f"{rel_path}.{timestamp}.bak"
-    backup_path.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(filepath, backup_path)
-    logging.info(f"Backup created: {backup_path}")
-    return backup_path
+def create_backup(filepath: Path) -> str:
+    """Store the file in the content-addressed backup store; return its digest."""
+    if BACKUP_SESSION is not None:
+        digest = BACKUP_SESSION.ajouter(filepath)
+    else:
+        with depot().session("luxuria_initializer") as session:
+            digest = session.ajouter(filepath)
+    logging.info(f"Backup created: {filepath} ({digest})")
+    return digest
 
 def clean_imports(line: str) -> str:
     return re.sub(r'from\s+LuxuriaProject\.', 'from ', line)
 
-def fix_file(filepath: Path) -> bool:
+def write_if_changed(filepath: Path, original: bytes, content: str) -> bool:
+    """Atomically replace the file if its content changes; return True if it (would have) changed."""
+    data = content.encode("utf-8", errors="surrogateescape")
+    if data == original:
+        return False
+    WRITE_STATS["files"] += 1
+    WRITE_STATS["bytes"] += len(data)
+    if DRY_RUN:
+        return True
+    create_backup(filepath)
+    fd, tmp_name = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
     try:
-        content = filepath.read_text(encoding="utf-8").splitlines(keepends=True)
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        shutil.copymode(filepath, tmp_name)
+        os.replace(tmp_name, filepath)
     except OSError as e:
-        logging.warning(f"Read error: {filepath}\n{e}")
+        logging.error(f"Write error: {filepath}\n{e}")
+        Path(tmp_name).unlink(missing_ok=True)
         return False
+    return True
 
-    modified = False
-    new_content = []
+def read_source(filepath: Path) -> bytes | None:
+    try:
+        return filepath.read_bytes()
+    except OSError as e:
+        logging.warning(f"Read error: {filepath}\n{e}")
+        return None
 
-    for line in content:
+def decode_source(original: bytes) -> str:
+    # surrogateescape: undecodable bytes survive a rewrite unchanged
+    return original.decode("utf-8", errors="surrogateescape")
+
+def fix_content(content: str, filepath: Path) -> str:
+    new_content = []
+    for line in content.splitlines(keepends=True):
         if pattern_import.search(line):
             line = clean_imports(line)
-            modified = True
         elif pattern_sys_path.search(line):
             logging.info(f"Removed sys.path from {filepath}")
-            modified = True
             continue
         new_content.append(line)
+    return "".join(new_content)
 
-    if modified:
-        logging.info(f"Modified: {filepath}")
-        if not DRY_RUN:
-            create_backup(filepath)
-            try:
-                filepath.write_text("".join(new_content), encoding="utf-8")
-            except OSError as e:
-                logging.error(f"Write error: {filepath}\n{e}")
-        return True
-    return False
-
-def inject_base_path(filepath: Path) -> bool:
-    try:
-        content = filepath.read_text(encoding="utf-8", errors="replace")
-    except OSError as e:
-        logging.warning(f"Read error: {filepath}\n{e}")
-        return False
-
+def inject_content(content: str, filepath: Path) -> str:
+    """Rewrite file accesses to BASE_PATH in one pass; unchanged if nothing to rewrite."""
     if 'BASE_PATH' in content:
         logging.info(f"{filepath.name} already configured")
-        return False
+        return content
 
-    matches = list(re.finditer(pattern_file_access, content))
-    if not matches:
-        logging.info(f"No path detected in {filepath.name}")
-        return False
+    replaced = 0
 
-    base_code = 'from pathlib import Path\nBASE_PATH = Path(__file__).resolve().parent\n'
-    content = base_code + content
-
-    for match in matches:
+    def rewrite(match: re.Match) -> str:
+        nonlocal replaced
         old_path = match.group(3)
         if '/' not in old_path and '\\' not in old_path:
-            continue
-        new_call = f'{match.group(1)}(BASE_PATH / "{old_path}"'
-        content = content.replace(match.group(0), new_call)
+            return match.group(0)
+        replaced += 1
+        return f'{match.group(1)}(BASE_PATH / "{old_path}"'
+
+    new_content = pattern_file_access.sub(rewrite, content)
+    if not replaced:
+        logging.info(f"No path detected in {filepath.name}")
+        return content
 
     logging.info(f"Injected BASE_PATH in {filepath.name}")
-    if not DRY_RUN:
-        create_backup(filepath)
-        try:
-            filepath.write_text(content, encoding="utf-8")
-        except OSError as e:
-            logging.error(f"Write error: {filepath}\n{e}")
-    return True
+    base_code = 'from pathlib import Path\nBASE_PATH = Path(__file__).resolve().parent\n'
+    return base_code + new_content
+
+def fix_file(filepath: Path) -> bool:
+    original = read_source(filepath)
+    if original is None:
+        return False
+    content = fix_content(decode_source(original), filepath)
+    if write_if_changed(filepath, original, content):
+        logging.info(f"Modified: {filepath}")
+        return True
+    return False
+
+def inject_base_path(filepath: Path) -> bool:
+    original = read_source(filepath)
+    if original is None:
+        return False
+    content = inject_content(decode_source(original), filepath)
+    return write_if_changed(filepath, original, content)
 
 def scan_and_fix(directory: Path) -> int:
+    """Fix imports and inject BASE_PATH: one read and at most one write per file."""
+    global BACKUP_SESSION
     logging.info(f"Scanning: {directory}")
+    WRITE_STATS.update(files=0, bytes=0)
     count = 0
-    for root, dirs, files in os.walk(directory):
-        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-        for file in files:
-            if file.endswith('.py'):
-                path = Path(root) / file
-                if fix_file(path):
-                    count += 1
-                inject_base_path(path)
+    BACKUP_SESSION = depot().session("luxuria_initializer")
+    try:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+            for file in files:
+                if file.endswith('.py'):
+                    path = Path(root) / file
+                    original = read_source(path)
+                    if original is None:
+                        continue
+                    content = decode_source(original)
+                    content = inject_content(fix_content(content, path), path)
+                    if write_if_changed(path, original, content):
+                        logging.info(f"Modified: {path}")
+                        count += 1
+    finally:
+        BACKUP_SESSION.fermer()
+        BACKUP_SESSION = None
+    if DRY_RUN:
+        logging.info(f"Dry run: {WRITE_STATS['files']} file(s) would change, "
+                     f"{WRITE_STATS['bytes']} bytes would be written")
     logging.info(f"Files modified: {count}")
     return count
 
@@ -138,22 +190,85 @@ def find_modules(folder: Path) -> List[str]:
             modules.append(".".join(rel.parts))
     return modules
 
-def test_internal_modules() -> int:
-    logging.info("Testing internal modules")
-    tested = 0
+def list_internal_modules() -> List[str]:
+    modules = []
     for folder in BASE_DIR.iterdir():
         if folder.is_dir() and folder.name not in EXCLUDED_DIRS:
-            modules = find_modules(folder)
-            for module in modules:
-                try:
-                    importlib.import_module(module)
-                    logging.info(f"Import OK: {module}")
-                except ModuleNotFoundError:
-                    logging.warning(f"Module not found: {module}")
-                except Exception as e:
-                    logging.error(f"Import error {module}: {e}")
-                    traceback.print_exc()
-                tested += 1
+            modules.extend(find_modules(folder))
+    return modules
+
+# Run in a fresh interpreter: import one module, report time and error as JSON
+IMPORT_PROBE = """
+import sys, json, time, importlib, traceback
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+result = {"status": "OK", "error": None}
+try:
+    importlib.import_module(sys.argv[2])
+except ModuleNotFoundError as e:
+    result = {"status": "NOT_FOUND", "error": str(e)}
+except BaseException as e:
+    result = {"status": "ERROR", "error": f"{type(e).__name__}: {e}", "trace": traceback.format_exc()}
+result["duration_ms"] = (time.perf_counter() - start) * 1000
+print("\\n" + json.dumps(result))
+"""
+
+def import_module_isolated(module: str, timeout: int = IMPORT_TIMEOUT) -> dict:
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE, str(BASE_DIR), module],
+            stdin=subprocess.DEVNULL, capture_output=True, text=True,
+            encoding="utf-8", errors="replace", cwd=BASE_DIR, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"module": module, "status": "TIMEOUT", "error": f"> {timeout} s", "duration_ms": timeout * 1000.0}
+    lines = proc.stdout.strip().splitlines()
+    try:
+        result = json.loads(lines[-1])
+    except (IndexError, json.JSONDecodeError):
+        result = {"status": "ERROR", "error": f"Exit code {proc.returncode}", "duration_ms": 0.0}
+    result["module"] = module
+    return result
+
+def profile_imports(modules: List[str], max_workers: int = IMPORT_WORKERS,
+                    timeout: int = IMPORT_TIMEOUT) -> List[dict]:
+    """Import each module in its own interpreter (in parallel); slowest first."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda m: import_module_isolated(m, timeout), modules))
+    return sorted(results, key=lambda r: r["duration_ms"], reverse=True)
+
+def log_import_table(results: List[dict]) -> None:
+    logging.info(f"{'Module':<45} {'Time (ms)':>10}  Status")
+    for r in results:
+        logging.info(f"{r['module']:<45} {r['duration_ms']:>10.1f}  {r['status']}")
+        if r["status"] == "ERROR":
+            logging.error(f"Import error {r['module']}: {r['error']}")
+            if r.get("trace"):
+                logging.error(r["trace"])
+        elif r["status"] == "NOT_FOUND":
+            logging.warning(f"Module not found: {r['module']}")
+
+def test_internal_modules(parallel: Optional[bool] = None) -> int:
+    """Import every internal module; parallel defaults to PARALLEL_IMPORTS at call time."""
+    if parallel is None:
+        parallel = PARALLEL_IMPORTS
+    logging.info("Testing internal modules")
+    modules = list_internal_modules()
+    if parallel:
+        log_import_table(profile_imports(modules))
+        return len(modules)
+
+    tested = 0
+    for module in modules:
+        try:
+            importlib.import_module(module)
+            logging.info(f"Import OK: {module}")
+        except ModuleNotFoundError:
+            logging.warning(f"Module not found: {module}")
+        except Exception as e:
+            logging.error(f"Import error {module}: {e}")
+            traceback.print_exc()
+        tested += 1
     return tested
 
 def check_structure() -> bool:
@@ -2,7 +2,6 @@
 """Module d'outils de modification Luxuria Studio"""
 
 import os
-import shutil
 import json
 import hashlib
 import subprocess
@@ -11,6 +10,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
+from sauvegarde_contenu import DepotSauvegardes, SessionSauvegarde
+from audit_encodage import auditer_fichier, decrire
 
 # === Logger global
 logging.basicConfig(level=logging.INFO, format="[%Y-%m-%d %H:%M:%S] %(message)s")
@@ -24,12 +25,10 @@ def log(message: str, log_file: Optional[Path] = None) -> None:
         with log_file.open("a", encoding="utf-8") as f:
             f.write(full_message + "\n")
 
-# === Backup
-def backup_file(file_path: Path, backup_dir: Path, log_file: Optional[Path] = None) -> None:
-    backup_dir.mkdir(parents=True, exist_ok=True)
-    backup_path = backup_dir / file_path.name
-    shutil.copy2(file_path, backup_path)
-    log(f"Backup created: {backup_path}", log_file)
+# === Backup (content-addressed store: identical files are stored once)
+def backup_file(file_path: Path, session: SessionSauvegarde, log_file: Optional[Path] = None) -> None:
+    digest = session.ajouter(file_path)
+    log(f"Backup created: {file_path} ({digest})", log_file)
 
 # === Unicode cleanup
 def clean_unicode_file(file_path: Path, log_file: Optional[Path] = None) -> None:
@@ -71,14 +70,18 @@ def check_integrity(file_path: Path, sig_path: Path) -> str:
     current_hash = hashlib.sha256(file_path.read_bytes()).hexdigest()
     return "Valid" if current_hash == sig["hash"] else "Tampered"
 
-# === UTF-8 audit
+# === UTF-8 audit (streamed: constant memory, offset of the first invalid byte)
 def audit_utf8(file_list: List[Path], log_file: Optional[Path] = None) -> None:
     for f in file_list:
         try:
-            f.read_text(encoding="utf-8")
+            result = auditer_fichier(f)
+        except OSError as e:
+            log(f"UTF-8 ERROR: {f} ({e})", log_file)
+            continue
+        if result["utf8"]:
             log(f"UTF-8 OK: {f}", log_file)
-        except UnicodeDecodeError:
-            log(f"UTF-8 ERROR: {f}", log_file)
+        else:
+            log(f"UTF-8 ERROR: {f} - {decrire(result)}", log_file)
 
 # === Requirements
 def extract_modules(req_path: Path) -> List[str]:
@@ -132,12 +135,17 @@ def run_audit(
     if module_prefix:
         py_files = [f for f in py_files if module_prefix in f.name]
 
-    for f in py_files:
-        if backup_dir:
-            backup_file(f, Path(backup_dir), log_file)
-        clean_unicode_file(f, log_file)
-        if sig_path:
-            update_signature(f, Path(sig_path), author="automated", log_file=log_file)
+    session = DepotSauvegardes(Path(backup_dir) / "depot").session("luxuria_modtools") if backup_dir else None
+    try:
+        for f in py_files:
+            if session:
+                backup_file(f, session, log_file)
+            clean_unicode_file(f, log_file)
+            if sig_path:
+                update_signature(f, Path(sig_path), author="automated", log_file=log_file)
+    finally:
+        if session:
+            session.fermer()
 
     audit_utf8(py_files, log_file)
 
@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 """Organisateur de modules Luxuria Studio"""
 
+import json
 import shutil
 import logging
 import hashlib
 import unicodedata
 from pathlib import Path
-from collections import Counter
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
+from classificateur import charger_classificateur
 
 # === Configuration du logging
 LOG_PATH = "organizer.log"
@@ -25,8 +26,10 @@ BASE_DIR = Path(__file__).resolve().parent
 SOURCE_DIR = BASE_DIR / "luxuria_scripts_temp"
 MODULE_DIR = BASE_DIR / "luxuria_modules"
 MODULE_DIR.mkdir(parents=True, exist_ok=True)
+INDEX_PATH = MODULE_DIR / ".index_contenu.json"
+REGLES_PATH = BASE_DIR / "regles_classification.json"  # facultatif, remplace SUBMODULES
 
-# === Sous-modules et mots-clés associés
+# === Sous-modules et mots-clés associés (règles par défaut)
 SUBMODULES = {
     "manager": ["lancer_module", "LuxuriaManager", "btn_web_client"],
     "admin": ["generer_rapport_json", "predire_chiffre_affaires", "generer_pdf_facturation"],
@@ -35,24 +38,82 @@ SUBMODULES = {
     "utils": ["log_activite", "mois_valide", "nettoyer_dossier"]
 }
 
+CLASSIFICATEUR = charger_classificateur(REGLES_PATH, SUBMODULES)
+
 # === Création des sous-dossiers
-for name in SUBMODULES:
+for name in CLASSIFICATEUR.ordre + [CLASSIFICATEUR.defaut]:
     (MODULE_DIR / name).mkdir(parents=True, exist_ok=True)
 
 # === Identification du module par pondération
 def identifier_module(contenu: str) -> str:
-    contenu_lower = contenu.lower()
-    scores = Counter()
-    for module, mots in SUBMODULES.items():
-        for mot in mots:
-            if mot.lower() in contenu_lower:
-                scores[module] += 1
-    return scores.most_common(1)[0][0] if scores else "utils"
+    return CLASSIFICATEUR.classer_texte(contenu)
 
 # === Calcul du hash SHA-256
 def hash_fichier(path: Path) -> str:
     return hashlib.sha256(path.read_bytes()).hexdigest()
 
+# === Index des fichiers déjà rangés
+class IndexDestination:
+    """Index persistant (taille, mtime, SHA-256) des fichiers de MODULE_DIR.
+
+    La taille sert de premier filtre : un fichier entrant n'est haché que si un
+    fichier de même taille existe déjà dans le sous-module, et les fichiers
+    existants ne sont hachés qu'une fois (puis à chaque modification).
+    """
+
+    def __init__(self, racine: Path = MODULE_DIR, chemin: Path = INDEX_PATH):
+        self.racine = racine
+        self.chemin = chemin
+        try:
+            self.entrees = json.loads(chemin.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            self.entrees = {}
+        self.par_taille: dict[str, dict[int, list[str]]] = {}
+
+    def _synchroniser(self, module: str) -> dict[int, list[str]]:
+        """Aligne l'index d'un sous-module sur le disque (stat uniquement, aucune lecture)."""
+        if module in self.par_taille:
+            return self.par_taille[module]
+        anciens = self.entrees.get(module, {})
+        entrees = {}
+        for fichier in (self.racine / module).glob("*.py"):
+            infos = fichier.stat()
+            entree = anciens.get(fichier.name)
+            if not entree or entree["taille"] != infos.st_size or entree["mtime_ns"] != infos.st_mtime_ns:
+                entree = {"taille": infos.st_size, "mtime_ns": infos.st_mtime_ns, "sha256": None}
+            entrees[fichier.name] = entree
+        self.entrees[module] = entrees
+        par_taille: dict[int, list[str]] = {}
+        for nom, entree in entrees.items():
+            par_taille.setdefault(entree["taille"], []).append(nom)
+        self.par_taille[module] = par_taille
+        return par_taille
+
+    def chercher_doublon(self, module: str, fichier: Path) -> str | None:
+        """Nom du fichier identique déjà présent dans le sous-module, sinon None."""
+        candidats = self._synchroniser(module).get(fichier.stat().st_size)
+        if not candidats:
+            return None
+        fichier_hash = hash_fichier(fichier)
+        for nom in candidats:
+            entree = self.entrees[module][nom]
+            if entree["sha256"] is None:
+                entree["sha256"] = hash_fichier(self.racine / module / nom)
+            if entree["sha256"] == fichier_hash:
+                return nom
+        return None
+
+    def ajouter(self, module: str, destination: Path) -> None:
+        par_taille = self._synchroniser(module)
+        infos = destination.stat()
+        self.entrees[module][destination.name] = {
+            "taille": infos.st_size, "mtime_ns": infos.st_mtime_ns, "sha256": None
+        }
+        par_taille.setdefault(infos.st_size, []).append(destination.name)
+
+    def sauvegarder(self) -> None:
+        self.chemin.write_text(json.dumps(self.entrees), encoding="utf-8")
+
 # === Nettoyage des noms de fichiers
 def nettoyer_nom(nom: str) -> str:
     nom = unicodedata.normalize('NFKD', nom).encode('ascii', 'ignore').decode('ascii')
@@ -103,21 +164,16 @@ def organiser_scripts() -> None:
         logging.info("Aucun fichier .py trouvé dans le dossier source.")
         return
 
+    index = IndexDestination()
     for fichier in fichiers:
         try:
-            contenu = fichier.read_text(encoding="utf-8")
-            module = identifier_module(contenu)
+            module = CLASSIFICATEUR.classer_fichier(fichier)
             destination_dir = MODULE_DIR / module
-            fichier_hash = hash_fichier(fichier)
-
-            doublon = False
-            for existant in destination_dir.glob("*.py"):
-                if hash_fichier(existant) == fichier_hash:
-                    logging.info(f"{fichier.name} déjà présent dans {module}/ (doublon détecté)")
-                    doublon = True
-                    break
 
-            if not doublon:
+            doublon = index.chercher_doublon(module, fichier)
+            if doublon:
+                logging.info(f"{fichier.name} déjà présent dans {module}/ (doublon détecté)")
+            else:
                 destination = destination_dir / fichier.name
                 if destination.exists():
                     base = fichier.stem
@@ -126,11 +182,13 @@ def organiser_scripts() -> None:
                         i += 1
                     destination = destination_dir / f"{base}_{i}.py"
                 shutil.copy2(fichier, destination)
+                index.ajouter(module, destination)
                 logging.info(f"{fichier.name} → {module}/")
 
             fichier.unlink()
         except Exception as e:
             logging.error(f"Erreur avec {fichier.name} : {e}")
+    index.sauvegarder()
 
 # === Fonction principale
 def main():
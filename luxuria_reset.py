@@ -5,6 +5,7 @@ import shutil
 import logging
 from pathlib import Path
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
+from sauvegarde_contenu import depot
 
 # === Configuration du logging
 logging.basicConfig(
@@ -17,11 +18,16 @@ BASE_DIR = Path(__file__).resolve().parent
 MODULE_DIR = BASE_DIR / "modules"
 LOG_DIR = BASE_DIR / "logs"
 
-# === Nettoyage des anciens dossiers
-for path in [MODULE_DIR, LOG_DIR]:
-    if path.exists():
-        shutil.rmtree(path)
-        logging.info(f"Dossier supprimé : {path}")
+# === Sauvegarde puis nettoyage des anciens dossiers
+with depot().session("luxuria_reset") as sauvegarde:
+    for path in [MODULE_DIR, LOG_DIR]:
+        if path.exists():
+            _, echecs = sauvegarde.ajouter_dossier(path)
+            if echecs:
+                logging.error(f"Dossier conservé : {path} ({len(echecs)} fichier(s) non sauvegardé(s))")
+                continue
+            shutil.rmtree(path)
+            logging.info(f"Dossier supprimé : {path} (sauvegarde {sauvegarde.identifiant})")
 
 # === Reconstruction des dossiers
 MODULE_DIR.mkdir(parents=True, exist_ok=True)
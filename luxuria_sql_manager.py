@@ -2,8 +2,13 @@
 """Luxuria SQL Manager  Desactive les appels SQL dans les scripts Python."""
 
 import re
+import time
+import random
 import logging
+import tempfile
 from pathlib import Path
+from typing import Optional
+from index_trigrammes import filtrer_fichiers
 
 # === Dossier racine du projet
 BASE_DIR = Path(__file__).resolve().parent
@@ -22,8 +27,32 @@ SQL_CALLS = [
     r'\.fetch.*\('
 ]
 
-# === Rapport des fichiers modifiés
+# === Moteur de réécriture : toutes les règles fusionnées en une alternance
+# (une seule passe par fichier, un groupe nommé par règle pour les statistiques).
+# Le préfixe commun de chaque famille est factorisé : le moteur ne teste les
+# variantes qu'après avoir trouvé "import" en début de ligne ou un ".".
+REGLES_SQL = SQL_IMPORTS + SQL_CALLS
+
+def _fusionner(prefixe: str, regles: list, decalage: int) -> str:
+    variantes = []
+    for i, pattern in enumerate(regles, start=decalage):
+        if not pattern.startswith(prefixe):
+            raise ValueError(f"Règle SQL sans préfixe commun : {pattern}")
+        variantes.append(f"(?P<r{i}>{pattern[len(prefixe):]})")
+    return f"{prefixe}(?:{'|'.join(variantes)})"
+
+MOTIF_SQL = re.compile(
+    _fusionner(r"^import\s+", SQL_IMPORTS, 0) + "|"
+    + _fusionner(r"\.", SQL_CALLS, len(SQL_IMPORTS)),
+    flags=re.MULTILINE
+)
+
+# Au moins un de ces mots est nécessaire pour qu'une règle puisse s'appliquer
+MOTS_CLES_SQL = ("sqlite3", "mysql", "psycopg2", ".execute(", ".connect(", ".cursor(", ".fetch")
+
+# === Rapport des fichiers modifiés et des remplacements par règle
 fichiers_modifies = []
+statistiques_sql = {}
 
 def nettoyer_sql(filepath: Path) -> None:
     """Commente les imports et appels SQL dans un fichier Python."""
@@ -39,36 +68,48 @@ def nettoyer_sql(filepath: Path) -> None:
         logging.warning(f"Encodage non pris en charge : {filepath}")
         return
 
-    original = contenu
-
-    for pattern in SQL_IMPORTS:
-        contenu = re.sub(
-            pattern,
-            lambda m: f"# {m.group(0)}  # SQL desactive",
-            contenu,
-            flags=re.MULTILINE
-        )
-
-    for pattern in SQL_CALLS:
-        contenu = re.sub(
-            pattern,
-            lambda m: f"# {m.group(0)}  # SQL desactive",
-            contenu,
-            flags=re.MULTILINE
-        )
-
-    if contenu != original:
+    statistiques = {}
+    contenu, nb_remplacements = reecrire_sql(contenu, statistiques)
+
+    if nb_remplacements:
         try:
             filepath.write_text(contenu, encoding="utf-8")
             fichiers_modifies.append(str(filepath))
         except OSError as e:
             logging.error(f"Erreur ecriture fichier {filepath.name} : {e}")
+            return
+        for regle, nombre in statistiques.items():
+            statistiques_sql[regle] = statistiques_sql.get(regle, 0) + nombre
+
+def reecrire_sql(contenu: str, statistiques: Optional[dict] = None) -> tuple:
+    """Commente en une passe les imports et appels SQL ; retourne (texte, nb).
+
+    Si statistiques est fourni, le nombre de remplacements par règle y est ajouté.
+    """
+    if not any(mot in contenu for mot in MOTS_CLES_SQL):
+        return contenu, 0
+
+    nb_remplacements = 0
+
+    def commenter(m: re.Match) -> str:
+        nonlocal nb_remplacements
+        nb_remplacements += 1
+        if statistiques is not None:
+            regle = REGLES_SQL[int(m.lastgroup[1:])]
+            statistiques[regle] = statistiques.get(regle, 0) + 1
+        return f"# {m.group(0)}  # SQL desactive"
+
+    return MOTIF_SQL.sub(commenter, contenu), nb_remplacements
 
 def parcourir_dossier(dossier: Path) -> None:
-    """Parcourt tous les fichiers .py du dossier et nettoie le SQL."""
-    for path in dossier.rglob("*.py"):
-        if path.resolve() != Path(__file__).resolve():
-            nettoyer_sql(path)
+    """Nettoie le SQL des fichiers .py du dossier.
+
+    L'index de trigrammes écarte les fichiers qui ne peuvent contenir aucun
+    mot-clé SQL : seuls les candidats sont lus.
+    """
+    fichiers = [p for p in dossier.rglob("*.py") if p.resolve() != Path(__file__).resolve()]
+    for path in filtrer_fichiers(fichiers, MOTS_CLES_SQL):
+        nettoyer_sql(path)
 
 def afficher_rapport() -> None:
     """Affiche les fichiers modifiés ou un message si aucun n'est touché."""
@@ -76,6 +117,10 @@ def afficher_rapport() -> None:
         logging.info(" Fichiers modifies :")
         for f in fichiers_modifies:
             logging.info(f" - {f}")
+        logging.info(" Remplacements par regle :")
+        for regle in REGLES_SQL:
+            if regle in statistiques_sql:
+                logging.info(f" - {regle} : {statistiques_sql[regle]}")
     else:
         logging.info(" Aucun fichier contenant du SQL detecte.")
 
@@ -85,3 +130,43 @@ def desactiver_sql_global() -> None:
     logging.info(" Desactivation des requetes SQL en cours...")
     parcourir_dossier(BASE_DIR)
     afficher_rapport()
+
+# === Banc d'essai
+def generer_corpus(dossier: Path, nb_fichiers: int = 10000, proportion_sql: float = 0.2) -> None:
+    """Génère un corpus synthétique de scripts, dont une partie utilise SQL."""
+    aleatoire = random.Random(42)
+    corps = "\n".join(f"def fonction_{i}(x):\n    return x * {i}\n" for i in range(40))
+    sql = (
+        "import sqlite3\n"
+        "conn = sqlite3.connect('base.db')\n"
+        "cur = conn.cursor()\n"
+        "cur.execute('SELECT 1')\n"
+        "print(cur.fetchall())\n"
+    )
+    for i in range(nb_fichiers):
+        sous_dossier = dossier / f"paquet_{i // 500}"
+        sous_dossier.mkdir(parents=True, exist_ok=True)
+        contenu = (sql if aleatoire.random() < proportion_sql else "") + corps
+        (sous_dossier / f"module_{i}.py").write_text(contenu, encoding="utf-8")
+
+def benchmark_sql(nb_fichiers: int = 10000) -> dict:
+    """Compare la passe fusionnée aux sept re.sub successifs sur un corpus synthétique."""
+    with tempfile.TemporaryDirectory() as tmp:
+        dossier = Path(tmp)
+        generer_corpus(dossier, nb_fichiers)
+        textes = [path.read_text(encoding="utf-8") for path in dossier.rglob("*.py")]
+
+    debut = time.perf_counter()
+    for contenu in textes:
+        for pattern in REGLES_SQL:
+            contenu = re.sub(pattern, lambda m: f"# {m.group(0)}  # SQL desactive", contenu, flags=re.MULTILINE)
+    sequentiel = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    for contenu in textes:
+        reecrire_sql(contenu)
+    fusionne = time.perf_counter() - debut
+
+    resultats = {"fichiers": len(textes), "sequentiel_s": round(sequentiel, 3), "fusionne_s": round(fusionne, 3)}
+    logging.info(f"Benchmark SQL : {resultats}")
+    return resultats
@@ -6,6 +6,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
+from sauvegarde_contenu import depot
 
 # === Configuration des répertoires
 BASE_DIR = Path(__file__).resolve().parent
@@ -91,6 +92,10 @@ def executer_migration(solde: float) -> None:
 # === Fonction principale
 def main() -> None:
     logging.info("Initialisation du protocole de migration Luxuria IA")
+    if ADMIN_HTML.exists():
+        # admin.html va recevoir des notifications : état d'avant migration conservé
+        with depot().session("migration_serveur") as sauvegarde:
+            sauvegarde.ajouter(ADMIN_HTML)
     solde = generer_solde()
     logging.info(f"Solde détecté : {solde:.2f} EUR")
 
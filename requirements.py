@@ -1,22 +1,41 @@
 # -*- coding: utf-8 -*-
 """Luxuria Requirements Manager — Génère un fichier requirements.txt fiable à partir des imports réels."""
 
+import os
 import re
+import json
+import time
+import threading
 import subprocess
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from urllib.request import urlopen
 from urllib.error import URLError, HTTPError
 from importlib.metadata import distributions
 
+# requests est optionnel : ce script sert justement à installer les dépendances
+try:
+    import requests
+except ImportError:
+    requests = None
+
 # === Configuration ===
 BASE_DIR = Path(__file__).resolve().parent
 REQUIREMENTS_PATH = BASE_DIR / "requirements.txt"
 EXCLUDED_MODULES = {"assistant_pdg", "main", "config", "luxuria_web"}
 DRY_RUN = False  # True = simulation sans installation
 
+# === Index des paquets (URL, ou dossier de fixtures JSON <nom>.json pour les tests)
+INDEX_URL = os.getenv("LUXURIA_PYPI_INDEX", "https://pypi.org/pypi")
+CACHE_PYPI_DIR = BASE_DIR / ".luxuria_cache" / "pypi"
+CACHE_TTL = 24 * 3600          # métadonnées trouvées
+CACHE_TTL_ABSENT = 3600        # paquets introuvables (404)
+MAX_REQUETES = 8
+TIMEOUT_REQUETE = 10
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -34,14 +53,124 @@ def est_module_standard(nom: str) -> bool:
         return (Path(stdlib_path) / nom).exists()
 
 
+# === Résolution des métadonnées PyPI (concurrente, avec cache TTL sur disque)
+class ResolveurPyPI:
+    """Récupère les métadonnées JSON des paquets, en parallèle et avec cache.
+
+    index_url peut être une URL (https://pypi.org/pypi, serveur local de test)
+    ou un dossier contenant des fixtures <nom>.json. Hors ligne, une entrée de
+    cache expirée est préférée à l'absence de réponse.
+    """
+
+    def __init__(self, index_url: str = INDEX_URL, cache_dir: Path = CACHE_PYPI_DIR,
+                 ttl: int = CACHE_TTL, max_requetes: int = MAX_REQUETES):
+        self.index_url = index_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_requetes = max_requetes
+        self._verrou = threading.Lock()
+        self._session = None
+        if requests is not None and not self._index_local():
+            self._session = requests.Session()
+            adaptateur = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_requetes)
+            self._session.mount("https://", adaptateur)
+            self._session.mount("http://", adaptateur)
+
+    def _index_local(self) -> Path | None:
+        chemin = self.index_url[len("file://"):] if self.index_url.startswith("file://") else self.index_url
+        if "://" in chemin:
+            return None
+        return Path(chemin)
+
+    # === Cache
+    def _fichier_cache(self, nom: str) -> Path:
+        return self.cache_dir / f"{nom.lower()}.json"
+
+    def _lire_cache(self, nom: str) -> dict | None:
+        try:
+            return json.loads(self._fichier_cache(nom).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _ecrire_cache(self, nom: str, metadonnees: dict | None) -> None:
+        entree = {"horodatage": time.time(), "index": self.index_url, "metadonnees": metadonnees}
+        with self._verrou:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporaire = self._fichier_cache(nom).with_suffix(f".{threading.get_ident()}.tmp")
+        temporaire.write_text(json.dumps(entree), encoding="utf-8")
+        temporaire.replace(self._fichier_cache(nom))
+
+    def _entree_valide(self, entree: dict | None) -> bool:
+        if entree is None or entree.get("index") != self.index_url:
+            return False
+        ttl = self.ttl if entree.get("metadonnees") is not None else min(self.ttl, CACHE_TTL_ABSENT)
+        return time.time() - entree.get("horodatage", 0) < ttl
+
+    # === Requêtes
+    def _telecharger(self, nom: str) -> dict | None:
+        """Retourne les métadonnées, None si absent (404) ; lève OSError si injoignable."""
+        dossier = self._index_local()
+        if dossier is not None:
+            fixture = dossier / f"{nom}.json"
+            if not fixture.exists():
+                return None
+            return json.loads(fixture.read_text(encoding="utf-8"))
+
+        url = f"{self.index_url}/{nom}/json"
+        if self._session is not None:
+            try:
+                reponse = self._session.get(url, timeout=TIMEOUT_REQUETE)
+            except requests.RequestException as err:
+                raise OSError(str(err)) from err
+            if reponse.status_code == 404:
+                return None
+            if reponse.status_code != 200:
+                raise OSError(f"HTTP {reponse.status_code}")
+            return reponse.json()
+        try:
+            with urlopen(url, timeout=TIMEOUT_REQUETE) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except HTTPError as err:
+            if err.code == 404:
+                return None
+            raise OSError(f"HTTP {err.code}") from err
+        except URLError as err:
+            raise OSError(str(err.reason)) from err
+
+    def metadonnees(self, nom: str) -> dict | None:
+        """Métadonnées du paquet (cache si frais), ou None s'il est introuvable."""
+        entree = self._lire_cache(nom)
+        if self._entree_valide(entree):
+            return entree["metadonnees"]
+        try:
+            metadonnees = self._telecharger(nom)
+        except (OSError, ValueError) as err:
+            if entree is not None and entree.get("index") == self.index_url:
+                logging.warning(f"Index injoignable pour {nom} ({err}) — cache expiré utilisé.")
+                return entree["metadonnees"]
+            logging.warning(f"Index injoignable pour {nom} ({err}).")
+            return None
+        self._ecrire_cache(nom, metadonnees)
+        return metadonnees
+
+    def resoudre(self, noms: set[str]) -> dict[str, dict | None]:
+        """Résout tous les paquets avec au plus max_requetes requêtes simultanées."""
+        noms = sorted(noms)
+        with ThreadPoolExecutor(max_workers=self.max_requetes) as pool:
+            return dict(zip(noms, pool.map(self.metadonnees, noms)))
+
+
+_resolveur_pypi = None
+
+def resolveur_pypi() -> ResolveurPyPI:
+    global _resolveur_pypi
+    if _resolveur_pypi is None:
+        _resolveur_pypi = ResolveurPyPI()
+    return _resolveur_pypi
+
 # === Vérifie si le module est disponible sur PyPI
 def module_existe_sur_pypi(nom: str) -> bool:
-    url = f"https://pypi.org/pypi/{nom}/json"
-    try:
-        with urlopen(url) as response:
-            return response.status == 200
-    except (HTTPError, URLError):
-        return False
+    return resolveur_pypi().metadonnees(nom) is not None
 
 # === Analyse des imports dans tous les fichiers .py
 def extraire_modules_importes() -> set[str]:
@@ -66,8 +195,9 @@ def extraire_modules_importes() -> set[str]:
 
 # === Installation des modules manquants
 def installer_modules(modules: set[str]) -> None:
+    disponibles = resolveur_pypi().resoudre(modules)
     for module in sorted(modules):
-        if not module_existe_sur_pypi(module):
+        if disponibles[module] is None:
             logging.warning(f"⛔ Module introuvable sur PyPI : {module} — ignoré.")
             continue
         try:
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Résolution mémorisée des modules importables - Luxuria Studio"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import importlib.util
+import importlib.machinery
+from pathlib import Path
+from typing import Dict, Optional
+
+# === Configuration
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_PATH = BASE_DIR / ".luxuria_cache" / "resolution_modules.json"
+
+INTROUVABLE = None
+ORIGINE_INTEGREE = "built-in"
+
+
+def empreinte_sys_path() -> str:
+    """Empreinte de l'environnement : version, sys.path et date de chaque dossier.
+
+    Installer ou désinstaller un paquet modifie la date du dossier
+    site-packages, ce qui invalide le cache persistant.
+    """
+    elements = [sys.version]
+    for entree in sys.path:
+        dossier = entree or os.getcwd()
+        try:
+            elements.append(f"{dossier}:{os.stat(dossier).st_mtime_ns}")
+        except OSError:
+            elements.append(f"{dossier}:absent")
+    return hashlib.sha256("\n".join(elements).encode("utf-8")).hexdigest()
+
+
+def indexer_sys_path() -> Dict[str, str]:
+    """Parcourt une fois chaque dossier de sys.path : nom importable -> origine.
+
+    Comme pour l'import réel, le premier dossier gagne, et un paquet
+    d'espace de noms n'est retenu que si aucun module ordinaire ne porte ce nom.
+    """
+    index: Dict[str, str] = {}
+    espaces_de_noms: Dict[str, str] = {}
+    suffixes_ext = tuple(importlib.machinery.EXTENSION_SUFFIXES)
+    for entree in sys.path:
+        dossier = entree or os.getcwd()
+        try:
+            elements = list(os.scandir(dossier))
+        except OSError:
+            continue  # archives zip et dossiers absents : résolus par find_spec
+        for element in elements:
+            nom = element.name
+            if element.is_dir():
+                if not nom.isidentifier():
+                    continue
+                if os.path.exists(os.path.join(element.path, "__init__.py")):
+                    index.setdefault(nom, os.path.join(element.path, "__init__.py"))
+                else:
+                    espaces_de_noms.setdefault(nom, element.path)
+            elif nom.endswith(".py"):
+                if nom[:-3].isidentifier():
+                    index.setdefault(nom[:-3], element.path)
+            elif nom.endswith(suffixes_ext):
+                index.setdefault(nom.split(".")[0], element.path)
+    for nom, chemin in espaces_de_noms.items():
+        index.setdefault(nom, chemin)
+    for nom in sys.builtin_module_names:
+        index[nom] = ORIGINE_INTEGREE
+    return index
+
+
+class ResolveurModules:
+    """Cache de résolution des noms de modules de premier niveau.
+
+    Chaque nom est résolu au plus une fois par exécution, et le résultat est
+    réutilisé entre les exécutions tant que l'empreinte de sys.path ne change pas.
+    """
+
+    def __init__(self, chemin: Path = CACHE_PATH):
+        self.chemin = chemin
+        self.empreinte = empreinte_sys_path()
+        self.index: Optional[Dict[str, str]] = None
+        self.resolus: Dict[str, Optional[str]] = {}
+        self.modifie = False
+        if chemin.exists():
+            try:
+                donnees = json.loads(chemin.read_text(encoding="utf-8"))
+                if donnees.get("empreinte") == self.empreinte:
+                    self.index = donnees.get("index")
+                    self.resolus = donnees.get("resolus", {})
+            except (OSError, json.JSONDecodeError) as err:
+                logging.warning(f"Cache de résolution ignoré ({type(err).__name__})")
+
+    def pre_resoudre(self) -> None:
+        """Construit l'index des noms importables (un seul parcours de sys.path)."""
+        if self.index is None:
+            self.index = indexer_sys_path()
+            self.modifie = True
+
+    def origine(self, nom_module: str) -> Optional[str]:
+        """Chemin d'origine du module, 'built-in', ou None s'il est introuvable."""
+        nom_module = nom_module.split(".")[0]
+        if nom_module in self.resolus:
+            return self.resolus[nom_module]
+        self.pre_resoudre()
+        origine = self.index.get(nom_module)
+        if origine is None:
+            try:
+                spec = importlib.util.find_spec(nom_module)
+            except (ImportError, ValueError):
+                spec = None
+            origine = (spec.origin or "") if spec is not None else INTROUVABLE
+        self.resolus[nom_module] = origine
+        self.modifie = True
+        return origine
+
+    def est_externe(self, nom_module: str) -> bool:
+        """Un module est externe s'il est introuvable ou installé dans site-packages."""
+        origine = self.origine(nom_module)
+        return origine is INTROUVABLE or "site-packages" in origine
+
+    def sauvegarder(self) -> None:
+        if not self.modifie:
+            return
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self.chemin.write_text(
+            json.dumps({"empreinte": self.empreinte, "index": self.index, "resolus": self.resolus}),
+            encoding="utf-8"
+        )
+        self.modifie = False
+
+
+_resolveur = None
+
+def resolveur() -> ResolveurModules:
+    """Instance partagée du résolveur (chargée au premier appel)."""
+    global _resolveur
+    if _resolveur is None:
+        _resolveur = ResolveurModules()
+    return _resolveur
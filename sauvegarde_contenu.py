@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""Dépôt de sauvegardes adressé par contenu - Luxuria Studio.
+
+Chaque fichier sauvegardé est stocké une seule fois, compressé, sous son
+empreinte SHA-256 (objets/ab/abcd...). Chaque passage d'un outil produit un
+petit manifeste JSON qui associe les chemins sauvegardés à leurs objets : une
+sauvegarde identique à la précédente ne coûte que quelques lignes de manifeste.
+"""
+
+import os
+import json
+import lzma
+import zlib
+import time
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from secrets import token_hex
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# === Configuration
+BASE_DIR = Path(__file__).resolve().parent
+SAUVEGARDES_DIR = BASE_DIR / "backups" / "depot"
+COMPRESSION = "zlib"          # "zlib" (rapide) ou "lzma" (plus compact)
+TAILLE_BLOC = 1024 * 1024
+MAX_WORKERS = 8
+# Un objet plus récent que ce délai n'est jamais ramassé : son manifeste
+# peut être en cours d'écriture par un autre outil.
+DELAI_GRACE = 3600
+
+MAGIQUE_LZMA = b"\xfd7zXZ\x00"
+
+
+def _compresseur(compression: str):
+    if compression == "lzma":
+        return lzma.LZMACompressor()
+    if compression == "zlib":
+        return zlib.compressobj(6)
+    raise ValueError(f"Compression inconnue : {compression}")
+
+def _decompresseur(entete: bytes):
+    """Le format est reconnu à l'en-tête de l'objet, quel que soit le réglage courant."""
+    if entete.startswith(MAGIQUE_LZMA):
+        return lzma.LZMADecompressor()
+    return zlib.decompressobj()
+
+def hacher_fichier(chemin: Path) -> str:
+    empreinte = hashlib.sha256()
+    with chemin.open("rb") as flux:
+        for bloc in iter(lambda: flux.read(TAILLE_BLOC), b""):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def creer_temporaire(cible: Path, suffixe: str = ".tmp") -> Tuple[int, str]:
+    """Crée un temporaire exclusif dans le dossier de la cible : (descripteur, chemin).
+
+    Ses droits sont ceux d'un open() classique : le noyau applique l'umask,
+    sans que le processus ait à le modifier.
+    """
+    drapeaux = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temporaire = str(cible.parent / f".{cible.name}.{token_hex(4)}{suffixe}")
+        try:
+            return os.open(temporaire, drapeaux, 0o666), temporaire
+        except FileExistsError:
+            continue
+
+def ecrire_atomique(cible: Path, donnees: bytes, suffixe: str = ".tmp") -> None:
+    """Écrit dans un temporaire synchronisé du même dossier puis le renomme sur la cible.
+
+    Une cible existante garde ses droits.
+    """
+    try:
+        mode = cible.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    fd, temporaire = creer_temporaire(cible, suffixe)
+    try:
+        with os.fdopen(fd, "wb") as flux:
+            flux.write(donnees)
+            flux.flush()
+            os.fsync(flux.fileno())
+        if mode is not None:
+            os.chmod(temporaire, mode)
+        os.replace(temporaire, cible)
+    except BaseException:
+        Path(temporaire).unlink(missing_ok=True)
+        raise
+
+
+class SessionSauvegarde:
+    """Sauvegardes d'un passage d'outil ; le manifeste est écrit à la fermeture."""
+
+    def __init__(self, depot: "DepotSauvegardes", outil: str):
+        self.depot = depot
+        self.outil = outil
+        self.identifiant = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{outil}_{token_hex(3)}"
+        self.fichiers: Dict[str, Dict] = {}
+
+    def ajouter(self, chemin: Union[str, Path], sha256: Optional[str] = None) -> Optional[str]:
+        """Sauvegarde un fichier et retourne son empreinte (None s'il est illisible)."""
+        chemin = Path(chemin).resolve()
+        try:
+            infos = chemin.stat()
+            empreinte = self.depot.stocker(chemin, sha256)
+        except OSError as err:
+            logging.warning(f"Sauvegarde impossible : {chemin} ({err})")
+            return None
+        self.fichiers[str(chemin)] = {
+            "sha256": empreinte,
+            "taille": infos.st_size,
+            "mode": infos.st_mode & 0o7777,
+            "mtime_ns": infos.st_mtime_ns
+        }
+        return empreinte
+
+    def ajouter_dossier(self, dossier: Union[str, Path]) -> Tuple[int, List[str]]:
+        """Sauvegarde récursivement tous les fichiers d'un dossier.
+
+        Retourne (nombre de fichiers sauvegardés, chemins non sauvegardés) ;
+        un sous-dossier illisible compte parmi les échecs.
+        """
+        nombre, echecs = 0, []
+
+        def illisible(err: OSError) -> None:
+            logging.warning(f"Sauvegarde impossible : {err.filename} ({err})")
+            echecs.append(str(err.filename))
+
+        for racine, _, fichiers in os.walk(dossier, onerror=illisible):
+            for nom in fichiers:
+                if self.ajouter(Path(racine) / nom) is not None:
+                    nombre += 1
+                else:
+                    echecs.append(str(Path(racine) / nom))
+        return nombre, echecs
+
+    def fermer(self) -> Optional[Path]:
+        """Écrit le manifeste (rien si aucun fichier n'a été sauvegardé)."""
+        if not self.fichiers:
+            return None
+        manifeste = {
+            "identifiant": self.identifiant,
+            "outil": self.outil,
+            "horodatage": datetime.now().isoformat(),
+            "fichiers": self.fichiers
+        }
+        chemin = self.depot.manifeste(self.identifiant)
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        ecrire_atomique(chemin, json.dumps(manifeste, ensure_ascii=False, indent=1).encode("utf-8"))
+        logging.info(f"Sauvegarde {self.identifiant} : {len(self.fichiers)} fichier(s)")
+        return chemin
+
+    def __enter__(self) -> "SessionSauvegarde":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fermer()
+
+
+class DepotSauvegardes:
+    """Objets compressés adressés par SHA-256 et manifestes par passage."""
+
+    def __init__(self, racine: Path = SAUVEGARDES_DIR, compression: str = COMPRESSION):
+        _compresseur(compression)
+        self.racine = Path(racine)
+        self.compression = compression
+        self.objets_dir = self.racine / "objets"
+        self.manifestes_dir = self.racine / "manifestes"
+
+    # === Objets
+    def objet(self, empreinte: str) -> Path:
+        return self.objets_dir / empreinte[:2] / empreinte[2:]
+
+    def stocker(self, chemin: Path, sha256: Optional[str] = None) -> str:
+        """Stocke le contenu du fichier s'il n'est pas déjà présent ; retourne son empreinte.
+
+        L'empreinte est calculée d'abord (ou fournie par l'appelant) : un
+        contenu déjà connu n'est ni recompressé ni réécrit.
+        """
+        empreinte = sha256 or hacher_fichier(chemin)
+        cible = self.objet(empreinte)
+        try:
+            # Objet déjà présent : sa date est rafraîchie pour que ramasser() le
+            # protège jusqu'à l'écriture du manifeste qui le référence
+            os.utime(cible)
+            return empreinte
+        except FileNotFoundError:
+            pass
+
+        cible.parent.mkdir(parents=True, exist_ok=True)
+        compresseur = _compresseur(self.compression)
+        controle = hashlib.sha256()
+        fd, temporaire = tempfile.mkstemp(dir=cible.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sortie, chemin.open("rb") as entree:
+                for bloc in iter(lambda: entree.read(TAILLE_BLOC), b""):
+                    controle.update(bloc)
+                    sortie.write(compresseur.compress(bloc))
+                sortie.write(compresseur.flush())
+                sortie.flush()
+                os.fsync(sortie.fileno())
+            if controle.hexdigest() != empreinte:
+                # Le fichier a changé entre le hachage et la copie : on range sous la bonne clé
+                empreinte = controle.hexdigest()
+                cible = self.objet(empreinte)
+                cible.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temporaire, cible)
+        except BaseException:
+            Path(temporaire).unlink(missing_ok=True)
+            raise
+        return empreinte
+
+    def lire_objet(self, empreinte: str, sortie) -> None:
+        """Décompresse l'objet en flux vers un fichier ouvert en écriture binaire."""
+        with self.objet(empreinte).open("rb") as entree:
+            bloc = entree.read(TAILLE_BLOC)
+            decompresseur = _decompresseur(bloc)
+            while bloc:
+                sortie.write(decompresseur.decompress(bloc))
+                bloc = entree.read(TAILLE_BLOC)
+            if hasattr(decompresseur, "flush"):
+                sortie.write(decompresseur.flush())
+
+    # === Manifestes
+    def manifeste(self, identifiant: str) -> Path:
+        return self.manifestes_dir / f"{identifiant}.json"
+
+    def session(self, outil: str) -> SessionSauvegarde:
+        return SessionSauvegarde(self, outil)
+
+    def sessions(self, outil: Optional[str] = None) -> List[str]:
+        """Identifiants des sauvegardes, de la plus ancienne à la plus récente."""
+        if not self.manifestes_dir.exists():
+            return []
+        identifiants = sorted(p.stem for p in self.manifestes_dir.glob("*.json"))
+        if outil:
+            identifiants = [i for i in identifiants if i.split("_", 1)[1].rsplit("_", 1)[0] == outil]
+        return identifiants
+
+    def charger(self, identifiant: str) -> Dict:
+        return json.loads(self.manifeste(identifiant).read_text(encoding="utf-8"))
+
+    # === Restauration
+    def restaurer(self, identifiant: str, destination: Optional[Path] = None,
+                  chemins: Optional[Iterable[str]] = None, max_workers: int = MAX_WORKERS) -> Dict[str, int]:
+        """Restaure une sauvegarde, à son emplacement d'origine ou sous destination.
+
+        Un fichier déjà identique (même taille et même empreinte) n'est pas
+        réécrit ; les autres sont décompressés en parallèle et remplacés de
+        façon atomique avec leurs droits et leur date d'origine.
+        """
+        fichiers = self.charger(identifiant)["fichiers"]
+        if chemins is not None:
+            voulus = {str(Path(c).resolve()) for c in chemins}
+            fichiers = {c: e for c, e in fichiers.items() if c in voulus}
+
+        def cible_de(origine: str) -> Path:
+            if destination is None:
+                return Path(origine)
+            chemin = Path(origine)
+            try:
+                relatif = chemin.relative_to(BASE_DIR)
+            except ValueError:
+                relatif = chemin.relative_to(chemin.anchor)
+            return Path(destination) / relatif
+
+        def restaurer_un(element) -> str:
+            origine, entree = element
+            cible = cible_de(origine)
+            try:
+                if (cible.is_file() and cible.stat().st_size == entree["taille"]
+                        and hacher_fichier(cible) == entree["sha256"]):
+                    return "identiques"
+                cible.parent.mkdir(parents=True, exist_ok=True)
+                fd, temporaire = tempfile.mkstemp(dir=cible.parent, prefix=f".{cible.name}.", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as sortie:
+                        self.lire_objet(entree["sha256"], sortie)
+                        sortie.flush()
+                        os.fsync(sortie.fileno())
+                    os.chmod(temporaire, entree["mode"])
+                    os.utime(temporaire, ns=(entree["mtime_ns"], entree["mtime_ns"]))
+                    os.replace(temporaire, cible)
+                except BaseException:
+                    Path(temporaire).unlink(missing_ok=True)
+                    raise
+            except (OSError, zlib.error, lzma.LZMAError) as err:
+                logging.error(f"Restauration impossible : {cible} ({err})")
+                return "echecs"
+            return "restaures"
+
+        bilan = {"restaures": 0, "identiques": 0, "echecs": 0}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for statut in pool.map(restaurer_un, fichiers.items()):
+                bilan[statut] += 1
+        logging.info(f"Restauration {identifiant} : {bilan}")
+        return bilan
+
+    # === Nettoyage
+    def supprimer(self, identifiant: str) -> None:
+        """Supprime le manifeste ; les objets orphelins partent au prochain ramassage."""
+        self.manifeste(identifiant).unlink(missing_ok=True)
+
+    def elaguer(self, conserver: int, outil: Optional[str] = None) -> List[str]:
+        """Ne garde que les `conserver` sauvegardes les plus récentes (par outil)."""
+        supprimees = []
+        outils = [outil] if outil else {i.split("_", 1)[1].rsplit("_", 1)[0] for i in self.sessions()}
+        for nom in outils:
+            anciennes = self.sessions(nom)[:-conserver] if conserver else self.sessions(nom)
+            for identifiant in anciennes:
+                self.supprimer(identifiant)
+                supprimees.append(identifiant)
+        return supprimees
+
+    def ramasser(self, delai_grace: int = DELAI_GRACE) -> Dict[str, int]:
+        """Supprime les objets qu'aucun manifeste ne référence ; retourne le bilan."""
+        references = set()
+        for identifiant in self.sessions():
+            try:
+                references.update(e["sha256"] for e in self.charger(identifiant)["fichiers"].values())
+            except (OSError, json.JSONDecodeError, KeyError) as err:
+                # Manifeste illisible : on ne sait pas ce qu'il protège, on ne ramasse rien
+                logging.error(f"Manifeste illisible {identifiant} ({err}) : ramassage annulé")
+                return {"supprimes": 0, "octets_liberes": 0, "conserves": 0}
+
+        limite = time.time() - delai_grace
+        bilan = {"supprimes": 0, "octets_liberes": 0, "conserves": 0}
+        if not self.objets_dir.exists():
+            return bilan
+        for sous_dossier in self.objets_dir.iterdir():
+            if not sous_dossier.is_dir():
+                continue
+            for objet in sous_dossier.iterdir():
+                infos = objet.stat()
+                orphelin = objet.name.endswith(".tmp") or sous_dossier.name + objet.name not in references
+                if orphelin and infos.st_mtime < limite:
+                    objet.unlink(missing_ok=True)
+                    bilan["supprimes"] += 1
+                    bilan["octets_liberes"] += infos.st_size
+                else:
+                    bilan["conserves"] += 1
+        logging.info(f"Ramassage du dépôt : {bilan}")
+        return bilan
+
+
+_depot = None
+
+def depot() -> DepotSauvegardes:
+    """Dépôt partagé (créé au premier appel)."""
+    global _depot
+    if _depot is None:
+        _depot = DepotSauvegardes()
+    return _depot
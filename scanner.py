@@ -1,8 +1,17 @@
 # -*- coding: utf-8 -*-
 """Scanner de fichiers Python - Luxuria IA"""
 
+import os
+import csv
+import json
+import time
+import queue
 import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
 
 # === Configuration du logging
@@ -14,17 +23,198 @@ logging.basicConfig(
 
 # === Répertoire de base
 BASE_DIR = Path(__file__).resolve().parent
+INVENTAIRE_PATH = BASE_DIR / "logs" / "inventaire_fichiers.jsonl"
+
+# === Paramètres du parcours
+EXTENSIONS = (".py", ".pyc")
+EXCLUSIONS = {".git", ".luxuria_cache"}
+MAX_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+TAILLE_LOT = 1000
+CHAMPS = ["chemin", "taille", "mtime_ns", "statut", "erreur"]
+
+
+# === Parcours (os.scandir : le type et le stat viennent de l'entrée du dossier)
+def parcourir(racine: str, depart: str = "", exclusions: set = EXCLUSIONS,
+              extensions: tuple = EXTENSIONS) -> Iterator[Dict]:
+    """Produit une ligne d'inventaire par fichier retenu sous racine/depart.
+
+    Les dossiers exclus ne sont jamais ouverts ; aucun objet Path n'est créé.
+    """
+    a_visiter = [depart]
+    while a_visiter:
+        relatif = a_visiter.pop()
+        try:
+            entrees = os.scandir(os.path.join(racine, relatif))
+        except OSError as err:
+            yield {"chemin": relatif, "taille": None, "mtime_ns": None, "statut": "bloque", "erreur": str(err)}
+            continue
+        with entrees:
+            for entree in entrees:
+                chemin = f"{relatif}/{entree.name}" if relatif else entree.name
+                try:
+                    if entree.is_dir(follow_symlinks=False):
+                        if entree.name not in exclusions:
+                            a_visiter.append(chemin)
+                        continue
+                    if not entree.name.endswith(extensions):
+                        continue
+                    infos = entree.stat(follow_symlinks=False)
+                except OSError as err:
+                    yield {"chemin": chemin, "taille": None, "mtime_ns": None, "statut": "bloque", "erreur": str(err)}
+                    continue
+                yield {"chemin": chemin, "taille": infos.st_size, "mtime_ns": infos.st_mtime_ns,
+                       "statut": "accessible", "erreur": None}
+
+def parcourir_parallele(racine: str, exclusions: set = EXCLUSIONS, extensions: tuple = EXTENSIONS,
+                        max_workers: int = MAX_WORKERS) -> Iterator[Dict]:
+    """Comme parcourir(), chaque sous-arbre de premier niveau étant parcouru par un thread.
+
+    Les threads remettent leurs lignes par lots dans une file bornée : la
+    mémoire reste constante quelle que soit la taille de l'arborescence.
+    """
+    sous_arbres: List[str] = []
+    premier_niveau: List[Dict] = []
+    try:
+        with os.scandir(racine) as entrees:
+            for entree in entrees:
+                try:
+                    if entree.is_dir(follow_symlinks=False):
+                        if entree.name not in exclusions:
+                            sous_arbres.append(entree.name)
+                        continue
+                    if not entree.name.endswith(extensions):
+                        continue
+                    infos = entree.stat(follow_symlinks=False)
+                except OSError as err:
+                    premier_niveau.append({"chemin": entree.name, "taille": None, "mtime_ns": None,
+                                           "statut": "bloque", "erreur": str(err)})
+                    continue
+                premier_niveau.append({"chemin": entree.name, "taille": infos.st_size,
+                                       "mtime_ns": infos.st_mtime_ns, "statut": "accessible", "erreur": None})
+    except OSError as err:
+        yield {"chemin": "", "taille": None, "mtime_ns": None, "statut": "bloque", "erreur": str(err)}
+        return
+    yield from premier_niveau
+
+    file_lots: "queue.Queue[Optional[List[Dict]]]" = queue.Queue(maxsize=max_workers * 4)
+    arret = threading.Event()
+
+    def parcourir_sous_arbre(depart: str) -> None:
+        try:
+            lot = []
+            for ligne in parcourir(racine, depart, exclusions, extensions):
+                lot.append(ligne)
+                if len(lot) >= TAILLE_LOT:
+                    file_lots.put(lot)
+                    lot = []
+                    if arret.is_set():
+                        return
+            if lot:
+                file_lots.put(lot)
+        finally:
+            file_lots.put(None)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for depart in sous_arbres:
+            pool.submit(parcourir_sous_arbre, depart)
+        restants = len(sous_arbres)
+        try:
+            while restants:
+                lot = file_lots.get()
+                if lot is None:
+                    restants -= 1
+                else:
+                    yield from lot
+        finally:
+            # Consommateur interrompu : on libère les threads bloqués sur la file
+            arret.set()
+            while restants:
+                if file_lots.get() is None:
+                    restants -= 1
+
+
+# === Écriture en flux
+class EcrivainInventaire:
+    """Écrit les lignes d'inventaire au fil de l'eau, en JSONL ou en CSV."""
+
+    def __init__(self, flux: TextIO, format_sortie: str = "jsonl"):
+        if format_sortie not in ("jsonl", "csv"):
+            raise ValueError(f"Format d'inventaire inconnu : {format_sortie}")
+        self.flux = flux
+        self.csv = None
+        if format_sortie == "csv":
+            self.csv = csv.DictWriter(flux, fieldnames=CHAMPS)
+            self.csv.writeheader()
+
+    def ecrire(self, ligne: Dict) -> None:
+        if self.csv:
+            self.csv.writerow(ligne)
+        else:
+            self.flux.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+
+
+def inventorier(source: Path, sortie: Path = INVENTAIRE_PATH, format_sortie: str = "jsonl",
+                exclusions: set = EXCLUSIONS, parallele: bool = True,
+                max_workers: int = MAX_WORKERS) -> Dict[str, int]:
+    """Écrit l'inventaire des fichiers de source dans sortie ; retourne les compteurs."""
+    sortie.parent.mkdir(parents=True, exist_ok=True)
+    lignes = (parcourir_parallele(str(source), exclusions, EXTENSIONS, max_workers) if parallele
+              else parcourir(str(source), "", exclusions, EXTENSIONS))
+    bilan = {"accessible": 0, "bloque": 0}
+    with sortie.open("w", encoding="utf-8", newline="") as flux:
+        ecrivain = EcrivainInventaire(flux, format_sortie)
+        for ligne in lignes:
+            ecrivain.ecrire(ligne)
+            bilan[ligne["statut"]] += 1
+            if ligne["statut"] == "bloque":
+                logging.warning(f"Bloqué : {ligne['chemin']}  {ligne['erreur']}")
+    return bilan
 
 def scanner_fichiers(source: Path) -> None:
     logging.info("Scan des fichiers Python en cours...\n")
+    bilan = inventorier(source)
+    logging.info(f"{bilan['accessible']} fichier(s) accessible(s), {bilan['bloque']} bloqué(s) "
+                 f"- inventaire : {INVENTAIRE_PATH}")
+
+
+# === Banc d'essai
+def generer_arbre(dossier: Path, nb_fichiers: int = 1_000_000, sous_arbres: int = 16,
+                  par_dossier: int = 1000) -> None:
+    """Crée une arborescence synthétique de fichiers vides (.py, .pyc et .txt)."""
+    extensions = (".py", ".pyc", ".txt")
+    crees = set()
+    for i in range(nb_fichiers):
+        sous_dossier = os.path.join(dossier, f"arbre_{i % sous_arbres}", f"paquet_{i // (par_dossier * sous_arbres)}")
+        if sous_dossier not in crees:
+            os.makedirs(sous_dossier, exist_ok=True)
+            crees.add(sous_dossier)
+        os.close(os.open(os.path.join(sous_dossier, f"f{i}{extensions[i % 3]}"), os.O_CREAT | os.O_WRONLY, 0o644))
+
+def benchmark_scanner(nb_fichiers: int = 1_000_000, dossier: Optional[Path] = None) -> Dict[str, float]:
+    """Compare glob("**/*") + stat à l'inventaire scandir, séquentiel et parallèle."""
+    with tempfile.TemporaryDirectory() as tmp:
+        racine = Path(dossier or tmp)
+        debut = time.perf_counter()
+        generer_arbre(racine, nb_fichiers)
+        resultats = {"fichiers": nb_fichiers, "generation_s": round(time.perf_counter() - debut, 2)}
+
+        debut = time.perf_counter()
+        trouves = 0
+        for fichier in racine.glob("**/*"):
+            if fichier.suffix in [".py", ".pyc"]:
+                fichier.stat()
+                trouves += 1
+        resultats["glob_stat_s"] = round(time.perf_counter() - debut, 2)
 
-    for fichier in source.glob("**/*"):
-        if fichier.suffix in [".py", ".pyc"]:
-            try:
-                fichier.stat()  # Vérifie l'accessibilité
-                logging.info(f"Accessible : {fichier.relative_to(source)}")
-            except Exception as e:
-                logging.warning(f"Bloqué : {fichier.relative_to(source)}  {e}")
+        sortie = Path(tmp) / "inventaire.jsonl"
+        for nom, parallele in (("scandir_s", False), ("scandir_parallele_s", True)):
+            debut = time.perf_counter()
+            bilan = inventorier(racine, sortie, parallele=parallele)
+            resultats[nom] = round(time.perf_counter() - debut, 2)
+            if bilan["accessible"] != trouves:
+                raise RuntimeError(f"Inventaire incomplet : {bilan} pour {trouves} fichier(s)")
+    logging.info(f"Benchmark scanner : {resultats}")
+    return resultats
 
 # === Point d’entrée modulaire
 def main() -> None:
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Configuration commune des tests - Luxuria Studio"""
+
+import assistant_pdg
+
+# Les modules s'enregistrent (et s'exécutent) à l'import : neutralisé pour les tests
+assistant_pdg.AssistantPDG.register = classmethod(lambda cls, nom, fonction: None)
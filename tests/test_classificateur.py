@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Tests du moteur de classification - Luxuria Studio"""
+
+from classificateur import Classificateur
+
+
+def test_regex_non_masquee_par_un_mot_cle():
+    regles = {"a": ["def"], "b": [{"motif": r"def lancer_\w+", "regex": True, "poids": 5}]}
+    assert Classificateur(regles).classer_texte("def lancer_x()") == "b"
+
+
+def test_deux_regex_a_la_meme_position():
+    regles = {"a": [{"motif": r"def \w+", "regex": True}],
+              "b": [{"motif": r"def lancer_\w+", "regex": True, "poids": 5}]}
+    assert Classificateur(regles).classer_texte("def lancer_x()") == "b"
+
+
+def test_mots_cles_prefixes_credites():
+    regles = {"a": ["lancer", "lancer_tout"], "b": [{"motif": "lancer_tout", "poids": 1}]}
+    assert Classificateur(regles).classer_texte("lancer_tout()") == "a"
+
+
+def test_premiere_regle_decisive_du_texte():
+    regles = {"a": [{"motif": "zz", "decisif": True}],
+              "b": [{"motif": "y+", "regex": True, "decisif": True}]}
+    classificateur = Classificateur(regles)
+    assert classificateur.classer_texte("yy zz") == "b"
+    assert classificateur.classer_texte("zz yy") == "a"
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Tests de la recherche paginée des fiches clients - Luxuria Studio"""
+
+import json
+
+import pytest
+
+import fiche_client
+from fiche_client import IndexClients, chercher_client, rechercher_clients
+
+
+@pytest.fixture
+def clients(tmp_path, monkeypatch):
+    fiches = {
+        "c1": {"nom": "Martinez", "prenom": "Léa", "ville": "Lyon", "cle_acces": "K-1"},
+        "c2": {"nom": "Martin", "prenom": "Paul", "ville": "Paris"},
+        "c3": {"nom": "Dupont", "prenom": "Anne", "ville": "Martinique"},
+        "c4": {"nom": "Martin", "prenom": "Zoé", "ville": "Nice"},
+        "c5": {"nom": "Durand", "prenom": "Hugo", "ville": "Lille"},
+    }
+    chemin = tmp_path / "clients.json"
+    chemin.write_text(json.dumps(fiches, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(fiche_client, "INDEX_CLIENTS", IndexClients(chemin))
+    return fiches
+
+
+def test_correspondances_exactes_puis_partielles(clients):
+    resultat = rechercher_clients("martin", par_page=10)
+    assert resultat["total"] == 4
+    assert resultat["resultats"] == [clients["c2"], clients["c4"], clients["c1"], clients["c3"]]
+
+
+def test_pages_a_cheval_sur_exactes_et_partielles(clients):
+    pages = [rechercher_clients("martin", page=page, par_page=3) for page in (1, 2, 3)]
+    assert [p["total"] for p in pages] == [4, 4, 4]
+    assert pages[0]["resultats"] == [clients["c2"], clients["c4"], clients["c1"]]
+    assert pages[1]["resultats"] == [clients["c3"]]
+    assert pages[2]["resultats"] == []
+    assert rechercher_clients("mar", page=2, par_page=2)["resultats"] == [clients["c3"], clients["c4"]]
+
+
+def test_recherche_stricte_d_une_fiche(clients):
+    assert chercher_client("C3")["nom"] == "Dupont"
+    assert chercher_client("k-1")["nom"] == "Martinez"
+    assert chercher_client("Martinez")["prenom"] == "Léa"
+    assert chercher_client("martine") is None
+
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Tests du flux des changements et des curseurs par outil - Luxuria Studio"""
+
+import pytest
+
+from flux_changements import CREE, MODIFIE, FluxChangements
+
+
+@pytest.fixture
+def flux(tmp_path):
+    racine = tmp_path / "projet"
+    racine.mkdir()
+    (racine / "existant.py").write_text("x = 1\n", encoding="utf-8")
+    flux = FluxChangements(racine, tmp_path / "flux.sqlite")
+    yield flux
+    flux.fermer()
+
+
+def test_sans_curseur_tout_est_a_reparcourir(flux):
+    jeton, changements = flux.nouveautes("verificateur", sonder=True)
+    assert changements is None
+    flux.acquitter("verificateur", jeton)
+    assert flux.nouveautes("verificateur", sonder=True)[1] == {}
+
+
+def test_changements_depuis_le_curseur_puis_compactage(flux):
+    for outil in ("verificateur", "correcteur"):
+        flux.acquitter(outil, flux.nouveautes(outil, sonder=True)[0])
+
+    nouveau = flux.racine / "nouveau.py"
+    nouveau.write_text("y = 2\n", encoding="utf-8")
+    jeton, changements = flux.nouveautes("verificateur", sonder=True)
+    assert changements == {nouveau: CREE}
+
+    # Le plus en retard n'a pas encore lu : rien n'est compacté
+    flux.acquitter("verificateur", jeton)
+    assert flux.base.execute("SELECT COUNT(*) FROM changements").fetchone()[0] == 1
+
+    assert flux.nouveautes("correcteur", sonder=False)[1] == {nouveau: CREE}
+    flux.acquitter("correcteur", jeton)
+    assert flux.base.execute("SELECT COUNT(*) FROM changements").fetchone()[0] == 0
+    assert flux.nouveautes("correcteur", sonder=False) == (jeton, {})
+
+    nouveau.write_text("y = 3  # plus long\n", encoding="utf-8")
+    assert flux.nouveautes("correcteur", sonder=True)[1] == {nouveau: MODIFIE}
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Tests de la recherche de signatures et de la baseline d'empreintes - Luxuria Studio"""
+
+import os
+
+from IA_defense import analyser_flux, detecter_malwares, rechercher_signatures
+
+
+def test_signatures_trouvees_en_une_passe():
+    donnees = b"x = eval(y)\nimport socket\n"
+    assert rechercher_signatures(donnees) == {"eval(", "import socket"}
+    assert rechercher_signatures(b"evaluation sans appel") == set()
+
+
+def test_signature_a_cheval_sur_deux_blocs(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_bytes(b"ab eval(1)\n")
+    trouvees, _ = analyser_flux(script, taille_bloc=4)
+    assert trouvees == {"eval("}
+
+
+def test_baseline_ignore_les_fichiers_inchanges(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text("exec(code)\n", encoding="utf-8")
+    baseline = {"fichiers": {}}
+
+    assert [m["signature"] for m in detecter_malwares(script, baseline)] == ["exec("]
+    assert detecter_malwares(script, baseline) == []
+
+    # Date modifiée, contenu identique : pas de nouvelle alerte
+    infos = script.stat()
+    os.utime(script, ns=(infos.st_atime_ns, infos.st_mtime_ns + 10**9))
+    assert detecter_malwares(script, baseline) == []
+
+    script.write_text("exec(autre_code)\n", encoding="utf-8")
+    assert [m["signature"] for m in detecter_malwares(script, baseline)] == ["exec("]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'index de trigrammes - Luxuria Studio"""
+
+from index_trigrammes import IndexTrigrammes
+
+
+def test_seuls_les_fichiers_candidats_sont_retenus(tmp_path):
+    avec = tmp_path / "avec.py"
+    sans = tmp_path / "sans.py"
+    avec.write_text("import subprocess\nsubprocess.Popen(['ls'])\n", encoding="utf-8")
+    sans.write_text("print('rien a signaler')\n", encoding="utf-8")
+    index = IndexTrigrammes(tmp_path / "index.sqlite")
+    try:
+        assert index.mettre_a_jour([avec, sans])["indexes"] == 2
+        assert index.candidats("subprocess.Popen") == {str(avec)}
+        assert index.candidats_regex(r"Popen\(\[") == {str(avec)}
+        assert index.candidats_parmi(["Popen", "signaler"]) == {str(avec), str(sans)}
+
+        sans.write_text("subprocess.Popen('ls')\n", encoding="utf-8")
+        assert index.mettre_a_jour([avec, sans])["indexes"] == 1
+        assert index.candidats("subprocess.Popen") == {str(avec), str(sans)}
+    finally:
+        index.fermer()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'index des clés d'accès - Luxuria Studio"""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("colorama")
+
+from luxuria_ia import IndexCles
+
+DANS_UN_MOIS = (date.today() + timedelta(days=30)).isoformat()
+
+
+def index_cles(tmp_path, cles):
+    chemin = tmp_path / "luxuria_keys.json"
+    chemin.write_text(json.dumps(cles), encoding="utf-8")
+    return IndexCles(chemin)
+
+
+def test_cle_d_un_client_au_prefixe_voisin_ignoree(tmp_path):
+    index = index_cles(tmp_path, {"key_ab": {"statut": "actif", "expiration": DANS_UN_MOIS}})
+    assert index.expiration("a") is None
+    assert index.cles_actives("a") == []
+    assert index.expiration("ab") == DANS_UN_MOIS
+
+
+def test_cle_exacte_et_cles_suffixees(tmp_path):
+    hier = (date.today() - timedelta(days=1)).isoformat()
+    index = index_cles(tmp_path, {
+        "key_a": {"statut": "actif", "expiration": hier},
+        "key_a0": {"statut": "actif", "expiration": "2999-01-01"},
+        "key_a_2": {"statut": "renouvele", "expiration": DANS_UN_MOIS},
+        "key_a_3": {"statut": "revoque", "expiration": "2999-01-01"},
+    })
+    assert index.expiration("a") == DANS_UN_MOIS
+    assert index.cles_actives("a") == [("key_a_2", DANS_UN_MOIS)]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Tests du dépôt de sauvegardes - Luxuria Studio"""
+
+from sauvegarde_contenu import DepotSauvegardes
+
+
+def sauvegarder(depot, *fichiers):
+    with depot.session("test") as session:
+        for fichier in fichiers:
+            session.ajouter(fichier)
+    return session.identifiant
+
+
+def test_contenus_identiques_stockes_une_fois(tmp_path):
+    depot = DepotSauvegardes(tmp_path / "depot")
+    (tmp_path / "a.txt").write_text("même contenu", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("même contenu", encoding="utf-8")
+    identifiant = sauvegarder(depot, tmp_path / "a.txt", tmp_path / "b.txt")
+
+    assert depot.sessions() == [identifiant]
+    assert len({e["sha256"] for e in depot.charger(identifiant)["fichiers"].values()}) == 1
+    assert len(list(depot.objets_dir.glob("*/*"))) == 1
+
+
+def test_restauration_ailleurs_et_en_place(tmp_path):
+    depot = DepotSauvegardes(tmp_path / "depot")
+    fichier = tmp_path / "source" / "module.py"
+    fichier.parent.mkdir()
+    fichier.write_text("print('original')\n", encoding="utf-8")
+    identifiant = sauvegarder(depot, fichier)
+
+    destination = tmp_path / "restauration"
+    assert depot.restaurer(identifiant, destination=destination)["restaures"] == 1
+    copies = [p for p in destination.rglob("module.py")]
+    assert [p.read_text(encoding="utf-8") for p in copies] == ["print('original')\n"]
+
+    fichier.write_text("print('modifie')\n", encoding="utf-8")
+    assert depot.restaurer(identifiant)["restaures"] == 1
+    assert fichier.read_text(encoding="utf-8") == "print('original')\n"
+    assert depot.restaurer(identifiant)["identiques"] == 1
+
+
+def test_ramassage_des_objets_orphelins(tmp_path):
+    depot = DepotSauvegardes(tmp_path / "depot")
+    (tmp_path / "garde.txt").write_text("garde", encoding="utf-8")
+    (tmp_path / "jete.txt").write_text("jete", encoding="utf-8")
+    sauvegarder(depot, tmp_path / "garde.txt")
+    a_supprimer = sauvegarder(depot, tmp_path / "jete.txt")
+
+    depot.supprimer(a_supprimer)
+    assert depot.ramasser(delai_grace=0)["supprimes"] == 1
+    assert len(list(depot.objets_dir.glob("*/*"))) == 1
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Tests de la réécriture transactionnelle - Luxuria Studio"""
+
+import os
+
+import pytest
+
+import sauvegarde_contenu
+from sauvegarde_contenu import DepotSauvegardes
+from transaction_reecriture import SUFFIXE_TEMPORAIRE, TransactionReecriture, recuperer
+
+
+@pytest.fixture
+def depot_temporaire(tmp_path, monkeypatch):
+    depot = DepotSauvegardes(tmp_path / "depot")
+    monkeypatch.setattr(sauvegarde_contenu, "_depot", depot)
+    return depot
+
+
+def fichiers(tmp_path, contenus):
+    chemins = []
+    for nom, contenu in contenus.items():
+        chemin = tmp_path / nom
+        chemin.write_bytes(contenu)
+        chemins.append(chemin)
+    return chemins
+
+
+def test_exception_dans_le_bloc_ne_modifie_rien(tmp_path):
+    a, b = fichiers(tmp_path, {"a.py": b"a = 1\n", "b.py": b"b = 1\n"})
+    with pytest.raises(RuntimeError):
+        with TransactionReecriture("test", journaux=tmp_path / "journaux", sauvegarde=False) as transaction:
+            transaction.ecrire(a, b"a = 2\n")
+            transaction.ecrire(b, b"b = 2\n")
+            raise RuntimeError("passe interrompue")
+    assert (a.read_bytes(), b.read_bytes()) == (b"a = 1\n", b"b = 1\n")
+    assert not list(tmp_path.glob(f"*{SUFFIXE_TEMPORAIRE}"))
+
+
+def test_contenu_inchange_et_conflit(tmp_path):
+    a, b = fichiers(tmp_path, {"a.py": b"a = 1\n", "b.py": b"b = 1\n"})
+    transaction = TransactionReecriture("test", journaux=tmp_path / "journaux", sauvegarde=False)
+    assert transaction.ecrire(a, b"a = 1\n") is False
+    assert transaction.ecrire(b, b"b = 2\n") is True
+
+    b.write_bytes(b"b = 1  # modifie ailleurs\n")
+    bilan = transaction.valider()
+    assert (bilan["ecrits"], bilan["inchanges"], bilan["conflits"]) == (0, 1, 1)
+    assert transaction.en_conflit == [str(b)]
+    assert b.read_bytes() == b"b = 1  # modifie ailleurs\n"
+
+
+def test_validation_interrompue_annulee(tmp_path, monkeypatch, depot_temporaire):
+    a, b = fichiers(tmp_path, {"a.py": b"a = 1\n", "b.py": b"b = 1\n"})
+    journaux = tmp_path / "journaux"
+    remplacer = os.replace
+    appels = []
+
+    def remplacer_puis_mourir(source, cible):
+        # Le processus meurt entre le premier et le second renommage de la validation
+        if str(source).endswith(SUFFIXE_TEMPORAIRE):
+            appels.append(cible)
+            if len(appels) > 1:
+                raise KeyboardInterrupt("processus interrompu")
+        remplacer(source, cible)
+
+    transaction = TransactionReecriture("test", journaux=journaux)
+    transaction.ecrire(a, b"a = 2\n")
+    transaction.ecrire(b, b"b = 2\n")
+    monkeypatch.setattr(os, "replace", remplacer_puis_mourir)
+    with pytest.raises(KeyboardInterrupt):
+        transaction.valider()
+    monkeypatch.setattr(os, "replace", remplacer)
+    assert (a.read_bytes(), b.read_bytes()) == (b"a = 2\n", b"b = 1\n")
+
+    assert recuperer("annuler", journaux, racine=tmp_path) == [transaction.identifiant]
+    assert (a.read_bytes(), b.read_bytes()) == (b"a = 1\n", b"b = 1\n")
+    assert not list(journaux.glob("*.json"))
+    assert not list(tmp_path.glob(f"*{SUFFIXE_TEMPORAIRE}"))
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""Réécriture transactionnelle de plusieurs fichiers - Luxuria Studio.
+
+Une passe de correction prépare ses réécritures dans des fichiers temporaires
+du même dossier que chaque cible, puis les valide ensemble : les temporaires
+sont synchronisés sur disque, un journal est écrit, les originaux partent dans
+le dépôt de sauvegardes et les renommages sont enchaînés. Si le processus
+meurt pendant la validation, recuperer() termine les renommages (avancer) ou
+remet les originaux en place (annuler) à partir du journal.
+"""
+
+import os
+import json
+import stat
+import time
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from secrets import token_hex
+from typing import Dict, List, Optional, Union
+from sauvegarde_contenu import creer_temporaire, depot, ecrire_atomique, hacher_fichier
+
+# === Configuration
+BASE_DIR = Path(__file__).resolve().parent
+JOURNAUX_DIR = BASE_DIR / ".luxuria_cache" / "transactions"
+SUFFIXE_TEMPORAIRE = ".luxtx"
+MAX_WORKERS = 8
+IGNORES = {"__pycache__", ".venv", "env", "venv", "site-packages", ".git", "backups"}
+
+
+def _sha256(donnees: bytes) -> str:
+    return hashlib.sha256(donnees).hexdigest()
+
+def _fsync_dossier(dossier: Path) -> None:
+    """Rend les renommages durables (sans effet sous Windows)."""
+    try:
+        fd = os.open(dossier, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _ecrire_journal(chemin: Path, contenu: Dict) -> None:
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    temporaire = chemin.with_suffix(".tmp")
+    with temporaire.open("w", encoding="utf-8") as flux:
+        json.dump(contenu, flux, ensure_ascii=False)
+        flux.flush()
+        os.fsync(flux.fileno())
+    os.replace(temporaire, chemin)
+    _fsync_dossier(chemin.parent)
+
+
+class TransactionReecriture:
+    """Ensemble de réécritures validées ensemble ou pas du tout.
+
+    ecrire() ne touche jamais la cible : le nouveau contenu est comparé à
+    l'actuel (taille puis octets) et seul un contenu différent est préparé dans
+    un temporaire. valider() publie toutes les réécritures ; annuler() (ou une
+    exception dans le bloc with) les abandonne sans rien modifier.
+    """
+
+    def __init__(self, outil: str, journaux: Path = JOURNAUX_DIR, sauvegarde: bool = True):
+        self.outil = outil
+        self.identifiant = f"{time.strftime('%Y%m%d-%H%M%S')}_{outil}_{token_hex(3)}"
+        self.journal = journaux / f"{self.identifiant}.json"
+        self.sauvegarde = sauvegarde
+        self.entrees: Dict[str, Dict] = {}
+        self.bilan = {"ecrits": 0, "inchanges": 0, "conflits": 0, "octets": 0}
+        # Chemins (tels que passés à ecrire) réellement réécrits ou écartés pour conflit
+        self.ecrits: List[str] = []
+        self.en_conflit: List[str] = []
+
+    # === Préparation
+    def ecrire(self, chemin: Union[str, Path], contenu: Union[str, bytes],
+               encodage: str = "utf-8", newline: Optional[str] = None) -> bool:
+        """Prépare la réécriture ; retourne False si le contenu est inchangé.
+
+        Un texte est encodé comme le ferait Path.write_text (fins de ligne
+        traduites en os.linesep sauf si newline est précisé).
+        """
+        cible = Path(os.path.abspath(chemin))
+        if isinstance(contenu, str):
+            fin_ligne = os.linesep if newline is None else newline
+            if fin_ligne not in ("", "\n"):
+                contenu = contenu.replace("\n", fin_ligne)
+            contenu = contenu.encode(encodage)
+
+        try:
+            infos = os.lstat(cible)
+            if stat.S_ISLNK(infos.st_mode):
+                # On réécrit le fichier pointé, pas le lien
+                cible = cible.resolve()
+                infos = cible.stat()
+            etat = {"taille": infos.st_size, "mtime_ns": infos.st_mtime_ns}
+        except FileNotFoundError:
+            etat = None
+        # Même taille : comparaison directe ; taille différente : forcément modifié
+        if etat is not None and etat["taille"] == len(contenu) and cible.read_bytes() == contenu:
+            self.bilan["inchanges"] += 1
+            return False
+
+        precedent = self.entrees.pop(str(cible), None)
+        if precedent:
+            Path(precedent["temporaire"]).unlink(missing_ok=True)
+        # Un fichier créé reçoit les droits d'un open() classique, une cible existante garde les siens
+        fd, temporaire = creer_temporaire(cible, SUFFIXE_TEMPORAIRE)
+        try:
+            with os.fdopen(fd, "wb") as flux:
+                flux.write(contenu)
+            if etat is not None:
+                os.chmod(temporaire, infos.st_mode & 0o7777)
+        except BaseException:
+            Path(temporaire).unlink(missing_ok=True)
+            raise
+        self.entrees[str(cible)] = {
+            "demande": str(chemin),
+            "cible": str(cible),
+            "temporaire": temporaire,
+            "nouveau": _sha256(contenu),
+            "etat": etat,
+            "taille": len(contenu)
+        }
+        return True
+
+    def annuler(self) -> None:
+        """Abandonne les réécritures préparées (les cibles ne sont pas touchées)."""
+        for entree in self.entrees.values():
+            Path(entree["temporaire"]).unlink(missing_ok=True)
+        self.entrees.clear()
+
+    # === Validation
+    def _en_conflit(self, entree: Dict) -> bool:
+        """La cible a-t-elle été modifiée par un autre depuis sa lecture ?"""
+        try:
+            infos = Path(entree["cible"]).stat()
+        except FileNotFoundError:
+            return entree["etat"] is not None
+        actuel = {"taille": infos.st_size, "mtime_ns": infos.st_mtime_ns}
+        return entree["etat"] != actuel
+
+    def valider(self) -> Dict[str, int]:
+        """Publie toutes les réécritures préparées ; retourne le bilan de la passe."""
+        entrees = []
+        for entree in self.entrees.values():
+            if self._en_conflit(entree):
+                logging.warning(f"Modifié pendant la passe, non réécrit : {entree['cible']}")
+                Path(entree["temporaire"]).unlink(missing_ok=True)
+                self.bilan["conflits"] += 1
+                self.en_conflit.append(entree["demande"])
+            else:
+                entrees.append(entree)
+        self.entrees.clear()
+        if not entrees:
+            return self.bilan
+
+        def synchroniser(entree: Dict) -> None:
+            if entree["etat"] is not None:
+                entree["ancien"] = hacher_fichier(Path(entree["cible"]))
+            else:
+                entree["ancien"] = None
+            fd = os.open(entree["temporaire"], os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        # Empreinte des originaux et synchronisation des temporaires en lot, avant tout renommage
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            list(pool.map(synchroniser, entrees))
+
+        if self.sauvegarde:
+            with depot().session(self.outil) as session:
+                for entree in entrees:
+                    if entree["ancien"] is not None:
+                        session.ajouter(entree["cible"], sha256=entree["ancien"])
+
+        _ecrire_journal(self.journal, {
+            "identifiant": self.identifiant,
+            "outil": self.outil,
+            "entrees": [{k: e[k] for k in ("cible", "temporaire", "ancien", "nouveau")} for e in entrees]
+        })
+        for entree in entrees:
+            os.replace(entree["temporaire"], entree["cible"])
+            self.ecrits.append(entree["demande"])
+            self.bilan["ecrits"] += 1
+            self.bilan["octets"] += entree["taille"]
+        for dossier in {Path(e["cible"]).parent for e in entrees}:
+            _fsync_dossier(dossier)
+        self.journal.unlink(missing_ok=True)
+        return self.bilan
+
+    def __enter__(self) -> "TransactionReecriture":
+        return self
+
+    def __exit__(self, type_exc, exc, trace) -> None:
+        if type_exc is None:
+            self.valider()
+        else:
+            self.annuler()
+
+
+def ecrire_fichier(chemin: Union[str, Path], contenu: Union[str, bytes],
+                   transaction: Optional[TransactionReecriture] = None, outil: str = "reecriture") -> bool:
+    """Écrit dans la transaction donnée, sinon dans une transaction d'un seul fichier.
+
+    Avec une transaction, retourne True si une réécriture a été préparée (elle
+    n'est publiée qu'à la validation) ; sans transaction, True si le fichier a
+    effectivement été réécrit.
+    """
+    if transaction is not None:
+        return transaction.ecrire(chemin, contenu)
+    seule = TransactionReecriture(outil)
+    try:
+        if not seule.ecrire(chemin, contenu):
+            return False
+    except BaseException:
+        seule.annuler()
+        raise
+    return seule.valider()["ecrits"] == 1
+
+
+# === Reprise après interruption
+def _remplacee(entree: Dict) -> bool:
+    try:
+        return _sha256(Path(entree["cible"]).read_bytes()) == entree["nouveau"]
+    except FileNotFoundError:
+        return False
+
+def _restaurer(entree: Dict) -> None:
+    cible = Path(entree["cible"])
+    if entree["ancien"] is None:
+        cible.unlink()
+        return
+    fd, restauration = tempfile.mkstemp(dir=cible.parent, prefix=f".{cible.name}.", suffix=SUFFIXE_TEMPORAIRE)
+    try:
+        with os.fdopen(fd, "wb") as flux:
+            depot().lire_objet(entree["ancien"], flux)
+            flux.flush()
+            os.fsync(flux.fileno())
+        os.chmod(restauration, cible.stat().st_mode & 0o7777)
+        os.replace(restauration, cible)
+    except BaseException:
+        Path(restauration).unlink(missing_ok=True)
+        raise
+
+def _balayer_temporaires(racine: Path, conserves: set) -> int:
+    """Supprime les temporaires abandonnés (passe interrompue avant valider)."""
+    supprimes = 0
+    for dossier, sous_dossiers, fichiers in os.walk(racine):
+        sous_dossiers[:] = [d for d in sous_dossiers if d not in IGNORES]
+        for nom in fichiers:
+            chemin = os.path.join(dossier, nom)
+            if nom.endswith(SUFFIXE_TEMPORAIRE) and chemin not in conserves:
+                try:
+                    os.unlink(chemin)
+                    supprimes += 1
+                except OSError as err:
+                    logging.warning(f"Temporaire non supprimé : {chemin} ({err})")
+    if supprimes:
+        logging.info(f"{supprimes} temporaire(s) abandonné(s) supprimé(s) sous {racine}")
+    return supprimes
+
+def recuperer(action: str = "avancer", journaux: Path = JOURNAUX_DIR, racine: Path = BASE_DIR) -> List[str]:
+    """Termine ("avancer") ou défait ("annuler") les validations interrompues.
+
+    avancer : les temporaires encore présents sont renommés sur leur cible.
+    annuler : les temporaires sont supprimés et les cibles déjà remplacées
+    reprennent leur contenu d'origine depuis le dépôt de sauvegardes. Si une
+    sauvegarde manque (transaction sans sauvegarde, objet ramassé), rien n'est
+    restauré et le journal est conservé.
+
+    Les temporaires *.luxtx qu'aucun journal restant ne référence (passe
+    interrompue avant la validation) sont ensuite supprimés sous racine.
+    Retourne les identifiants des transactions reprises.
+    """
+    if action not in ("avancer", "annuler"):
+        raise ValueError(f"Action de reprise inconnue : {action}")
+    traites = []
+    conserves = set()
+    for chemin in sorted(journaux.glob("*.json")) if journaux.exists() else []:
+        try:
+            journal = json.loads(chemin.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as err:
+            logging.error(f"Journal de transaction illisible : {chemin} ({err})")
+            continue
+        entrees = journal["entrees"]
+        if action == "avancer":
+            for entree in entrees:
+                if Path(entree["temporaire"]).exists():
+                    os.replace(entree["temporaire"], entree["cible"])
+        else:
+            a_restaurer = [e for e in entrees if _remplacee(e)]
+            manquants = [e["cible"] for e in a_restaurer
+                         if e["ancien"] is not None and not depot().objet(e["ancien"]).exists()]
+            if manquants:
+                logging.error(f"Transaction {journal['identifiant']} non annulée : sauvegarde introuvable pour "
+                              f"{len(manquants)} fichier(s) : {', '.join(manquants)}")
+                conserves.update(os.path.abspath(e["temporaire"]) for e in entrees)
+                continue
+            for entree in entrees:
+                Path(entree["temporaire"]).unlink(missing_ok=True)
+            for entree in a_restaurer:
+                _restaurer(entree)
+        for dossier in {Path(e["cible"]).parent for e in entrees}:
+            _fsync_dossier(dossier)
+        chemin.unlink()
+        traites.append(journal["identifiant"])
+        logging.info(f"Transaction {journal['identifiant']} reprise ({action}).")
+    _balayer_temporaires(racine, conserves)
+    return traites
+
+
+# === Banc d'essai
+def benchmark_reecriture(nb_fichiers: int = 2000, proportion_modifiee: float = 0.1) -> Dict[str, float]:
+    """Compare une passe qui réécrit tous les fichiers (write_text, ou écriture
+    atomique fichier par fichier) à une transaction qui n'écrit que les fichiers modifiés."""
+    corps = "\n".join(f"def fonction_{i}(x):\n    return x * {i}\n" for i in range(40))
+    seuil = int(nb_fichiers * proportion_modifiee)
+    resultats = {"fichiers": nb_fichiers, "modifies": seuil}
+
+    def contenu(i: int, passe: int) -> str:
+        return corps + (f"\n# passe {passe}\n" if i < seuil else "")
+
+    for passe, (nom, methode) in enumerate((
+            ("write_text_s", lambda chemin, texte: chemin.write_text(texte, encoding="utf-8")),
+            ("atomique_s", lambda chemin, texte: ecrire_atomique(chemin, texte.encode("utf-8"))),
+            ("transaction_s", None)), start=1):
+        with tempfile.TemporaryDirectory() as tmp:
+            dossier = Path(tmp)
+            fichiers = [dossier / f"module_{i}.py" for i in range(nb_fichiers)]
+            for chemin in fichiers:
+                chemin.write_text(corps, encoding="utf-8")
+            debut = time.perf_counter()
+            if methode:
+                for i, chemin in enumerate(fichiers):
+                    methode(chemin, contenu(i, passe))
+            else:
+                with TransactionReecriture("benchmark", journaux=dossier / ".transactions",
+                                           sauvegarde=False) as transaction:
+                    for i, chemin in enumerate(fichiers):
+                        transaction.ecrire(chemin, contenu(i, passe))
+            resultats[nom] = round(time.perf_counter() - debut, 3)
+
+    logging.info(f"Benchmark réécriture : {resultats}")
+    return resultats
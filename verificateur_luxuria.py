@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 """Vérificateur syntaxique des modules Luxuria"""
 
-import ast
+import time
 import logging
+import tempfile
+from collections import Counter
 from pathlib import Path
+from typing import Optional
 from assistant_pdg import AssistantPDG  # ✅ Orchestration centrale
+from cache_ast import CacheAST, cache
 
 # === Configuration du journal
 logging.basicConfig(
@@ -18,64 +22,133 @@ BASE_DIR = Path(__file__).resolve().parent
 scripts = [f for f in BASE_DIR.glob("*.py") if f.name != Path(__file__).name]
 
 # === Analyse syntaxique
-def extraire_imports(tree: ast.AST) -> list[str]:
-    imports = []
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            imports.extend(alias.name for alias in node.names)
-        elif isinstance(node, ast.ImportFrom):
-            imports.extend(alias.name for alias in node.names)
-    return imports
+def detecter_shadowing(noms) -> set[str]:
+    """Noms utilisés plusieurs fois (liste de noms ou compteur nom -> occurrences)."""
+    occurrences = noms if isinstance(noms, dict) else Counter(noms)
+    return {nom for nom, total in occurrences.items() if total > 1}
 
-def extraire_noms_utilises(tree: ast.AST) -> set[str]:
-    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
-
-def detecter_shadowing(noms: list[str]) -> set[str]:
-    return {nom for nom in noms if noms.count(nom) > 1}
-
-# === Analyse d’un script
-def analyser_script(script_path: Path) -> None:
-    logging.info(f"\nAnalyse de : {script_path.name}")
-    try:
-        contenu = script_path.read_text(encoding="utf-8")
-        tree = ast.parse(contenu)
-    except Exception as e:
-        logging.error(f"Erreur de lecture ou de parsing : {e}")
-        return
+# === Diagnostic d’un script
+def diagnostiquer(resume: dict) -> list[tuple[int, str]]:
+    """Retourne les messages (niveau, texte) du diagnostic d’un script, d’après son résumé."""
+    messages = []
 
     # Chemin universel
-    if "Path(__file__).resolve().parent" in contenu:
-        logging.info("Chemin universel détecté")
+    if resume["chemin_universel"]:
+        messages.append((logging.INFO, "Chemin universel détecté"))
     else:
-        logging.warning("Chemin universel manquant")
+        messages.append((logging.WARNING, "Chemin universel manquant"))
 
     # Bloc d’exécution autonome
-    if "__name__" in contenu and "__main__" in contenu:
-        logging.info("Bloc if __name__ == '__main__' détecté")
+    if resume["bloc_main"]:
+        messages.append((logging.INFO, "Bloc if __name__ == '__main__' détecté"))
     else:
-        logging.warning("Bloc d’exécution autonome manquant")
+        messages.append((logging.WARNING, "Bloc d’exécution autonome manquant"))
 
     # Imports inutilisés
-    imports = extraire_imports(tree)
-    noms_utilises = extraire_noms_utilises(tree)
+    imports = resume["noms_importes"]
+    noms_utilises = resume["noms"]
     imports_inutiles = [imp for imp in imports if imp not in noms_utilises]
     if imports_inutiles:
-        logging.warning(f"Imports inutilisés : {', '.join(imports_inutiles)}")
+        messages.append((logging.WARNING, f"Imports inutilisés : {', '.join(imports_inutiles)}"))
     else:
-        logging.info("Aucun import inutile")
+        messages.append((logging.INFO, "Aucun import inutile"))
 
     # Shadowing
-    noms = [node.id for node in ast.walk(tree) if isinstance(node, ast.Name)]
-    doublons = detecter_shadowing(noms)
+    doublons = detecter_shadowing(resume["noms"])
     if doublons:
-        logging.warning(f"Variables réutilisées plusieurs fois : {', '.join(sorted(doublons))}")
+        messages.append((logging.WARNING, f"Variables réutilisées plusieurs fois : {', '.join(sorted(doublons))}"))
     else:
-        logging.info("Pas de shadowing détecté")
+        messages.append((logging.INFO, "Pas de shadowing détecté"))
+    return messages
+
+def _diagnostiquer_fichier(resume: Optional[dict]) -> list[tuple[int, str]]:
+    if resume is None:
+        return [(logging.ERROR, "Erreur de lecture ou de parsing : fichier illisible")]
+    if resume["syntaxe"]:
+        erreur = resume["syntaxe"]
+        return [(logging.ERROR, f"Erreur de lecture ou de parsing : {erreur['message']} (ligne {erreur['ligne']})")]
+    return diagnostiquer(resume)
+
+# === Analyse d’un script
+def analyser_script(script_path: Path) -> None:
+    logging.info(f"\nAnalyse de : {script_path.name}")
+    resume = cache().resumer(script_path)
+    for niveau, message in _diagnostiquer_fichier(resume):
+        logging.log(niveau, message)
 
 # === Analyse globale
-def analyser_tous_les_scripts() -> None:
-    for script in scripts:
-        analyser_script(script)
+def analyser_tous_les_scripts(fichiers: Optional[list[Path]] = None, max_workers: Optional[int] = None,
+                              cache_ast: Optional[CacheAST] = None, journaliser: bool = True) -> list[dict]:
+    """Analyse les scripts (parsing en parallèle) et retourne le temps passé par fichier."""
+    fichiers = scripts if fichiers is None else fichiers
+    cache_ast = cache_ast or cache()
+    resumes = cache_ast.resumer_lot(fichiers, max_workers)
+
+    temps = []
+    for script in fichiers:
+        resume, duree = resumes[str(script)]
+        debut = time.perf_counter()
+        messages = _diagnostiquer_fichier(resume)
+        temps.append({"fichier": str(script), "duree_ms": (duree + time.perf_counter() - debut) * 1000})
+        if journaliser:
+            logging.info(f"\nAnalyse de : {script.name}")
+            for niveau, message in messages:
+                logging.log(niveau, message)
+
+    cache_ast.sauvegarder()
+    if journaliser:
+        afficher_temps(temps)
+    return temps
+
+def afficher_temps(temps: list[dict], limite: int = 10) -> None:
+    """Affiche les fichiers les plus longs à analyser et le total."""
+    total = sum(t["duree_ms"] for t in temps)
+    logging.info(f"\nTemps d’analyse : {total:.1f} ms pour {len(temps)} fichier(s)")
+    for t in sorted(temps, key=lambda t: t["duree_ms"], reverse=True)[:limite]:
+        logging.info(f"  {t['duree_ms']:8.2f} ms  {Path(t['fichier']).name}")
+
+# === Banc d’essai
+def generer_corpus(dossier: Path, nb_modules: int) -> list[Path]:
+    """Génère des modules synthétiques (imports, fonctions, classes, noms réutilisés)."""
+    modele = "import os\nimport json\nfrom pathlib import Path\n\n" + "".join(
+        f"def fonction_{i}(valeur):\n    total = valeur + {i}\n    total = total * 2\n    return os.path.join(str(total), 'x')\n\n"
+        for i in range(20)
+    ) + "class Modele:\n    def methode(self):\n        return json.dumps({})\n"
+    fichiers = []
+    for i in range(nb_modules):
+        sous_dossier = dossier / f"paquet_{i // 1000}"
+        sous_dossier.mkdir(exist_ok=True)
+        fichier = sous_dossier / f"module_{i}.py"
+        fichier.write_text(f"# module {i}\n" + modele, encoding="utf-8")
+        fichiers.append(fichier)
+    return fichiers
+
+def benchmark_verificateur(tailles: tuple = (1000, 10000, 50000), max_workers: Optional[int] = None) -> list[dict]:
+    """Mesure l’analyse complète (cache vide) puis avec cache, par taille de corpus."""
+    resultats = []
+    for taille in tailles:
+        with tempfile.TemporaryDirectory() as tmp:
+            dossier = Path(tmp)
+            fichiers = generer_corpus(dossier, taille)
+            cache_ast = CacheAST(dossier / "cache_ast.json")
+
+            debut = time.perf_counter()
+            analyser_tous_les_scripts(fichiers, max_workers, cache_ast, journaliser=False)
+            froid = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            analyser_tous_les_scripts(fichiers, max_workers, CacheAST(dossier / "cache_ast.json"), journaliser=False)
+            chaud = time.perf_counter() - debut
+
+        resultat = {
+            "modules": taille,
+            "froid_s": round(froid, 3),
+            "chaud_s": round(chaud, 3),
+            "us_par_module": round(froid / taille * 1e6, 1)
+        }
+        logging.info(f"Benchmark vérificateur : {resultat}")
+        resultats.append(resultat)
+    return resultats
 
 # === Point d’entrée modulaire
 def main() -> None: